@@ -1,70 +1,25 @@
-import hashlib
-import uuid
-import os
 import tkinter as tk
 from tkinter import filedialog, messagebox
 from tkinter import ttk
-import re
-from datetime import datetime
 from pathlib import Path
 import threading
+import queue
 import time
-import json
-import base64
+import sys
 
-# ══════════════════════════════════════════════════════════════════════════════
-# 🔐 PROTEZIONE UNIVOCA DEL SOFTWARE
-# ══════════════════════════════════════════════════════════════════════════════
-
-class SoftwareProtection:
-    """Sistema di protezione e licenza univoca"""
-    
-    PRODUCT_NAME = "Code File Signer"
-    PRODUCT_VERSION = "1.0.0"
-    AUTHOR = "Dany © 2025 - All Rights Reserved"
-    
-    PRODUCT_ID = "CFS-2025-PRO-SECURE"
-    
-    ORIGINAL_HASH = "7a8b9c0d1e2f3a4b5c6d7e8f9a0b1c2d3e4f5a6b"
-    
-    @staticmethod
-    def get_machine_id():
-        """Genera ID univoco della macchina"""
-        try:
-            machine_id = str(uuid.getnode())  
-            return machine_id
-        except:
-            return "UNKNOWN"
-    
-    @staticmethod
-    def get_license_key():
-        """Genera chiave di licenza univoca basata sulla macchina"""
-        machine_id = SoftwareProtection.get_machine_id()
-        product_id = SoftwareProtection.PRODUCT_ID
-        timestamp = str(datetime.now().year)
-        
-        license_data = f"{product_id}_{machine_id}_{timestamp}"
-        license_hash = hashlib.sha256(license_data.encode()).hexdigest()[:32].upper()
-        
-        return f"LIC-{license_hash}"
-    
-    @staticmethod
-    def get_software_signature():
-        """Firma digitale del software"""
-        sig_data = f"{SoftwareProtection.PRODUCT_ID}_{SoftwareProtection.PRODUCT_VERSION}_{SoftwareProtection.AUTHOR}"
-        return hashlib.sha256(sig_data.encode()).hexdigest()
-    
-    @staticmethod
-    def get_watermark():
-        """Watermark univoco del software"""
-        machine_id = SoftwareProtection.get_machine_id()
-        product_sig = SoftwareProtection.get_software_signature()
-        watermark = f"[{SoftwareProtection.PRODUCT_NAME} v{SoftwareProtection.PRODUCT_VERSION} - {machine_id[:8]}]"
-        return watermark
-
-LICENSE_KEY = SoftwareProtection.get_license_key()
-SOFTWARE_SIGNATURE = SoftwareProtection.get_software_signature()
-WATERMARK = SoftwareProtection.get_watermark()
+# Il motore di firma vive in filesigner_core (importabile senza tkinter); licenza e
+# watermark si leggono da lì, come filesigner_core.LICENSE_KEY e simili.
+from filesigner_core import (
+    CANCELLED_MESSAGE,
+    OperationCancelled,
+    SoftwareProtection,
+    add_signature,
+    iter_target_files,
+    main,
+    read_signature_trailer,
+    strip_signature,
+    verify_signature,
+)
 
 # ══════════════════════════════════════════════════════════════════════════════
 # 🎨 TEMA E COLORI (Dark Modern)
@@ -80,183 +35,217 @@ TEXT_PRIMARY = "#f1f5f9"
 TEXT_SECONDARY = "#94a3b8"
 
 # ══════════════════════════════════════════════════════════════════════════════
-# 💬 STILI DI COMMENTO PER LINGUAGGI
-# ══════════════════════════════════════════════════════════════════════════════
-
-COMMENT_STYLES = {
-    ".py": "#",
-    ".js": "//",
-    ".ts": "//",
-    ".jsx": "//",
-    ".tsx": "//",
-    ".cpp": "//",
-    ".c": "//",
-    ".java": "//",
-    ".cs": "//",
-    ".php": "//",
-    ".go": "//",
-    ".rs": "//",
-    ".swift": "//",
-    ".kt": "//",
-    ".scala": "//",
-    ".html": "<!--",
-    ".xml": "<!--",
-    ".css": "/*",
-    ".scss": "//",
-    ".sql": "--",
-    ".r": "#",
-    ".lua": "--",
-    ".sh": "#",
-    ".bash": "#",
-    ".rb": "#",
-}
-
-CLOSING_COMMENT = {
-    "<!--": "-->",
-    "/*": "*/",
-}
-
-# ══════════════════════════════════════════════════════════════════════════════
-# ✍️ FUNZIONI DI FIRMA DIGITALE
+# 📋 TABELLA DEI RISULTATI (RIGHE VIRTUALIZZATE)
 # ══════════════════════════════════════════════════════════════════════════════
 
-def get_comment_lines(ext, signature, file_hash, timestamp):
-    """Genera le linee di commento per la firma (corretto)"""
-    ext = ext.lower()
-    comment = COMMENT_STYLES.get(ext, "#")
-    closing = CLOSING_COMMENT.get(comment, "")
-    
-    sig_marker = f"_SIGNATURE_{signature}"
-    hash_marker = f"_HASH_{file_hash}"
-    time_marker = f"_SIGNED_{timestamp}"
-    
-    if ext == ".html" or ext == ".xml":
-        signature_line = f"<!-- {sig_marker} -->"
-        hash_line = f"<!-- {hash_marker} -->"
-        time_line = f"<!-- {time_marker} -->"
-    elif comment == "/*":
-        signature_line = f"/* {sig_marker} */"
-        hash_line = f"/* {hash_marker} */"
-        time_line = f"/* {time_marker} */"
-    elif closing:
-        signature_line = f"{comment} {sig_marker} {closing}"
-        hash_line = f"{comment} {hash_marker} {closing}"
-        time_line = f"{comment} {time_marker} {closing}"
-    else:
-        signature_line = f"{comment} {sig_marker}"
-        hash_line = f"{comment} {hash_marker}"
-        time_line = f"{comment} {time_marker}"
-    
-    return signature_line, hash_line, time_line
-
-def extract_signature_data(file_path):
-    """Estrae firma e hash dal file"""
-    with open(file_path, "r", encoding="utf-8") as f:
-        content = f.read()
-    
-    sig_match = re.search(r"_SIGNATURE_([a-f0-9\-]+)", content)
-    hash_match = re.search(r"_HASH_([a-f0-9]+)", content)
-    time_match = re.search(r"_SIGNED_(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})", content)
-    
-    return {
-        'signature': sig_match.group(1) if sig_match else None,
-        'hash': hash_match.group(1) if hash_match else None,
-        'timestamp': time_match.group(1) if time_match else None,
-        'raw': content
-    }
-
-def remove_signature_lines(content):
-    """Rimuove le linee di firma dal contenuto normalizzando il testo"""
-    lines = content.split('\n')
-    filtered = []
-    for line in lines:
-        if '_SIGNATURE_' not in line and '_HASH_' not in line and '_SIGNED_' not in line:
-            filtered.append(line)
+class ResultsModel:
+    """Risultati della coda di lavoro, separati dal widget che li mostra.
     
-    result = '\n'.join(filtered).strip()
+    Ogni riga è (percorso, esito, messaggio, hash, secondi) con esito None finché
+    il file è in coda. Con il filtro "failed" la vista contiene solo le righe
+    fallite, tramite un indice aggiornato man mano che arrivano i risultati.
+    """
     
-    while '\n\n\n' in result:
-        result = result.replace('\n\n\n', '\n\n')
+    def __init__(self):
+        self.clear()
     
-    return result
-
-def add_signature(file_path, progress_callback=None):
-    """Aggiunge firma digitale SHA256 + UUID + timestamp al file"""
-    try:
-        if not os.path.exists(file_path):
-            return False, f"Il file {file_path} non esiste."
-        
-        if progress_callback:
-            progress_callback("Lettura file...")
-        
-        ext = os.path.splitext(file_path)[1].lower()
-        with open(file_path, "r", encoding="utf-8") as f:
-            original_content = f.read()
-        
-        clean_content = remove_signature_lines(original_content)
-        
-        if progress_callback:
-            progress_callback("Generazione firma...")
-        
-        unique_id = str(uuid.uuid4())
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        
-        file_hash = hashlib.sha256(clean_content.encode("utf-8")).hexdigest()
-        
-        signature_line, hash_line, time_line = get_comment_lines(ext, unique_id, file_hash, timestamp)
-        
-        final_content = clean_content + "\n\n" + signature_line + "\n" + hash_line + "\n" + time_line + "\n"
-        
-        if progress_callback:
-            progress_callback("Salvataggio file...")
-        
-        with open(file_path, "w", encoding="utf-8") as f:
-            f.write(final_content)
-        
-        return True, f"SHA256: {file_hash}\nID: {unique_id}\nData: {timestamp}"
+    def clear(self):
+        self.rows = []
+        self.failed = []
+        self.ok = 0
+        self.filter = "all"
     
-    except Exception as e:
-        return False, f"Errore durante la firma: {str(e)}"
+    def extend(self, paths):
+        """Accoda i file in attesa di elaborazione"""
+        self.rows.extend((path, None, "", "", None) for path in paths)
+    
+    def set_result(self, position, ok, message, file_hash, elapsed):
+        self.rows[position] = (self.rows[position][0], ok, message, file_hash, elapsed)
+        if ok:
+            self.ok += 1
+        else:
+            # La coda è sequenziale: le posizioni arrivano in ordine crescente
+            self.failed.append(position)
+    
+    @property
+    def done(self):
+        return self.ok + len(self.failed)
+    
+    @property
+    def pending(self):
+        return len(self.rows) - self.done
+    
+    def __len__(self):
+        return len(self.failed) if self.filter == "failed" else len(self.rows)
+    
+    def row(self, position):
+        """Riga alla posizione position della vista filtrata"""
+        return self.rows[self.failed[position] if self.filter == "failed" else position]
 
-def verify_signature(file_path, progress_callback=None):
-    """Verifica l'integrità del file confrontando l'hash SHA256 attuale con quello memorizzato"""
-    try:
-        if not os.path.exists(file_path):
-            return False, f"Il file {file_path} non esiste."
-        
-        if progress_callback:
-            progress_callback("Estrazione dati firma...")
-        
-        data = extract_signature_data(file_path)
-        
-        if not data['signature'] or not data['hash']:
-            return False, "File non firmato o firma corrotta."
-        
-        if progress_callback:
-            progress_callback("Verifica integrità...")
-        
-        clean_content = remove_signature_lines(data['raw'])
-        recalculated_hash = hashlib.sha256(clean_content.encode("utf-8")).hexdigest()
-        
-        is_valid = recalculated_hash == data['hash']
-        
-        info = f"ID: {data['signature']}\nHash: {data['hash'][:32]}...\nData: {data['timestamp'] or 'N/A'}"
+class ResultsTable(tk.Frame):
+    """Treeview che materializza solo le righe visibili di un ResultsModel.
+    
+    Il Treeview contiene al più height elementi, riutilizzati a ogni scorrimento:
+    con 100.000 file la GUI aggiorna solo le righe a schermo. Scrollbar, rotella
+    e tastiera spostano l'offset nel modello invece di scorrere il Treeview.
+    """
+    
+    COLUMNS = (
+        ("file", "File", 330),
+        ("status", "Stato", 150),
+        ("hash", "Hash", 200),
+        ("elapsed", "Tempo", 80),
+    )
+    
+    def __init__(self, master, model, height=8, on_open=None):
+        super().__init__(master, bg=BG_SECONDARY)
+        self.model = model
+        self.height = height
+        self.on_open = on_open
+        self.offset = 0
+        self.selected = None
+        
+        self.tree = ttk.Treeview(
+            self,
+            columns=[name for name, _, _ in self.COLUMNS],
+            show="headings",
+            height=height,
+            selectmode="browse",
+            style="Results.Treeview"
+        )
+        for name, title, width in self.COLUMNS:
+            self.tree.heading(name, text=title, anchor=tk.W)
+            self.tree.column(name, width=width, minwidth=60, anchor=tk.W, stretch=(name == "file"))
+        self.tree.tag_configure("ok", foreground=SUCCESS_COLOR)
+        self.tree.tag_configure("failed", foreground=ERROR_COLOR)
+        self.tree.tag_configure("pending", foreground=TEXT_SECONDARY)
+        
+        self.items = [self.tree.insert("", tk.END) for _ in range(height)]
+        self.tree.detach(*self.items)
+        self.attached = 0
+        
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        
+        self.tree.bind("<MouseWheel>", self.on_wheel)
+        self.tree.bind("<Button-4>", lambda e: self.scroll(-3))
+        self.tree.bind("<Button-5>", lambda e: self.scroll(3))
+        for key, step in (("<Up>", -1), ("<Down>", 1), ("<Prior>", -height), ("<Next>", height)):
+            self.tree.bind(key, lambda e, step=step: self.move_selection(step))
+        self.tree.bind("<Home>", lambda e: self.move_selection(-len(self.model)))
+        self.tree.bind("<End>", lambda e: self.move_selection(len(self.model)))
+        self.tree.bind("<<TreeviewSelect>>", self.on_select)
+        self.tree.bind("<Double-1>", self.on_activate)
+        self.tree.bind("<Return>", self.on_activate)
+        
+        self.refresh()
+    
+    @staticmethod
+    def format_row(row):
+        """Valori delle colonne e tag di colore per una riga del modello"""
+        path, ok, message, file_hash, elapsed = row
+        if ok is None:
+            return (path, "⏳ In coda", "", ""), "pending"
+        
+        if elapsed >= 1:
+            duration = f"{elapsed:.2f} s"
+        else:
+            duration = f"{elapsed * 1000:.1f} ms"
+        if ok:
+            return (path, "✓ OK", file_hash, duration), "ok"
+        detail = message.splitlines()[0] if message else "Errore"
+        return (path, f"✗ {detail}", file_hash, duration), "failed"
+    
+    def reset(self):
+        """Torna all'inizio della vista (dopo un cambio di filtro o una nuova coda)"""
+        self.offset = 0
+        self.selected = None
+        self.refresh()
+    
+    def refresh(self):
+        """Riscrive le righe visibili a partire da offset"""
+        total = len(self.model)
+        self.offset = max(0, min(self.offset, total - self.height))
+        count = min(self.height, total - self.offset)
+        
+        for slot, item in enumerate(self.items):
+            if slot < count:
+                values, tag = self.format_row(self.model.row(self.offset + slot))
+                self.tree.item(item, values=values, tags=(tag,))
+                if slot >= self.attached:
+                    self.tree.move(item, "", slot)
+            elif slot < self.attached:
+                self.tree.detach(item)
+        self.attached = count
+        
+        slot = None if self.selected is None else self.selected - self.offset
+        if slot is not None and 0 <= slot < count:
+            self.tree.selection_set(self.items[slot])
+            self.tree.focus(self.items[slot])
+        elif self.tree.selection():
+            self.tree.selection_remove(*self.tree.selection())
+        
+        if total:
+            self.scrollbar.set(self.offset / total, (self.offset + count) / total)
+        else:
+            self.scrollbar.set(0, 1)
+    
+    def scroll(self, rows):
+        self.offset += rows
+        self.refresh()
+        return "break"
+    
+    def on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.offset = int(float(amount) * len(self.model))
+            self.refresh()
+        else:
+            self.scroll(int(amount) * (self.height if unit == "pages" else 1))
+    
+    def on_wheel(self, event):
+        return self.scroll(-3 if event.delta > 0 else 3)
+    
+    def move_selection(self, step):
+        total = len(self.model)
+        if not total:
+            return "break"
         
-        return is_valid, info
+        if self.selected is None:
+            position = self.offset
+        else:
+            position = max(0, min(total - 1, self.selected + step))
+        if position < self.offset:
+            self.offset = position
+        elif position >= self.offset + self.height:
+            self.offset = position - self.height + 1
+        self.selected = position
+        self.refresh()
+        return "break"
     
-    except Exception as e:
-        return False, f"Errore durante la verifica: {str(e)}"
+    def on_select(self, event):
+        # L'evento arriva dopo refresh(): la selezione corrente è già coerente con offset
+        selection = self.tree.selection()
+        if selection and selection[0] in self.items:
+            self.selected = self.offset + self.items.index(selection[0])
+    
+    def on_activate(self, event):
+        if self.on_open and self.selected is not None and self.selected < len(self.model):
+            self.on_open(self.model.row(self.selected))
+        return "break"
 
 # ══════════════════════════════════════════════════════════════════════════════
 # 🖥️ INTERFACCIA GRAFICA (GUI MODERNA DARK THEME)
 # ══════════════════════════════════════════════════════════════════════════════
 
 class FileSigner(tk.Tk):
+    PROGRESS_POLL_MS = 50
+    
     def __init__(self):
         super().__init__()
         
         self.title("📝 Code File Signer")
-        self.geometry("850x840")
+        self.geometry("850x940")
         self.resizable(False, False)
         
         try:
@@ -264,9 +253,16 @@ class FileSigner(tk.Tk):
         except:
             pass
         
-        self.progress_running = False
+        self.worker = None
+        self.events = queue.Queue()
+        self.cancel_event = threading.Event()
+        
+        self.selected_paths = []
+        self.selection_text = ""
+        self.results_model = ResultsModel()
         
         self.configure_progress_bar_style()
+        self.configure_table_style()
         
         self.configure(bg=BG_PRIMARY)
         
@@ -294,6 +290,27 @@ class FileSigner(tk.Tk):
             thickness=20
         )
     
+    def configure_table_style(self):
+        """Configura i colori del Treeview dei risultati"""
+        style = ttk.Style()
+        style.configure(
+            "Results.Treeview",
+            background=BG_PRIMARY,
+            fieldbackground=BG_PRIMARY,
+            foreground=TEXT_PRIMARY,
+            bordercolor=BG_ACCENT,
+            rowheight=22,
+            font=("Segoe UI", 9)
+        )
+        style.configure(
+            "Results.Treeview.Heading",
+            background=BG_ACCENT,
+            foreground=ACCENT_COLOR,
+            relief=tk.FLAT,
+            font=("Segoe UI", 9, "bold")
+        )
+        style.map("Results.Treeview", background=[("selected", BG_ACCENT)])
+    
     def create_ui(self):
         header = tk.Frame(self, bg=BG_ACCENT, height=120)
         header.pack(fill=tk.X)
@@ -327,7 +344,7 @@ class FileSigner(tk.Tk):
         
         file_label = tk.Label(
             file_frame,
-            text="📂 Seleziona File",
+            text="📂 Seleziona File o Cartella",
             font=("Segoe UI", 11, "bold"),
             bg=BG_SECONDARY,
             fg=ACCENT_COLOR
@@ -346,9 +363,12 @@ class FileSigner(tk.Tk):
         self.entry_file.pack(fill=tk.X, padx=15, pady=(5, 10))
         self.entry_file.bind("<Return>", lambda e: self.browse_file())
         
-        browse_btn = tk.Button(
-            file_frame,
-            text="🔍 SFOGLIA",
+        browse_frame = tk.Frame(file_frame, bg=BG_SECONDARY)
+        browse_frame.pack(fill=tk.X, padx=15, pady=(0, 10))
+        
+        self.browse_btn = tk.Button(
+            browse_frame,
+            text="🔍 SFOGLIA FILE",
             command=self.browse_file,
             font=("Segoe UI", 10, "bold"),
             bg=ACCENT_COLOR,
@@ -358,11 +378,39 @@ class FileSigner(tk.Tk):
             padx=20,
             pady=8
         )
-        browse_btn.pack(padx=15, pady=(0, 10), fill=tk.X)
+        self.browse_btn.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(0, 5))
+        
+        self.folder_btn = tk.Button(
+            browse_frame,
+            text="📁 CARTELLA",
+            command=self.browse_folder,
+            font=("Segoe UI", 10, "bold"),
+            bg=ACCENT_COLOR,
+            fg=BG_PRIMARY,
+            relief=tk.FLAT,
+            cursor="hand2",
+            padx=20,
+            pady=8
+        )
+        self.folder_btn.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(5, 0))
         
         progress_container = tk.Frame(file_frame, bg=BG_SECONDARY)
         progress_container.pack(fill=tk.X, padx=15, pady=(0, 8))
         
+        self.cancel_btn = tk.Button(
+            progress_container,
+            text="✖ ANNULLA",
+            command=self.cancel_task,
+            font=("Segoe UI", 8, "bold"),
+            bg=BG_PRIMARY,
+            fg=ERROR_COLOR,
+            relief=tk.FLAT,
+            cursor="hand2",
+            padx=10,
+            state=tk.DISABLED
+        )
+        self.cancel_btn.pack(side=tk.RIGHT, padx=(10, 0))
+        
         self.progress = ttk.Progressbar(
             progress_container,
             mode='determinate',
@@ -370,7 +418,7 @@ class FileSigner(tk.Tk):
             style="TProgressbar",
             maximum=100
         )
-        self.progress.pack(fill=tk.X)
+        self.progress.pack(side=tk.LEFT, fill=tk.X, expand=True)
         self.progress['value'] = 0
         
         self.status_label = tk.Label(
@@ -383,10 +431,13 @@ class FileSigner(tk.Tk):
         self.status_label.pack(anchor=tk.W, padx=15, pady=(0, 10))
         
         buttons_frame = tk.Frame(main_frame, bg=BG_PRIMARY)
-        buttons_frame.pack(fill=tk.BOTH, expand=True, pady=20)
+        buttons_frame.pack(fill=tk.BOTH, expand=True)
         
-        sign_btn = tk.Button(
-            buttons_frame,
+        actions_frame = tk.Frame(buttons_frame, bg=BG_PRIMARY)
+        actions_frame.pack(fill=tk.X, pady=(0, 15))
+        
+        self.sign_btn = tk.Button(
+            actions_frame,
             text="✏️  FIRMA FILE",
             command=self.sign_file,
             font=("Segoe UI", 12, "bold"),
@@ -394,13 +445,13 @@ class FileSigner(tk.Tk):
             fg="white",
             relief=tk.FLAT,
             cursor="hand2",
-            padx=30,
-            pady=15
+            padx=20,
+            pady=12
         )
-        sign_btn.pack(fill=tk.X, pady=(0, 15))
+        self.sign_btn.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(0, 8))
         
-        verify_btn = tk.Button(
-            buttons_frame,
+        self.verify_btn = tk.Button(
+            actions_frame,
             text="✓ VERIFICA FIRMA",
             command=self.verify_file,
             font=("Segoe UI", 12, "bold"),
@@ -408,13 +459,13 @@ class FileSigner(tk.Tk):
             fg=BG_PRIMARY,
             relief=tk.FLAT,
             cursor="hand2",
-            padx=30,
-            pady=15
+            padx=20,
+            pady=12
         )
-        verify_btn.pack(fill=tk.X, pady=(0, 15))
+        self.verify_btn.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=8)
         
-        remove_btn = tk.Button(
-            buttons_frame,
+        self.remove_btn = tk.Button(
+            actions_frame,
             text="🗑️  RIMUOVI FIRMA",
             command=self.remove_signature,
             font=("Segoe UI", 12, "bold"),
@@ -422,10 +473,45 @@ class FileSigner(tk.Tk):
             fg="white",
             relief=tk.FLAT,
             cursor="hand2",
-            padx=30,
-            pady=15
+            padx=20,
+            pady=12
         )
-        remove_btn.pack(fill=tk.X, pady=(0, 15))
+        self.remove_btn.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(8, 0))
+        
+        results_frame = tk.Frame(buttons_frame, bg=BG_SECONDARY, highlightthickness=2, highlightbackground=BG_ACCENT)
+        results_frame.pack(fill=tk.BOTH, expand=True)
+        
+        summary_bar = tk.Frame(results_frame, bg=BG_SECONDARY)
+        summary_bar.pack(fill=tk.X, padx=10, pady=(8, 6))
+        
+        self.summary_label = tk.Label(
+            summary_bar,
+            text="📋 Nessun risultato",
+            font=("Segoe UI", 9, "bold"),
+            bg=BG_SECONDARY,
+            fg=TEXT_SECONDARY
+        )
+        self.summary_label.pack(side=tk.LEFT)
+        
+        self.filter_var = tk.StringVar(value="all")
+        for value, text in (("failed", "Solo errori"), ("all", "Tutti")):
+            tk.Radiobutton(
+                summary_bar,
+                text=text,
+                value=value,
+                variable=self.filter_var,
+                command=self.apply_filter,
+                font=("Segoe UI", 9),
+                bg=BG_SECONDARY,
+                fg=TEXT_PRIMARY,
+                selectcolor=BG_PRIMARY,
+                activebackground=BG_SECONDARY,
+                activeforeground=ACCENT_COLOR,
+                cursor="hand2"
+            ).pack(side=tk.RIGHT, padx=(10, 0))
+        
+        self.results = ResultsTable(results_frame, self.results_model, on_open=self.show_result)
+        self.results.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
         
         separator = tk.Frame(buttons_frame, bg=BG_ACCENT, height=1)
         separator.pack(fill=tk.X, pady=10)
@@ -475,7 +561,7 @@ class FileSigner(tk.Tk):
         
         footer_right = tk.Label(
             footer_top,
-            text=WATERMARK,
+            text=SoftwareProtection.get_watermark(),
             font=("Segoe UI", 7),
             bg=BG_ACCENT,
             fg=TEXT_SECONDARY
@@ -496,7 +582,7 @@ class FileSigner(tk.Tk):
         
         footer_license = tk.Label(
             footer_bottom,
-            text=f"License: {LICENSE_KEY}",
+            text=f"License: {SoftwareProtection.get_license_key()}",
             font=("Segoe UI", 7),
             bg=BG_ACCENT,
             fg=ACCENT_COLOR
@@ -505,10 +591,9 @@ class FileSigner(tk.Tk):
     
     def browse_file(self):
         self.update_status("⏳ Scelta file in corso...", TEXT_SECONDARY)
-        self.start_progress()
         
-        file_path = filedialog.askopenfilename(
-            title="Seleziona un file",
+        file_paths = filedialog.askopenfilenames(
+            title="Seleziona uno o più file",
             filetypes=[
                 ("Tutti i file", "*.*"),
                 ("Python", "*.py"),
@@ -523,45 +608,195 @@ class FileSigner(tk.Tk):
             ]
         )
         
-        self.stop_progress()
+        if file_paths:
+            self.set_selection(list(file_paths))
+        else:
+            self.update_status("✓ Applicazione pronta", SUCCESS_COLOR)
+    
+    def browse_folder(self):
+        self.update_status("⏳ Scelta cartella in corso...", TEXT_SECONDARY)
         
-        if file_path:
-            self.entry_file.delete(0, tk.END)
-            self.entry_file.insert(0, file_path)
-            file_name = Path(file_path).name
-            self.update_status(f"📄 File selezionato: {file_name}", ACCENT_COLOR)
+        folder = filedialog.askdirectory(title="Seleziona una cartella", mustexist=True)
+        
+        if folder:
+            self.set_selection([folder])
         else:
             self.update_status("✓ Applicazione pronta", SUCCESS_COLOR)
     
+    def set_selection(self, paths):
+        """Memorizza i percorsi scelti e li riassume nel campo di testo"""
+        self.selected_paths = paths
+        if len(paths) == 1:
+            self.selection_text = paths[0]
+        else:
+            names = ", ".join(Path(path).name for path in paths[:3])
+            more = f", ... (+{len(paths) - 3})" if len(paths) > 3 else ""
+            self.selection_text = f"{len(paths)} file: {names}{more}"
+        
+        self.entry_file.delete(0, tk.END)
+        self.entry_file.insert(0, self.selection_text)
+        self.update_status(f"📄 Selezione: {self.describe_selection(paths)}", ACCENT_COLOR)
+    
+    def get_selection(self):
+        """Percorsi da elaborare: quelli scelti con i dialoghi o il testo digitato a mano"""
+        text = self.entry_file.get().strip()
+        if self.selected_paths and text == self.selection_text:
+            return list(self.selected_paths)
+        return [text] if text else []
+    
+    @staticmethod
+    def describe_selection(paths):
+        if len(paths) > 1:
+            return f"{len(paths)} file"
+        if Path(paths[0]).is_dir():
+            return f"cartella {Path(paths[0]).name}"
+        return Path(paths[0]).name
+    
     def update_status(self, text, color=""):
         self.status_label.config(text=text, fg=color or TEXT_SECONDARY)
-        self.update()
     
-    def start_progress(self):
-        """Avvia l'animazione della barra di progresso"""
+    def update_summary(self):
+        model = self.results_model
+        if not model.rows:
+            self.summary_label.config(text="📋 Nessun risultato", fg=TEXT_SECONDARY)
+            return
+        
+        text = f"📋 {len(model.rows)} file  |  ✓ {model.ok}  |  ✗ {len(model.failed)}"
+        if model.pending:
+            text += f"  |  ⏳ {model.pending}"
+        self.summary_label.config(text=text, fg=ERROR_COLOR if model.failed else TEXT_PRIMARY)
+    
+    def apply_filter(self):
+        self.results_model.filter = self.filter_var.get()
+        self.results.reset()
+    
+    def set_busy(self, busy):
+        """Abilita/disabilita i comandi mentre un'operazione è in corso"""
+        state = tk.DISABLED if busy else tk.NORMAL
+        for button in (self.browse_btn, self.folder_btn, self.sign_btn, self.verify_btn, self.remove_btn):
+            button.config(state=state)
+        self.cancel_btn.config(state=tk.NORMAL if busy else tk.DISABLED)
+    
+    def run_queue(self, func, paths, description, done_text):
+        """Elabora i file in un thread di lavoro; risultati e avanzamento tornano alla GUI tramite after()"""
+        if self.worker is not None:
+            return
+        
+        self.cancel_event = threading.Event()
+        self.events = queue.Queue()
         self.progress['value'] = 0
-        self.progress_running = True
-        
-        def animate():
-            while self.progress_running and self.progress['value'] < 90:
-                self.progress['value'] += 2
-                time.sleep(0.05)
-                self.update()
-        
-        thread = threading.Thread(target=animate, daemon=True)
-        thread.start()
-    
-    def stop_progress(self):
-        """Ferma l'animazione della barra e la completa"""
-        self.progress_running = False
-        self.progress['value'] = 100
-        self.update()
-        time.sleep(0.3)
+        self.results_model.clear()
+        self.filter_var.set("all")
+        self.results.reset()
+        self.update_summary()
+        self.set_busy(True)
+        self.update_status(description, TEXT_SECONDARY)
+        
+        def work():
+            try:
+                # Le cartelle vengono espanse nei file di codice; i file scelti passano così come sono
+                files = [file_path for path in paths
+                         for file_path in (iter_target_files([path]) if Path(path).is_dir() else [path])]
+                self.events.put(("queued", files))
+                progress_callback = self.progress_callback if len(files) == 1 else None
+                
+                for position, file_path in enumerate(files):
+                    if self.cancel_event.is_set():
+                        break
+                    self.events.put(("file", position, file_path))
+                    
+                    start = time.perf_counter()
+                    ok, message = func(file_path, progress_callback, bytes_callback=self.bytes_callback)
+                    elapsed = time.perf_counter() - start
+                    if not ok and message == CANCELLED_MESSAGE and self.cancel_event.is_set():
+                        break
+                    
+                    file_hash = ""
+                    if ok and func is not strip_signature:
+                        trailer = read_signature_trailer(file_path)
+                        file_hash = trailer['hash'] if trailer else ""
+                    self.events.put(("result", position, ok, message, file_hash, elapsed))
+            finally:
+                self.events.put(("done",))
+        
+        self.worker = threading.Thread(target=work, daemon=True)
+        self.worker.start()
+        self.after(self.PROGRESS_POLL_MS, self.poll_task, description, done_text)
+    
+    def poll_task(self, description, done_text):
+        """Applica gli eventi del thread di lavoro (eseguito nel thread della GUI)"""
+        model = self.results_model
+        finished = False
+        changed = False
+        while True:
+            try:
+                event = self.events.get_nowait()
+            except queue.Empty:
+                break
+            if event[0] == "status":
+                self.update_status(event[1], TEXT_SECONDARY)
+            elif event[0] == "bytes":
+                if len(model.rows) == 1:
+                    done, total = event[1], event[2]
+                    self.progress['value'] = min(100, done * 100 / total) if total else 100
+            elif event[0] == "file":
+                if len(model.rows) > 1:
+                    self.update_status(f"{description} ({event[1] + 1}/{len(model.rows)}) {Path(event[2]).name}",
+                                       TEXT_SECONDARY)
+            elif event[0] == "queued":
+                model.extend(event[1])
+                changed = True
+            elif event[0] == "result":
+                model.set_result(*event[1:])
+                changed = True
+            else:
+                finished = True
+        
+        if changed:
+            self.results.refresh()
+            self.update_summary()
+            if len(model.rows) > 1:
+                self.progress['value'] = model.done * 100 / len(model.rows)
+        
+        if not finished:
+            self.after(self.PROGRESS_POLL_MS, self.poll_task, description, done_text)
+            return
+        
+        self.worker = None
+        self.set_busy(False)
         self.progress['value'] = 0
-        self.update()
+        if self.cancel_event.is_set():
+            self.update_status(f"✗ {CANCELLED_MESSAGE} ({model.done}/{len(model.rows)} file elaborati)", ERROR_COLOR)
+        elif not model.rows:
+            self.update_status("✗ Nessun file di codice da elaborare", ERROR_COLOR)
+        elif model.failed:
+            self.update_status(f"✗ {len(model.failed)} errori su {len(model.rows)} file (filtro «Solo errori»)",
+                               ERROR_COLOR)
+        else:
+            self.update_status(f"✓ {model.ok} file {done_text}", SUCCESS_COLOR)
+    
+    def cancel_task(self):
+        if self.worker is not None:
+            self.cancel_event.set()
+            self.update_status("⏳ Annullamento in corso...", TEXT_SECONDARY)
     
     def progress_callback(self, message):
-        self.update_status(message, TEXT_SECONDARY)
+        self.events.put(("status", message))
+    
+    def bytes_callback(self, done, total):
+        if self.cancel_event.is_set():
+            raise OperationCancelled()
+        self.events.put(("bytes", done, total))
+    
+    def show_result(self, row):
+        """Dettaglio di una riga della tabella (doppio clic o Invio)"""
+        path, ok, message, file_hash, elapsed = row
+        if ok is None:
+            messagebox.showinfo("⏳ In coda", f"{path}\n\nIn attesa di elaborazione.")
+        elif ok:
+            messagebox.showinfo("✅ Completato", f"{path}\n\n{message}")
+        else:
+            messagebox.showerror("❌ Errore", f"{path}\n\n{message}")
     
     def show_license_info(self):
         """Mostra informazioni complete di licenza e protezione del software"""
@@ -608,81 +843,36 @@ class FileSigner(tk.Tk):
         messagebox.showinfo("🔐 Informazioni di Licenza", info_message)
     
     def sign_file(self):
-        file_path = self.entry_file.get()
-        if not file_path:
-            messagebox.showwarning("Attenzione", "Seleziona un file!")
+        paths = self.get_selection()
+        if not paths:
+            messagebox.showwarning("Attenzione", "Seleziona un file o una cartella!")
             self.update_status("✗ Nessun file selezionato", ERROR_COLOR)
             return
         
-        file_name = Path(file_path).name
-        self.start_progress()
-        self.update_status(f"🔄 Firma di {file_name} in corso...", TEXT_SECONDARY)
-        
-        success, message = add_signature(file_path, self.progress_callback)
-        self.stop_progress()
-        
-        if success:
-            self.update_status(f"✓ {file_name} firmato con successo!", SUCCESS_COLOR)
-            messagebox.showinfo(
-                "✅ Firma Completata",
-                f"File firmato correttamente!\n\n{message}"
-            )
-        else:
-            self.update_status(f"✗ Errore: impossibile firmare {file_name}", ERROR_COLOR)
-            messagebox.showerror("❌ Errore", message)
+        self.run_queue(add_signature, paths, f"🔄 Firma di {self.describe_selection(paths)} in corso...", "firmati")
     
     def verify_file(self):
-        file_path = self.entry_file.get()
-        if not file_path:
-            messagebox.showwarning("Attenzione", "Seleziona un file!")
+        paths = self.get_selection()
+        if not paths:
+            messagebox.showwarning("Attenzione", "Seleziona un file o una cartella!")
             self.update_status("✗ Nessun file selezionato", ERROR_COLOR)
             return
         
-        file_name = Path(file_path).name
-        self.start_progress()
-        self.update_status(f"🔍 Verifica di {file_name} in corso...", TEXT_SECONDARY)
-        
-        is_valid, message = verify_signature(file_path, self.progress_callback)
-        self.stop_progress()
-        
-        if is_valid:
-            self.update_status(f"✓ {file_name} integro e verificato!", SUCCESS_COLOR)
-            messagebox.showinfo(
-                "✅ Verifica Superata",
-                f"File integro e non modificato!\n\n{message}"
-            )
-        else:
-            self.update_status(f"✗ {file_name} non verificato", ERROR_COLOR)
-            messagebox.showerror("❌ Verifica Fallita", f"File non valido o manomesso!\n\n{message}")
+        self.run_queue(verify_signature, paths, f"🔍 Verifica di {self.describe_selection(paths)} in corso...",
+                       "integri e verificati")
     
     def remove_signature(self):
-        file_path = self.entry_file.get()
-        if not file_path:
-            messagebox.showwarning("Attenzione", "Seleziona un file!")
+        paths = self.get_selection()
+        if not paths:
+            messagebox.showwarning("Attenzione", "Seleziona un file o una cartella!")
             self.update_status("✗ Nessun file selezionato", ERROR_COLOR)
             return
         
-        file_name = Path(file_path).name
-        if messagebox.askyesno("Conferma", f"Rimuovere la firma da {file_name}?"):
-            try:
-                self.start_progress()
-                self.update_status(f"🗑️ Rimozione firma da {file_name}...", TEXT_SECONDARY)
-                
-                with open(file_path, "r", encoding="utf-8") as f:
-                    content = f.read()
-                
-                clean_content = remove_signature_lines(content)
-                
-                with open(file_path, "w", encoding="utf-8") as f:
-                    f.write(clean_content)
-                
-                self.stop_progress()
-                self.update_status(f"✓ Firma rimossa da {file_name}", SUCCESS_COLOR)
-                messagebox.showinfo("✅ Operazione Completata", f"Firma rimossa da {file_name}!")
-            except Exception as e:
-                self.stop_progress()
-                self.update_status(f"✗ Errore durante la rimozione", ERROR_COLOR)
-                messagebox.showerror("❌ Errore", f"Errore: {str(e)}")
+        selection = self.describe_selection(paths)
+        if not messagebox.askyesno("Conferma", f"Rimuovere la firma da {selection}?"):
+            return
+        
+        self.run_queue(strip_signature, paths, f"🗑️ Rimozione firma da {selection}...", "senza firma")
 
 
 # ══════════════════════════════════════════════════════════════════════════════
@@ -690,6 +880,9 @@ class FileSigner(tk.Tk):
 # ══════════════════════════════════════════════════════════════════════════════
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(main())
+    
     try:
         app = FileSigner()
         app.mainloop()
@@ -0,0 +1,368 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from filesigner_core import (
+    COMMENT_STYLES,
+    _Trace,
+    _universal_newlines,
+    add_signature,
+    compute_content_hash,
+    extract_signature_data,
+    get_comment_lines,
+    remove_signature_lines,
+    verify_signature,
+)
+
+# ══════════════════════════════════════════════════════════════════════════════
+# 📊 BENCHMARK DI FIRMA, VERIFICA, ESTRAZIONE E RIMOZIONE
+# ══════════════════════════════════════════════════════════════════════════════
+
+OPERATIONS = ("sign", "verify", "extract", "strip")
+PATTERNS = ("code", "blank", "markers", "longline")
+
+DEFAULT_SIZES = "1K,64K,1M,16M"
+FULL_SIZES = "1K,64K,1M,16M,256M,1G"
+EXTENSION_SIZE = 64 * 1024
+DEFAULT_TOLERANCE = 0.25
+MIN_DELTA_MS = 2.0  # sotto questa differenza assoluta il calo è rumore del timer, non una regressione
+FAST_CASE_SECONDS = 0.005
+FAST_CASE_REPEAT = 30
+BASELINE_VERSION = 2  # 2: firma di verify/extract accodata al corpus grezzo, fasi per caso
+IMPORT_MODULE = "filesigner_core"
+IMPORT_BUDGET_MS = 60.0
+
+def parse_size(text):
+    """Converte '64K', '16M', '1G' in byte"""
+    units = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+    text = text.strip().upper()
+    if text[-1:] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+def format_size(size):
+    for unit, factor in (("G", 1024 ** 3), ("M", 1024 ** 2), ("K", 1024)):
+        if size >= factor and size % factor == 0:
+            return f"{size // factor}{unit}"
+    return str(size)
+
+# ══════════════════════════════════════════════════════════════════════════════
+# 🧪 GENERAZIONE DEI CORPUS
+# ══════════════════════════════════════════════════════════════════════════════
+
+def _pattern_block(pattern, ext):
+    """Blocco di testo ripetuto per costruire il corpus di un certo tipo"""
+    comment = COMMENT_STYLES.get(ext, "#")
+    lines = []
+    
+    if pattern == "code":
+        for i in range(100):
+            if i % 10 == 0:
+                lines.append(f"{comment} sezione {i // 10}: commento descrittivo del blocco")
+            elif i % 5 == 0:
+                lines.append("")
+            else:
+                lines.append(f"    valore_{i} = calcola(parametro_{i}, {i}) + indice[{i % 7}]")
+    elif pattern == "blank":
+        for i in range(20):
+            lines.append(f"riga_{i} = {i}")
+            lines.extend([""] * 40)
+            lines.append("   ")
+    elif pattern == "markers":
+        for i in range(50):
+            signature_line, hash_line, time_line = get_comment_lines(
+                ext, f"{i:08x}-0000-4000-8000-000000000000", hashlib.sha256(str(i).encode()).hexdigest(),
+                "2025-01-01 00:00:00"
+            )
+            lines.extend([f"valore_{i} = {i}", signature_line, hash_line, time_line])
+    elif pattern == "longline":
+        return "var a" + ";var a".join(str(i) for i in range(500))
+    else:
+        raise ValueError(f"Tipo di corpus sconosciuto: {pattern}")
+    
+    return "\n".join(lines) + "\n"
+
+def write_corpus(path, pattern, ext, size):
+    """Scrive un file di circa size byte senza tenerlo interamente in memoria"""
+    block = _pattern_block(pattern, ext).encode("utf-8")
+    with open(path, "wb") as f:
+        written = 0
+        while written < size:
+            chunk = block if size - written >= len(block) else block[:size - written]
+            f.write(chunk)
+            written += len(chunk)
+        if pattern != "longline":
+            f.write(b"\n")
+
+def build_cases(sizes, operations):
+    """Elenco dei casi: sweep di dimensioni, tutte le estensioni e input patologici.
+    
+    Gli sweep si sovrappongono (.py a EXTENSION_SIZE compare in entrambi): ogni
+    chiave viene eseguita una volta sola, nella prima posizione.
+    """
+    cases = []
+    for size in sizes:
+        for op in operations:
+            cases.append({"op": op, "pattern": "code", "ext": ".py", "size": size})
+    
+    for ext in sorted(COMMENT_STYLES):
+        for op in operations:
+            cases.append({"op": op, "pattern": "code", "ext": ext, "size": EXTENSION_SIZE})
+    
+    for pattern, ext in (("blank", ".js"), ("markers", ".py"), ("longline", ".js")):
+        for size in sizes:
+            if size < 1024 * 1024:
+                continue
+            for op in operations:
+                cases.append({"op": op, "pattern": pattern, "ext": ext, "size": size})
+    
+    unique = {}
+    for case in cases:
+        unique.setdefault(case_key(case), case)
+    return list(unique.values())
+
+def case_key(case):
+    return f"{case['op']}:{case['pattern']}:{case['ext']}:{format_size(case['size'])}"
+
+# ══════════════════════════════════════════════════════════════════════════════
+# ⏱️ ESECUZIONE DI UN CASO (IN UN PROCESSO SEPARATO)
+# ══════════════════════════════════════════════════════════════════════════════
+
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def _extract(target, metrics=None):
+    """Estrazione dei dati di firma dalla coda del file"""
+    trace = _Trace(metrics, "extract", target)
+    with trace.stage("read"):
+        data = extract_signature_data(target, with_content=False)
+    return trace.finish((bool(data["signature"]), "firma non trovata"))
+
+def _strip(target, metrics=None):
+    """Rimozione delle linee di firma e normalizzazione del corpus grezzo, senza scrivere il file"""
+    trace = _Trace(metrics, "strip", target)
+    with trace.stage("read") as stage:
+        with open(target, "rb") as f:
+            raw = f.read()
+        stage["bytes_read"] = len(raw)
+    trace.normalise(_universal_newlines(raw))
+    return trace.finish((True, ""))
+
+OPERATION_FUNCTIONS = {
+    "sign": add_signature,
+    "verify": verify_signature,
+    "extract": _extract,
+    "strip": _strip,
+}
+
+def _append_signature(target, ext):
+    """Firma valida accodata al corpus senza normalizzarlo.
+    
+    add_signature riscriverebbe il corpo normalizzato: i corpus con marcatori e
+    righe vuote non metterebbero più alla prova il filtro di verify ed extract.
+    """
+    signature_line, hash_line, time_line = get_comment_lines(
+        ext, "00000000-0000-4000-8000-000000000000", compute_content_hash(target), "2025-01-01 00:00:00"
+    )
+    with open(target, "ab") as f:
+        f.write(f"\n\n{signature_line}\n{hash_line}\n{time_line}\n".encode("utf-8"))
+
+def run_case(case, source, workdir, repeat):
+    """Esegue l'operazione del caso repeat volte e restituisce il tempo migliore.
+    
+    Se una ripetizione dura meno di FAST_CASE_SECONDS le ripetizioni salgono ad
+    almeno FAST_CASE_REPEAT: sui casi minuscoli il migliore di poche esecuzioni
+    è dominato dal rumore. I tempi delle singole fasi (lettura, normalizzazione, hash, scrittura) sono
+    quelli riportati dagli eventi file_end della ripetizione migliore.
+    """
+    target = os.path.join(workdir, "target" + case["ext"])
+    operation = OPERATION_FUNCTIONS[case["op"]]
+    best = None
+    stages = {}
+    
+    runs = 0
+    while runs < repeat:
+        runs += 1
+        shutil.copyfile(source, target)
+        if case["op"] in ("verify", "extract"):
+            _append_signature(target, case["ext"])
+        
+        events = []
+        start = time.perf_counter()
+        ok, message = operation(target, metrics=events.append)
+        elapsed = time.perf_counter() - start
+        
+        if not ok:
+            raise RuntimeError(f"{case_key(case)}: {message}")
+        if best is None or elapsed < best:
+            best = elapsed
+            stages = next(e["stages"] for e in events if e["type"] == "file_end")
+        if elapsed < FAST_CASE_SECONDS:
+            repeat = max(repeat, FAST_CASE_REPEAT)
+    
+    return {
+        "seconds": best,
+        "mb_per_s": case["size"] / (1024 * 1024) / max(best, 1e-9),
+        "peak_rss_mb": _peak_rss_mb(),
+        "stages": stages,
+    }
+
+def _run_case_subprocess(case, source, workdir, repeat):
+    """Esegue il caso in un interprete nuovo, così il picco di RSS è misurato per caso"""
+    payload = json.dumps({"case": case, "source": source, "workdir": workdir, "repeat": repeat})
+    proc = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--run-case", payload],
+        capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip() or proc.stdout.strip())
+    return json.loads(proc.stdout)
+
+def measure_import_ms(module=IMPORT_MODULE, repeat=10):
+    """Tempo di import a freddo di module in un interprete nuovo, al netto dell'avvio di Python.
+    
+    Il primo import compila il bytecode, poi si tiene il migliore di repeat avvii.
+    Solleva RuntimeError se l'import carica tkinter.
+    """
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    # Il modulo si trova accanto al benchmark, qualunque sia la cartella da cui viene lanciato
+    here = os.path.dirname(os.path.abspath(__file__))
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, (here, env.get("PYTHONPATH"))))
+    check = f"import sys, {module}; sys.exit(1 if 'tkinter' in sys.modules else 0)"
+    
+    def best_run(code):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            proc = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True)
+            elapsed = time.perf_counter() - start
+            if proc.returncode != 0:
+                raise RuntimeError(f"import di {module}: tkinter caricato o errore\n{proc.stderr.decode().strip()}")
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+    
+    subprocess.run([sys.executable, "-c", f"import {module}"], env=env, check=True)
+    return max(0.0, best_run(check) - best_run("import sys")) * 1000
+
+# ══════════════════════════════════════════════════════════════════════════════
+# 📈 CONFRONTO CON IL BASELINE E REPORT
+# ══════════════════════════════════════════════════════════════════════════════
+
+def compare_with_baseline(results, baseline, tolerance, min_delta_ms=MIN_DELTA_MS):
+    """Restituisce i casi con throughput peggiore del baseline oltre la tolleranza.
+    
+    Un caso conta come regressione solo se è anche più lento di almeno
+    min_delta_ms in valore assoluto, così i casi da pochi millisecondi non
+    falliscono per il rumore del timer.
+    """
+    regressions = []
+    for key, result in results.items():
+        reference = baseline.get(key)
+        if not reference:
+            continue
+        slower_ms = (result["seconds"] - reference["seconds"]) * 1000
+        if result["mb_per_s"] < reference["mb_per_s"] * (1 - tolerance) and slower_ms >= min_delta_ms:
+            regressions.append((key, reference["mb_per_s"], result["mb_per_s"]))
+    return regressions
+
+def format_result(key, result):
+    stages = " ".join(f"{name}={seconds * 1000:.1f}ms" for name, seconds in result["stages"].items())
+    rss = f"{result['peak_rss_mb']:.0f} MB" if result["peak_rss_mb"] is not None else "n/d"
+    return f"{key:<36} {result['mb_per_s']:>9.1f} MB/s {result['seconds'] * 1000:>10.1f} ms  RSS {rss:>7}  {stages}"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="benchmark.py",
+        description="Benchmark riproducibile di firma, verifica, estrazione e rimozione firme"
+    )
+    parser.add_argument("--sizes", default=DEFAULT_SIZES,
+                        help=f"dimensioni dei file (default: {DEFAULT_SIZES}; --full: {FULL_SIZES})")
+    parser.add_argument("--full", action="store_true", help="include i file da 256 MB e 1 GB")
+    parser.add_argument("--ops", default=",".join(OPERATIONS), help="operazioni da misurare")
+    parser.add_argument("--filter", default="", help="esegue solo i casi che contengono questo testo")
+    parser.add_argument("--repeat", type=int, default=3, help="ripetizioni per caso (si tiene la migliore)")
+    parser.add_argument("--baseline", default="bench_baseline.json", help="file del baseline")
+    parser.add_argument("--save-baseline", action="store_true", help="salva i risultati come nuovo baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help=f"calo di throughput tollerato rispetto al baseline (default: {DEFAULT_TOLERANCE})")
+    parser.add_argument("--min-delta-ms", type=float, default=MIN_DELTA_MS,
+                        help=f"rallentamento assoluto minimo per segnalare una regressione (default: {MIN_DELTA_MS:g})")
+    parser.add_argument("--json", default=None, help="scrive i risultati completi in questo file")
+    parser.add_argument("--import-budget", type=float, default=IMPORT_BUDGET_MS,
+                        help=f"ms massimi per importare {IMPORT_MODULE} a freddo (default: {IMPORT_BUDGET_MS:g}; 0 disattiva)")
+    parser.add_argument("--run-case", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    
+    if args.run_case:
+        task = json.loads(args.run_case)
+        print(json.dumps(run_case(task["case"], task["source"], task["workdir"], task["repeat"])))
+        return 0
+    
+    import_ok = True
+    if args.import_budget:
+        import_ms = measure_import_ms()
+        import_ok = import_ms <= args.import_budget
+        mark = "✓" if import_ok else "✗ FUORI BUDGET"
+        print(f"{'import:' + IMPORT_MODULE:<36} {import_ms:>9.1f} ms (budget {args.import_budget:g} ms) {mark}", flush=True)
+    
+    sizes = [parse_size(s) for s in (FULL_SIZES if args.full else args.sizes).split(",")]
+    operations = [op for op in args.ops.split(",") if op]
+    cases = [c for c in build_cases(sizes, operations) if args.filter in case_key(c)]
+    
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="filesigner-bench-") as workdir:
+        corpora = {}
+        for case in cases:
+            corpus_key = (case["pattern"], case["ext"], case["size"])
+            if corpus_key not in corpora:
+                corpora[corpus_key] = os.path.join(workdir, f"corpus-{len(corpora)}{case['ext']}")
+                write_corpus(corpora[corpus_key], *corpus_key)
+            
+            key = case_key(case)
+            results[key] = _run_case_subprocess(case, corpora[corpus_key], workdir, args.repeat)
+            print(format_result(key, results[key]), flush=True)
+    
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"version": BASELINE_VERSION, "results": results}, f, indent=2, sort_keys=True)
+        print(f"Baseline salvato in {args.baseline}")
+        return 0 if import_ok else 1
+    
+    if not os.path.exists(args.baseline):
+        print(f"Nessun baseline in {args.baseline}: usa --save-baseline per crearlo")
+        return 0 if import_ok else 1
+    
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("version") != BASELINE_VERSION:
+        # Casi con lo stesso nome misuravano altro: il confronto non avrebbe senso
+        print(f"✗ Baseline {args.baseline} in un formato non compatibile (versione {baseline.get('version', 1)}, "
+              f"attesa {BASELINE_VERSION}): rigeneralo con --save-baseline")
+        return 1
+    regressions = compare_with_baseline(results, baseline["results"], args.tolerance, args.min_delta_ms)
+    for key, before, after in regressions:
+        print(f"✗ REGRESSIONE {key}: {before:.1f} → {after:.1f} MB/s")
+    if regressions or not import_ok:
+        return 1
+    
+    print(f"✓ Nessuna regressione oltre il {args.tolerance:.0%} rispetto a {args.baseline}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
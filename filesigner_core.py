@@ -0,0 +1,4000 @@
+import hashlib
+import contextlib
+import os
+import re
+from datetime import datetime
+import threading
+import time
+import json
+import shutil
+import sys
+import tempfile
+
+# ══════════════════════════════════════════════════════════════════════════════
+# 🔐 PROTEZIONE UNIVOCA DEL SOFTWARE
+# ══════════════════════════════════════════════════════════════════════════════
+
+class SoftwareProtection:
+    """Sistema di protezione e licenza univoca"""
+    
+    PRODUCT_NAME = "Code File Signer"
+    PRODUCT_VERSION = "1.0.0"
+    AUTHOR = "Dany © 2025 - All Rights Reserved"
+    
+    PRODUCT_ID = "CFS-2025-PRO-SECURE"
+    
+    ORIGINAL_HASH = "7a8b9c0d1e2f3a4b5c6d7e8f9a0b1c2d3e4f5a6b"
+    
+    _machine_id = None
+    
+    @staticmethod
+    def get_machine_id():
+        """Genera ID univoco della macchina (calcolato una sola volta per processo)"""
+        if SoftwareProtection._machine_id is None:
+            try:
+                import uuid
+                SoftwareProtection._machine_id = str(uuid.getnode())
+            except:
+                SoftwareProtection._machine_id = "UNKNOWN"
+        return SoftwareProtection._machine_id
+    
+    @staticmethod
+    def get_license_key():
+        """Genera chiave di licenza univoca basata sulla macchina"""
+        machine_id = SoftwareProtection.get_machine_id()
+        product_id = SoftwareProtection.PRODUCT_ID
+        timestamp = str(datetime.now().year)
+        
+        license_data = f"{product_id}_{machine_id}_{timestamp}"
+        license_hash = hashlib.sha256(license_data.encode()).hexdigest()[:32].upper()
+        
+        return f"LIC-{license_hash}"
+    
+    @staticmethod
+    def get_software_signature():
+        """Firma digitale del software"""
+        sig_data = f"{SoftwareProtection.PRODUCT_ID}_{SoftwareProtection.PRODUCT_VERSION}_{SoftwareProtection.AUTHOR}"
+        return hashlib.sha256(sig_data.encode()).hexdigest()
+    
+    @staticmethod
+    def get_watermark():
+        """Watermark univoco del software"""
+        machine_id = SoftwareProtection.get_machine_id()
+        product_sig = SoftwareProtection.get_software_signature()
+        watermark = f"[{SoftwareProtection.PRODUCT_NAME} v{SoftwareProtection.PRODUCT_VERSION} - {machine_id[:8]}]"
+        return watermark
+
+_LAZY_CONSTANTS = {
+    "LICENSE_KEY": SoftwareProtection.get_license_key,
+    "SOFTWARE_SIGNATURE": SoftwareProtection.get_software_signature,
+    "WATERMARK": SoftwareProtection.get_watermark,
+}
+
+def __getattr__(name):
+    """LICENSE_KEY, SOFTWARE_SIGNATURE e WATERMARK vengono calcolati al primo accesso.
+    
+    uuid.getnode() può essere lento (su alcuni sistemi lancia processi esterni):
+    così l'import del motore non lo paga e i processi CLI/worker che non mostrano
+    la licenza non lo eseguono mai.
+    """
+    if name in _LAZY_CONSTANTS:
+        value = _LAZY_CONSTANTS[name]()
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# ══════════════════════════════════════════════════════════════════════════════
+# 💬 STILI DI COMMENTO PER LINGUAGGI
+# ══════════════════════════════════════════════════════════════════════════════
+
+COMMENT_STYLES = {
+    ".py": "#",
+    ".js": "//",
+    ".ts": "//",
+    ".jsx": "//",
+    ".tsx": "//",
+    ".cpp": "//",
+    ".c": "//",
+    ".java": "//",
+    ".cs": "//",
+    ".php": "//",
+    ".go": "//",
+    ".rs": "//",
+    ".swift": "//",
+    ".kt": "//",
+    ".scala": "//",
+    ".html": "<!--",
+    ".xml": "<!--",
+    ".css": "/*",
+    ".scss": "//",
+    ".sql": "--",
+    ".r": "#",
+    ".lua": "--",
+    ".sh": "#",
+    ".bash": "#",
+    ".rb": "#",
+}
+
+CLOSING_COMMENT = {
+    "<!--": "-->",
+    "/*": "*/",
+}
+
+# ══════════════════════════════════════════════════════════════════════════════
+# 🧮 ALGORITMI DI HASH
+# ══════════════════════════════════════════════════════════════════════════════
+
+def _blake2b_256(data=b""):
+    return hashlib.blake2b(data, digest_size=32)
+
+DEFAULT_HASH_ALGORITHM = "sha256"
+
+HASH_ALGORITHMS = {
+    "sha256": hashlib.sha256,
+    "sha512": hashlib.sha512,
+    "sha3-256": hashlib.sha3_256,
+    "blake2b": _blake2b_256,
+    "blake2s": hashlib.blake2s,
+}
+
+TREE_PREFIX = "tree-"
+TREE_SEGMENT_SIZE = 4 * 1024 * 1024
+TREE_WORKERS = min(8, os.cpu_count() or 1)
+
+def hash_algorithms():
+    """Nomi accettati da new_hasher: gli algoritmi semplici e le loro varianti ad albero"""
+    return sorted(HASH_ALGORITHMS) + sorted(TREE_PREFIX + name for name in HASH_ALGORITHMS)
+
+def new_hasher(algorithm=DEFAULT_HASH_ALGORITHM):
+    """Oggetto hash per algorithm con l'interfaccia di hashlib (update, copy, hexdigest)"""
+    base = algorithm[len(TREE_PREFIX):] if algorithm.startswith(TREE_PREFIX) else algorithm
+    if base not in HASH_ALGORITHMS:
+        raise ValueError(f"Algoritmo di hash non supportato: {algorithm}")
+    if base != algorithm:
+        return TreeHasher(HASH_ALGORITHMS[base])
+    return HASH_ALGORITHMS[algorithm]()
+
+def format_digest(algorithm, hexdigest):
+    """Valore scritto dopo _HASH_: esadecimale puro per SHA-256 (formato storico), altrimenti 'algoritmo:esadecimale'"""
+    if algorithm == DEFAULT_HASH_ALGORITHM:
+        return hexdigest
+    return f"{algorithm}:{hexdigest}"
+
+def parse_digest(value):
+    """Inverso di format_digest: restituisce (algoritmo, esadecimale)"""
+    algorithm, _, hexdigest = value.rpartition(":")
+    return algorithm or DEFAULT_HASH_ALGORITHM, hexdigest
+
+def hash_bytes(data, algorithm=DEFAULT_HASH_ALGORITHM):
+    """Hash di data nel formato di format_digest"""
+    hasher = new_hasher(algorithm)
+    hasher.update(data)
+    return format_digest(algorithm, hasher.hexdigest())
+
+def describe_digest(value):
+    """Testo per i messaggi: 'SHA256: <hex>', 'BLAKE2B: <hex>', ..."""
+    algorithm, hexdigest = parse_digest(value)
+    return f"{algorithm.upper()}: {hexdigest}"
+
+_tree_executor = (None, None)
+
+def _get_tree_executor():
+    """Pool di thread condiviso per gli hash ad albero (ricreato dopo un fork)"""
+    global _tree_executor
+    pid, executor = _tree_executor
+    if pid != os.getpid():
+        from concurrent.futures import ThreadPoolExecutor
+        executor = ThreadPoolExecutor(max_workers=TREE_WORKERS, thread_name_prefix="filesigner-tree")
+        _tree_executor = (os.getpid(), executor)
+    return executor
+
+def _hash_segment(factory, segment):
+    return factory(segment).digest()
+
+class TreeHasher:
+    """Hash ad albero a due livelli per file molto grandi.
+    
+    Il contenuto viene diviso in segmenti da TREE_SEGMENT_SIZE byte, hashati in
+    parallelo su un pool di thread (hashlib rilascia il GIL); la radice è l'hash
+    della concatenazione dei digest dei segmenti. Espone la stessa interfaccia
+    degli oggetti hashlib, quindi funziona anche con il sink dello streaming.
+    """
+    
+    def __init__(self, factory):
+        self.factory = factory
+        self.segments = []
+        self.buffer = bytearray()
+    
+    def update(self, data):
+        view = memoryview(data).cast("B")
+        if self.buffer:
+            take = TREE_SEGMENT_SIZE - len(self.buffer)
+            self.buffer += view[:take]
+            view = view[take:]
+            if len(self.buffer) < TREE_SEGMENT_SIZE:
+                return
+            self._submit(bytes(self.buffer))
+            self.buffer = bytearray()
+        
+        # i bytes sono immutabili: i segmenti interi possono restare viste senza copia
+        owned = isinstance(data, bytes)
+        while len(view) >= TREE_SEGMENT_SIZE:
+            segment = view[:TREE_SEGMENT_SIZE]
+            self._submit(segment if owned else bytes(segment))
+            view = view[TREE_SEGMENT_SIZE:]
+        self.buffer += view
+    
+    def _submit(self, segment):
+        window = TREE_WORKERS * 2
+        if len(self.segments) >= window:
+            self.segments[-window].result()
+        self.segments.append(_get_tree_executor().submit(_hash_segment, self.factory, segment))
+    
+    def copy(self):
+        other = TreeHasher(self.factory)
+        other.segments = list(self.segments)
+        other.buffer = bytearray(self.buffer)
+        return other
+    
+    def digest(self):
+        digests = [future.result() for future in self.segments]
+        if self.buffer or not digests:
+            digests.append(self.factory(bytes(self.buffer)).digest())
+        return self.factory(b"".join(digests)).digest()
+    
+    def hexdigest(self):
+        return self.digest().hex()
+
+# ══════════════════════════════════════════════════════════════════════════════
+# ✍️ FUNZIONI DI FIRMA DIGITALE
+# ══════════════════════════════════════════════════════════════════════════════
+
+SIGNATURE_MARKERS = ("_SIGNATURE_", "_HASH_", "_SIGNED_")
+
+SIGNATURE_PATTERNS = {
+    'signature': re.compile(r"_SIGNATURE_([a-f0-9\-]+)"),
+    'hash': re.compile(r"_HASH_((?:[a-z0-9\-]+:)?[a-f0-9]+)"),
+    'timestamp': re.compile(r"_SIGNED_(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})"),
+}
+
+# Gli stessi pattern per il motore su bytes (_parse_trailer lavora invece sul testo della coda)
+_SIGNATURE_PATTERNS_BYTES = {
+    key: re.compile(pattern.pattern.encode("ascii")) for key, pattern in SIGNATURE_PATTERNS.items()
+}
+
+_BLANK_RUN_RE = re.compile(rb"\n{3,}")
+
+# Spazi rimossi da str.strip(): quelli ASCII (inclusi \x1c-\x1f) e quelli Unicode, in UTF-8
+_ASCII_WHITESPACE = b" \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f"
+_UNICODE_WHITESPACE = tuple(
+    char.encode("utf-8")
+    for char in "\x85\xa0\u1680\u2000\u2001\u2002\u2003\u2004\u2005\u2006\u2007\u2008\u2009\u200a"
+                "\u2028\u2029\u202f\u205f\u3000"
+)
+
+CANCELLED_MESSAGE = "Operazione annullata."
+
+class OperationCancelled(Exception):
+    """Sollevata da un bytes_callback per interrompere l'operazione in corso"""
+
+def _new_signature_id():
+    """UUID casuale della firma (uuid viene importato solo quando serve davvero)"""
+    import uuid
+    return str(uuid.uuid4())
+
+def get_comment_lines(ext, signature, file_hash, timestamp):
+    """Genera le linee di commento per la firma (corretto)"""
+    ext = ext.lower()
+    comment = COMMENT_STYLES.get(ext, "#")
+    closing = CLOSING_COMMENT.get(comment, "")
+    
+    sig_marker = f"_SIGNATURE_{signature}"
+    hash_marker = f"_HASH_{file_hash}"
+    time_marker = f"_SIGNED_{timestamp}"
+    
+    if ext == ".html" or ext == ".xml":
+        signature_line = f"<!-- {sig_marker} -->"
+        hash_line = f"<!-- {hash_marker} -->"
+        time_line = f"<!-- {time_marker} -->"
+    elif comment == "/*":
+        signature_line = f"/* {sig_marker} */"
+        hash_line = f"/* {hash_marker} */"
+        time_line = f"/* {time_marker} */"
+    elif closing:
+        signature_line = f"{comment} {sig_marker} {closing}"
+        hash_line = f"{comment} {hash_marker} {closing}"
+        time_line = f"{comment} {time_marker} {closing}"
+    else:
+        signature_line = f"{comment} {sig_marker}"
+        hash_line = f"{comment} {hash_marker}"
+        time_line = f"{comment} {time_marker}"
+    
+    return signature_line, hash_line, time_line
+
+TRAILER_READ_SIZE = 4096
+
+def _parse_trailer(text):
+    """Legge i tre marcatori dalle ultime tre linee scritte da add_signature"""
+    lines = text.rstrip().rsplit('\n', 3)[-3:]
+    if len(lines) < 3:
+        return None
+    
+    data = {}
+    for (key, pattern), marker, line in zip(SIGNATURE_PATTERNS.items(), SIGNATURE_MARKERS, lines):
+        if marker not in line:
+            return None
+        match = pattern.search(line)
+        data[key] = match.group(1) if match else None
+    
+    if not data['signature'] or not data['hash']:
+        return None
+    return data
+
+def read_signature_trailer(file_path):
+    """Legge solo la coda del file e ne estrae la firma (None se assente)"""
+    with open(file_path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        f.seek(max(0, size - TRAILER_READ_SIZE))
+        return _trailer_from_tail(f.read())
+
+def _trailer_from_tail(tail):
+    """Firma contenuta negli ultimi TRAILER_READ_SIZE byte grezzi di un file (None se assente)"""
+    text = tail.decode("utf-8", errors="ignore").replace('\r\n', '\n').replace('\r', '\n')
+    return _parse_trailer(text)
+
+def extract_signature_data(file_path, with_content=True):
+    """Estrae firma e hash dal file.
+    
+    I marcatori vengono cercati prima nella coda del file, dove li scrive
+    add_signature; la scansione completa è usata solo se la coda non li contiene.
+    Con with_content=False il contenuto non viene letto se la coda basta ('raw' è None);
+    altrimenti 'raw' contiene i byte del file con i newline già uniformati a \\n.
+    """
+    if not with_content:
+        trailer = read_signature_trailer(file_path)
+        if trailer:
+            return dict(trailer, raw=None)
+    
+    with open(file_path, "rb") as f:
+        content = _universal_newlines(f.read())
+    return _signature_data(content)
+
+def _signature_data(content):
+    """Dati di firma (come extract_signature_data) di un contenuto con i newline già uniformati"""
+    trailer = _parse_trailer(content[-TRAILER_READ_SIZE:].decode("utf-8", errors="ignore"))
+    if trailer:
+        return dict(trailer, raw=content)
+    
+    sig_match = _SIGNATURE_PATTERNS_BYTES['signature'].search(content)
+    hash_match = _SIGNATURE_PATTERNS_BYTES['hash'].search(content)
+    time_match = _SIGNATURE_PATTERNS_BYTES['timestamp'].search(content)
+    
+    return {
+        'signature': sig_match.group(1).decode("ascii") if sig_match else None,
+        'hash': hash_match.group(1).decode("ascii") if hash_match else None,
+        'timestamp': time_match.group(1).decode("ascii") if time_match else None,
+        'raw': content
+    }
+
+def _has_marker(data):
+    return b'_SIGNATURE_' in data or b'_HASH_' in data or b'_SIGNED_' in data
+
+_MARKER_RE = re.compile(rb"_SIGNATURE_|_HASH_|_SIGNED_")
+_MARKER_LINE_RE = re.compile(rb"\n[^\n]*?(?:_SIGNATURE_|_HASH_|_SIGNED_)[^\n]*")
+
+def _drop_marker_lines(content):
+    """Toglie le linee con marcatori: equivale a b'\\n'.join() delle linee di split(b'\\n') rimaste.
+    
+    Restituisce (contenuto, linee tolte), con contenuto None se non resta nessuna
+    linea. Una sola sostituzione in C a partire dalla prima linea con marcatori,
+    invece di un controllo in Python per ogni linea.
+    """
+    match = _MARKER_RE.search(content)
+    if match is None:
+        return content, 0
+    view = memoryview(content)
+    start = content.rfind(b'\n', 0, match.start())
+    if start >= 0:
+        tail, filtered = _MARKER_LINE_RE.subn(b'', view[start:])
+        return b''.join((view[:start], tail)), filtered
+    
+    # Le prime linee non sono precedute da \n: si tolgono una alla volta
+    filtered = 0
+    start = 0
+    while True:
+        end = content.find(b'\n', start)
+        if not _MARKER_RE.search(content, start, len(content) if end < 0 else end):
+            break
+        filtered += 1
+        if end < 0:
+            return None, filtered
+        start = end + 1
+    tail, count = _MARKER_LINE_RE.subn(b'', view[start:])
+    return tail, filtered + count
+
+def _lstrip_ws(data):
+    """bytes.lstrip() con la stessa nozione di spazio di str.strip() (testo UTF-8)"""
+    while True:
+        data = data.lstrip(_ASCII_WHITESPACE)
+        if not data or data[0] < 0x80:
+            return data
+        for sequence in _UNICODE_WHITESPACE:
+            if data.startswith(sequence):
+                data = data[len(sequence):]
+                break
+        else:
+            return data
+
+def _rstrip_ws(data):
+    """bytes.rstrip() con la stessa nozione di spazio di str.strip() (testo UTF-8)"""
+    while True:
+        data = data.rstrip(_ASCII_WHITESPACE)
+        if not data or data[-1] < 0x80:
+            return data
+        for sequence in _UNICODE_WHITESPACE:
+            if data.endswith(sequence):
+                data = data[:-len(sequence)]
+                break
+        else:
+            return data
+
+def _report_bytes(bytes_callback, file_path):
+    """Segnala la lettura completa del file (percorso non in streaming)"""
+    if bytes_callback:
+        size = os.path.getsize(file_path)
+        bytes_callback(size, size)
+
+# ─── Scrittura della firma: append in place o sostituzione atomica ─────────────
+
+_DISK_NEWLINE = os.linesep.encode("ascii")
+
+def _universal_newlines(raw):
+    """Uniforma \\r\\n e \\r a \\n come la lettura in modalità testo, senza decodificare"""
+    if b'\r' in raw:
+        raw = raw.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+    return raw
+
+def _disk_bytes(data):
+    """Byte da scrivere su disco: i newline diventano os.linesep come in modalità testo"""
+    if _DISK_NEWLINE != b"\n":
+        data = data.replace(b"\n", _DISK_NEWLINE)
+    return data
+
+def _trailer_text(ext, unique_id, file_hash, timestamp):
+    """Coda aggiunta da add_signature dopo il contenuto normalizzato"""
+    signature_line, hash_line, time_line = get_comment_lines(ext, unique_id, file_hash, timestamp)
+    return "\n\n" + signature_line + "\n" + hash_line + "\n" + time_line + "\n"
+
+def _temp_beside(file_path):
+    """File temporaneo binario accanto al file reale (stesso filesystem, quindi rename atomico).
+    
+    Per un link simbolico la cartella è quella del file puntato, che è quello da sostituire.
+    """
+    directory = os.path.dirname(os.path.realpath(file_path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".filesigner-", dir=directory)
+    return open(fd, "wb"), tmp_path
+
+def _sync_file(f):
+    """Porta su disco i dati del file aperto prima che venga rinominato"""
+    f.flush()
+    os.fsync(f.fileno())
+
+def _sync_directory(path):
+    """Rende durevole un rename nella cartella di path (non supportato su Windows, dove si salta)"""
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def _commit_temp(tmp_path, file_path):
+    """Sostituisce file_path con il temporaneo, già sincronizzato con _sync_file.
+    
+    Dopo il rename viene sincronizzata anche la cartella: dopo un'interruzione di
+    corrente il nome punta al vecchio contenuto o a quello nuovo completo, mai a un
+    file vuoto o parziale. I link simbolici vengono risolti, così si sostituisce il
+    file puntato e il link resta tale; un file con più hard link viene invece
+    riscritto in place, perché il rename lo staccherebbe dagli altri nomi.
+    """
+    target = os.path.realpath(file_path)
+    if os.stat(target).st_nlink > 1:
+        with open(tmp_path, "rb") as src, open(target, "r+b") as dst:
+            shutil.copyfileobj(src, dst, STREAM_CHUNK_SIZE)
+            dst.truncate()
+            _sync_file(dst)
+        os.remove(tmp_path)
+        return
+    
+    shutil.copymode(target, tmp_path)
+    os.replace(tmp_path, target)
+    _sync_directory(target)
+
+def _replace_atomically(file_path, data):
+    """Sostituisce il contenuto del file con data tramite file temporaneo + fsync + rename"""
+    out, tmp_path = _temp_beside(file_path)
+    try:
+        with out:
+            out.write(data)
+            _sync_file(out)
+        _commit_temp(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return len(data)
+
+def _truncate_and_append(file_path, position, data):
+    """Tronca il file a position (via la vecchia coda) e accoda data.
+    
+    I byte prima di position non vengono toccati: un'interruzione a metà lascia
+    al più il corpo senza firma, mai un corpo alterato.
+    """
+    with open(file_path, "r+b") as f:
+        f.truncate(position)
+        f.seek(position)
+        f.write(data)
+    return len(data)
+
+def remove_signature_lines(content):
+    """Rimuove le linee di firma dal contenuto normalizzando il testo.
+    
+    Accetta bytes (qualsiasi codifica compatibile con ASCII) o str, e restituisce
+    lo stesso tipo; per il testo UTF-8 il risultato è identico nei due casi.
+    """
+    if isinstance(content, str):
+        return _normalize_content(content.encode("utf-8"))[0].decode("utf-8")
+    return _normalize_content(content)[0]
+
+def _normalize_content(content):
+    """Come remove_signature_lines su bytes, ma restituisce anche il numero di linee scartate"""
+    filtered = 0
+    if _has_marker(content):
+        content, filtered = _drop_marker_lines(content)
+        content = content or b''
+    
+    result = _lstrip_ws(_rstrip_ws(content))
+    
+    if b'\n\n\n' in result:
+        result = _BLANK_RUN_RE.sub(b'\n\n', result)
+    
+    return result, filtered
+
+def add_signature(file_path, progress_callback=None, streaming=None, bytes_callback=None, metrics=None,
+                  algorithm=None):
+    """Aggiunge firma digitale (hash SHA256 o algorithm) + UUID + timestamp al file.
+    
+    Se il contenuto è già normalizzato (file mai firmato ma pulito, oppure una
+    nuova firma) viene solo sostituita la coda: la vecchia firma è troncata e la
+    nuova accodata. Se la normalizzazione cambia il corpo il file viene riscritto
+    in un temporaneo e sostituito con un rename atomico.
+    
+    bytes_callback(letti, totale) riceve l'avanzamento in byte e può sollevare
+    OperationCancelled per annullare la firma prima che il file venga scritto.
+    metrics riceve gli eventi strutturati dell'operazione (vedi MetricsCollector).
+    L'algoritmo viene registrato nel marcatore _HASH_ (vedi format_digest).
+    """
+    algorithm = algorithm or DEFAULT_HASH_ALGORITHM
+    trace = _Trace(metrics, "sign", file_path)
+    try:
+        if not os.path.exists(file_path):
+            return trace.finish((False, f"Il file {file_path} non esiste."))
+        
+        if progress_callback:
+            progress_callback("Lettura file...")
+        
+        ext = os.path.splitext(file_path)[1].lower()
+        if use_streaming(file_path, streaming):
+            return trace.finish(_add_signature_streaming(file_path, ext, trace, progress_callback, bytes_callback, algorithm))
+        
+        with trace.stage("read") as stage:
+            with open(file_path, "rb") as f:
+                raw = f.read()
+            stage["bytes_read"] = len(raw)
+        _report_bytes(bytes_callback, file_path)
+        
+        clean_content = trace.normalise(_universal_newlines(raw))
+        
+        if progress_callback:
+            progress_callback("Generazione firma...")
+        
+        unique_id = _new_signature_id()
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        
+        file_hash = trace.hash(clean_content, algorithm)
+        
+        trailer = _disk_bytes(_trailer_text(ext, unique_id, file_hash, timestamp).encode("utf-8"))
+        
+        if progress_callback:
+            progress_callback("Salvataggio file...")
+        
+        # Se il corpo è già normalizzato basta sostituire la coda, altrimenti si riscrive tutto
+        with trace.stage("write") as stage:
+            body = _disk_bytes(clean_content)
+            if raw.startswith(body):
+                stage["bytes_written"] = _truncate_and_append(file_path, len(body), trailer)
+            else:
+                stage["bytes_written"] = _replace_atomically(file_path, body + trailer)
+        
+        return trace.finish((True, f"{describe_digest(file_hash)}\nID: {unique_id}\nData: {timestamp}"))
+    
+    except OperationCancelled:
+        return trace.finish((False, CANCELLED_MESSAGE))
+    except Exception as e:
+        return trace.finish((False, f"Errore durante la firma: {str(e)}"))
+
+def verify_signature(file_path, progress_callback=None, streaming=None, cache=None, bytes_callback=None, metrics=None):
+    """Verifica l'integrità del file confrontando l'hash attuale con quello memorizzato.
+    
+    L'algoritmo è quello registrato nella firma; le firme senza algorithm sono SHA256.
+    """
+    result = verify_file(file_path, progress_callback, streaming, cache, bytes_callback, metrics)
+    return result.valid, result.message
+
+def verify_file(file_path, progress_callback=None, streaming=None, cache=None, bytes_callback=None, metrics=None):
+    """Come verify_signature, ma restituisce un VerificationResult con tutti i campi della verifica"""
+    start = time.perf_counter()
+    key = None
+    if cache is not None:
+        cached, key = cache.lookup(file_path)
+        if cached:
+            _Trace(metrics, "verify", file_path).finish(cached, cached=True)
+            return VerificationResult.from_details(file_path, *cached, time.perf_counter() - start, cached=True)
+    
+    is_valid, info, data = _verify_signature_data(file_path, progress_callback, streaming, bytes_callback, metrics)
+    details = _signature_details(data)
+    if cache is not None and details is not None:
+        cache.store(file_path, key, is_valid, info, details)
+    return VerificationResult.from_details(file_path, is_valid, info, details, time.perf_counter() - start)
+
+def _verify_signature_data(file_path, progress_callback=None, streaming=None, bytes_callback=None, metrics=None):
+    """Come verify_signature, ma restituisce anche i dati di firma letti (None in caso di errore)"""
+    trace = _Trace(metrics, "verify", file_path)
+    try:
+        if not os.path.exists(file_path):
+            return trace.finish((False, f"Il file {file_path} non esiste.", None))
+        
+        if progress_callback:
+            progress_callback("Estrazione dati firma...")
+        
+        if use_streaming(file_path, streaming):
+            trailer = read_signature_trailer(file_path)
+            algorithm = parse_digest(trailer['hash'])[0] if trailer else DEFAULT_HASH_ALGORITHM
+            recalculated_hash, data = stream_normalized_hash(
+                file_path, bytes_callback=bytes_callback, trace=trace, algorithm=algorithm
+            )
+            data = trailer or data
+            if data['hash'] and parse_digest(data['hash'])[0] != algorithm:
+                algorithm = parse_digest(data['hash'])[0]
+                recalculated_hash, _ = stream_normalized_hash(file_path, trace=trace, algorithm=algorithm)
+        else:
+            recalculated_hash = None
+            with trace.stage("read") as stage:
+                data = extract_signature_data(file_path)
+                stage["bytes_read"] = os.path.getsize(file_path)
+            _report_bytes(bytes_callback, file_path)
+        
+        return trace.finish(_check_signature(data, recalculated_hash, trace, progress_callback))
+    
+    except OperationCancelled:
+        return trace.finish((False, CANCELLED_MESSAGE, None))
+    except Exception as e:
+        return trace.finish((False, f"Errore durante la verifica: {str(e)}", None))
+
+def _check_signature(data, recalculated_hash, trace, progress_callback=None):
+    """Confronta l'hash della firma con quello ricalcolato; restituisce (valido, info, data).
+    
+    Se recalculated_hash è None l'hash viene calcolato da data['raw']; in data
+    viene aggiunto 'recomputed' con l'hash effettivamente confrontato.
+    """
+    if not data['signature'] or not data['hash']:
+        return False, "File non firmato o firma corrotta.", data
+    
+    if progress_callback:
+        progress_callback("Verifica integrità...")
+    
+    if recalculated_hash is None:
+        recalculated_hash = trace.hash(trace.normalise(data['raw']), parse_digest(data['hash'])[0])
+    data['recomputed'] = recalculated_hash
+    
+    info = _format_signature_info(data['signature'], data['hash'], data['timestamp'])
+    return recalculated_hash == data['hash'], info, data
+
+def _format_signature_info(signature, file_hash, timestamp):
+    return f"ID: {signature}\nHash: {file_hash[:32]}...\nData: {timestamp or 'N/A'}"
+
+def _signature_details(data):
+    """Campi di firma letti da _verify_signature_data, senza il contenuto del file (None se non letto)"""
+    if data is None:
+        return None
+    return {
+        'signature': data['signature'],
+        'stored_hash': data['hash'],
+        'recomputed_hash': data.get('recomputed'),
+        'timestamp': data['timestamp'],
+    }
+
+def signature_info(file_path, progress_callback=None, metrics=None):
+    """Indica se il file è firmato e con quale ID, leggendo solo la coda del file"""
+    trace = _Trace(metrics, "info", file_path)
+    try:
+        if not os.path.exists(file_path):
+            return trace.finish((False, f"Il file {file_path} non esiste."))
+        
+        if progress_callback:
+            progress_callback("Estrazione dati firma...")
+        
+        with trace.stage("read"):
+            data = extract_signature_data(file_path, with_content=False)
+        
+        if not data['signature'] or not data['hash']:
+            return trace.finish((False, "File non firmato o firma corrotta."))
+        
+        return trace.finish((True, _format_signature_info(data['signature'], data['hash'], data['timestamp'])))
+    
+    except Exception as e:
+        return trace.finish((False, f"Errore durante la lettura della firma: {str(e)}"))
+
+def compute_content_hash(file_path, streaming=None, metrics=None, algorithm=None):
+    """Calcola l'hash del contenuto normalizzato, lo stesso scritto da add_signature (formato di format_digest)"""
+    trace = _Trace(metrics, "hash", file_path)
+    file_hash = _content_hash(file_path, trace, streaming, algorithm or DEFAULT_HASH_ALGORITHM)
+    trace.finish((True,))
+    return file_hash
+
+def _content_hash(file_path, trace, streaming=None, algorithm=DEFAULT_HASH_ALGORITHM):
+    if use_streaming(file_path, streaming):
+        return stream_normalized_hash(file_path, trace=trace, algorithm=algorithm)[0]
+    
+    with trace.stage("read") as stage:
+        with open(file_path, "rb") as f:
+            content = _universal_newlines(f.read())
+        stage["bytes_read"] = os.path.getsize(file_path)
+    return trace.hash(trace.normalise(content), algorithm)
+
+def hash_file(file_path, progress_callback=None, metrics=None, algorithm=None):
+    """Calcola l'hash del file senza modificarlo"""
+    ok, message, _ = _hash_file_data(file_path, progress_callback, metrics, algorithm)
+    return ok, message
+
+def _hash_file_data(file_path, progress_callback=None, metrics=None, algorithm=None):
+    trace = _Trace(metrics, "hash", file_path)
+    try:
+        if not os.path.exists(file_path):
+            return trace.finish((False, f"Il file {file_path} non esiste.", None))
+        
+        if progress_callback:
+            progress_callback("Calcolo hash...")
+        
+        st = os.stat(file_path)
+        file_hash = _content_hash(file_path, trace, algorithm=algorithm or DEFAULT_HASH_ALGORITHM)
+        data = {'hash': file_hash, 'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+        return trace.finish((True, describe_digest(file_hash), data))
+    
+    except Exception as e:
+        return trace.finish((False, f"Errore durante il calcolo dell'hash: {str(e)}", None))
+
+def strip_signature(file_path, progress_callback=None, bytes_callback=None, metrics=None):
+    """Rimuove la firma digitale dal file riscrivendo il contenuto normalizzato"""
+    trace = _Trace(metrics, "strip", file_path)
+    try:
+        if not os.path.exists(file_path):
+            return trace.finish((False, f"Il file {file_path} non esiste."))
+        
+        if progress_callback:
+            progress_callback("Lettura file...")
+        
+        with trace.stage("read") as stage:
+            with open(file_path, "rb") as f:
+                content = _universal_newlines(f.read())
+            stage["bytes_read"] = os.path.getsize(file_path)
+        _report_bytes(bytes_callback, file_path)
+        
+        clean_content = trace.normalise(content)
+        
+        if progress_callback:
+            progress_callback("Salvataggio file...")
+        
+        with trace.stage("write") as stage:
+            stage["bytes_written"] = _replace_atomically(file_path, _disk_bytes(clean_content))
+        
+        return trace.finish((True, f"Firma rimossa da {os.path.basename(file_path)}"))
+    
+    except OperationCancelled:
+        return trace.finish((False, CANCELLED_MESSAGE))
+    except Exception as e:
+        return trace.finish((False, f"Errore durante la rimozione: {str(e)}"))
+
+# ══════════════════════════════════════════════════════════════════════════════
+# 🌊 NORMALIZZAZIONE IN STREAMING (MEMORIA COSTANTE)
+# ══════════════════════════════════════════════════════════════════════════════
+
+STREAM_CHUNK_SIZE = 1024 * 1024
+STREAM_THRESHOLD = 16 * 1024 * 1024
+
+_MARKER_OVERLAP = max(len(m) for m in SIGNATURE_MARKERS) - 1
+
+def _stream_cut(data):
+    """Lunghezza del blocco elaborabile subito: un \\r finale (forse seguito da \\n nel
+    blocco successivo) e una sequenza UTF-8 incompleta vengono rimandati"""
+    end = len(data)
+    if end and data[end - 1] == 0x0D:
+        return end - 1
+    for back in range(1, min(3, end) + 1):
+        byte = data[end - back]
+        if byte < 0x80:
+            return end
+        if byte >= 0xC0:
+            needed = 2 if byte < 0xE0 else 3 if byte < 0xF0 else 4
+            return end - back if needed > back else end
+    return end
+
+def use_streaming(file_path, streaming=None):
+    """Decide se elaborare il file in streaming (automatico oltre STREAM_THRESHOLD)"""
+    if streaming is None:
+        return os.path.getsize(file_path) > STREAM_THRESHOLD
+    return streaming
+
+class _StreamSink:
+    """Destinazione del testo normalizzato: hash incrementale e file di output opzionale.
+    
+    out è un file binario; i newline vengono scritti come os.linesep, come farebbe
+    un file aperto in modalità testo. Con compare (il file originale aperto in
+    binario) il sink non scrive nulla finché l'output coincide con i byte già su
+    disco: al primo byte diverso apre out con open_out(), vi copia il prefisso
+    identico e prosegue scrivendo normalmente. position conta i byte di output.
+    """
+    
+    def __init__(self, hasher, out=None, timed=False, compare=None, open_out=None):
+        self.hasher = hasher
+        self.out = out
+        self.timed = timed
+        self.compare = compare
+        self.open_out = open_out
+        self.position = 0
+        self.bytes_hashed = 0
+        self.bytes_written = 0
+        self.hash_time = 0.0
+        self.write_time = 0.0
+    
+    def write(self, data):
+        self.bytes_hashed += len(data)
+        if not self.timed:
+            self.hasher.update(data)
+            if self.out or self.compare:
+                self._output(data)
+            return
+        
+        start = time.perf_counter()
+        self.hasher.update(data)
+        hashed = time.perf_counter()
+        self.hash_time += hashed - start
+        if self.out or self.compare:
+            self._output(data)
+            self.write_time += time.perf_counter() - hashed
+    
+    def _output(self, data):
+        if _DISK_NEWLINE != b"\n":
+            data = data.replace(b"\n", _DISK_NEWLINE)
+        if self.out is None:
+            if self.compare.read(len(data)) == data:
+                self.position += len(data)
+                return
+            self._diverge()
+        self.out.write(data)
+        self.position += len(data)
+        self.bytes_written += len(data)
+    
+    def _diverge(self):
+        """Il corpo cambia: da qui in poi si scrive su out, partendo dal prefisso già verificato"""
+        self.out = self.open_out()
+        self.compare.seek(0)
+        remaining = self.position
+        while remaining:
+            block = self.compare.read(min(remaining, STREAM_CHUNK_SIZE))
+            self.out.write(block)
+            remaining -= len(block)
+        self.bytes_written += self.position
+        self.compare = None
+    
+    def mark(self):
+        """Salva lo stato corrente per un eventuale rollback"""
+        return self.hasher.copy(), self.position
+    
+    def rollback(self, mark):
+        """Riporta hash e file allo stato salvato con mark()"""
+        hasher, position = mark
+        self.hasher = hasher.copy()
+        self.position = position
+        if self.out:
+            self.out.seek(position)
+            self.out.truncate()
+        elif self.compare:
+            self.compare.seek(position)
+
+class _StreamNormalizer:
+    """Equivalente incrementale di remove_signature_lines con buffer limitati.
+    
+    Lavora sui byte letti dal file: i newline \\r\\n e \\r vengono uniformati come in
+    modalità testo, le linee di firma scartate (raccogliendo i dati di firma), gli
+    spazi iniziali e finali rimossi e le sequenze di righe vuote compattate. Linee e
+    spazi più lunghi di max_buffer vengono scritti in modo speculativo e annullati
+    con un rollback del sink se necessario.
+    """
+    
+    def __init__(self, sink, max_buffer=STREAM_CHUNK_SIZE):
+        self.sink = sink
+        self.max_buffer = max_buffer
+        self.matches = {key: None for key in SIGNATURE_PATTERNS}
+        self.lines_filtered = 0
+        
+        self._carry = b""
+        self._partial = b""
+        self._emitted = False
+        self._skipping = False
+        self._long = None
+        self._long_tail = b""
+        
+        self._started = False
+        self._pending = []
+        self._pending_len = 0
+        self._pending_mark = None
+        self._run = 0
+    
+    def feed(self, chunk):
+        if self._carry:
+            chunk = self._carry + chunk
+        cut = _stream_cut(chunk)
+        if cut < len(chunk):
+            chunk, self._carry = chunk[:cut], chunk[cut:]
+        else:
+            self._carry = b""
+        self._feed(_universal_newlines(chunk))
+    
+    def _feed(self, chunk):
+        data = self._partial + chunk if self._partial else chunk
+        self._partial = b""
+        
+        if self._skipping:
+            idx = data.find(b'\n')
+            if idx < 0:
+                return
+            self._skipping = False
+            data = data[idx + 1:]
+        
+        if self._long is not None:
+            idx = data.find(b'\n')
+            segment = data if idx < 0 else data[:idx]
+            scan = self._long_tail + segment
+            if _has_marker(scan):
+                self._rollback_long()
+                self._match(scan)
+                if idx < 0:
+                    self._skipping = True
+                    return
+            else:
+                self._ws_feed(segment)
+                if idx < 0:
+                    self._long_tail = scan[-_MARKER_OVERLAP:]
+                    return
+                self._long = None
+            data = data[idx + 1:]
+        
+        idx = data.rfind(b'\n')
+        if idx < 0:
+            self._partial = data
+        else:
+            self._feed_lines(data[:idx])
+            self._partial = data[idx + 1:]
+        
+        if len(self._partial) > self.max_buffer:
+            self._start_long()
+    
+    def close(self):
+        if self._carry:
+            self._feed(_universal_newlines(self._carry))
+            self._carry = b""
+        if self._long is not None:
+            self._long = None
+        elif not self._skipping:
+            self._feed_lines(self._partial)
+        self._partial = b""
+        
+        self._pending = []
+        self._pending_len = 0
+        if self._pending_mark is not None:
+            self.sink.rollback(self._pending_mark)
+            self._pending_mark = None
+    
+    def _feed_lines(self, block):
+        if _has_marker(block):
+            self._capture(block)
+            block, filtered = _drop_marker_lines(block)
+            self.lines_filtered += filtered
+            if block is None:
+                return
+        
+        if self._emitted:
+            self._ws_feed(b'\n')
+        self._emitted = True
+        self._ws_feed(block)
+    
+    def _match(self, line):
+        self.lines_filtered += 1
+        self._capture(line)
+    
+    def _capture(self, text):
+        """Raccoglie i dati di firma non ancora trovati (i pattern non superano mai un \\n)"""
+        for key, pattern in _SIGNATURE_PATTERNS_BYTES.items():
+            if self.matches[key] is None:
+                match = pattern.search(text)
+                if match:
+                    self.matches[key] = match.group(1).decode("ascii")
+    
+    def _start_long(self):
+        """Gestisce una linea più lunga del buffer senza tenerla in memoria"""
+        line, self._partial = self._partial, b""
+        if _has_marker(line):
+            self._match(line)
+            self._skipping = True
+            return
+        
+        snapshot = (self._started, list(self._pending), self._pending_len, self._pending_mark, self._run)
+        self._long = (self.sink.mark(), snapshot, self._emitted)
+        self._long_tail = line[-_MARKER_OVERLAP:]
+        if self._emitted:
+            self._ws_feed(b'\n')
+        self._emitted = True
+        self._ws_feed(line)
+    
+    def _rollback_long(self):
+        mark, snapshot, emitted = self._long
+        self.sink.rollback(mark)
+        self._started, self._pending, self._pending_len, self._pending_mark, self._run = snapshot
+        self._emitted = emitted
+        self._long = None
+    
+    def _ws_feed(self, text):
+        if not self._started:
+            text = _lstrip_ws(text)
+            if not text:
+                return
+            self._started = True
+        
+        body = _rstrip_ws(text)
+        if body:
+            if self._pending:
+                self._run = self._write_collapsed(b''.join(self._pending), self._run)
+                self._pending = []
+                self._pending_len = 0
+            self._pending_mark = None
+            self._run = self._write_collapsed(body, self._run)
+            trail = text[len(body):]
+        else:
+            trail = text
+        
+        if trail:
+            self._pending.append(trail)
+            self._pending_len += len(trail)
+            if self._pending_len > self.max_buffer:
+                if self._pending_mark is None:
+                    self._pending_mark = self.sink.mark()
+                self._run = self._write_collapsed(b''.join(self._pending), self._run)
+                self._pending = []
+                self._pending_len = 0
+    
+    def _write_collapsed(self, text, run):
+        """Scrive il testo riducendo a due le sequenze di 3+ newline; restituisce i newline finali"""
+        rest = text.lstrip(b'\n')
+        leading = len(text) - len(rest)
+        if leading and run < 2:
+            self.sink.write(b'\n' * min(leading, 2 - run))
+        if not rest:
+            return run + leading
+        
+        if b'\n\n\n' in rest:
+            rest = _BLANK_RUN_RE.sub(b'\n\n', rest)
+        self.sink.write(rest)
+        return len(rest) - len(rest.rstrip(b'\n'))
+
+def stream_normalized_hash(file_path, out=None, chunk_size=STREAM_CHUNK_SIZE, bytes_callback=None, trace=None,
+                           algorithm=DEFAULT_HASH_ALGORITHM, sink=None):
+    """Calcola in streaming l'hash del contenuto normalizzato (nel formato di format_digest).
+    
+    Restituisce (hash, dati_firma) dove dati_firma ha le stesse chiavi di
+    extract_signature_data (senza 'raw'). Se out è un file binario aperto,
+    vi scrive anche il contenuto normalizzato; in alternativa sink è un
+    _StreamSink già configurato con hasher per algorithm. bytes_callback(letti, totale)
+    viene chiamato dopo ogni blocco.
+    
+    Con un _Trace le fasi, che qui sono interlacciate, vengono cronometrate
+    separatamente e riportate alla fine come eventi stage_end cumulativi.
+    """
+    with open(file_path, "rb") as f:
+        total = os.fstat(f.fileno()).st_size
+        digest, matches, _ = _stream_hash(f, total, out, chunk_size, bytes_callback, trace, algorithm, sink)
+    return digest, matches
+
+def _stream_hash(f, total, out=None, chunk_size=STREAM_CHUNK_SIZE, bytes_callback=None, trace=None,
+                 algorithm=DEFAULT_HASH_ALGORITHM, sink=None, keep_tail=False):
+    """Come stream_normalized_hash su un qualsiasi file binario già aperto (anche non posizionabile).
+    
+    Restituisce (hash, dati_firma, coda): con keep_tail la coda sono gli ultimi
+    TRAILER_READ_SIZE byte grezzi letti, per cercare la firma senza un seek.
+    """
+    timed = trace is not None and trace.enabled
+    if sink is None:
+        sink = _StreamSink(new_hasher(algorithm), out)
+    sink.timed = timed
+    normalizer = _StreamNormalizer(sink, max_buffer=chunk_size)
+    read_time = feed_time = 0.0
+    bytes_read = 0
+    tail = b""
+    
+    while True:
+        if timed:
+            start = time.perf_counter()
+            chunk = f.read(chunk_size)
+            read = time.perf_counter()
+            if chunk:
+                normalizer.feed(chunk)
+            read_time += read - start
+            feed_time += time.perf_counter() - read
+        else:
+            chunk = f.read(chunk_size)
+            if chunk:
+                normalizer.feed(chunk)
+        if not chunk:
+            break
+        bytes_read += len(chunk)
+        if keep_tail:
+            tail = (tail + chunk[-TRAILER_READ_SIZE:])[-TRAILER_READ_SIZE:]
+        if bytes_callback:
+            bytes_callback(bytes_read, total)
+    normalizer.close()
+    
+    if timed:
+        trace.add("read", read_time, bytes_read=bytes_read)
+        trace.add("normalise", max(0.0, feed_time - sink.hash_time - sink.write_time),
+                  lines_filtered=normalizer.lines_filtered)
+        trace.add("hash", sink.hash_time, bytes_hashed=sink.bytes_hashed)
+        if sink.out or sink.compare:
+            trace.add("write", sink.write_time, bytes_written=sink.bytes_written)
+    
+    return format_digest(algorithm, sink.hasher.hexdigest()), dict(normalizer.matches), tail
+
+def _add_signature_streaming(file_path, ext, trace, progress_callback=None, bytes_callback=None,
+                             algorithm=DEFAULT_HASH_ALGORITHM):
+    """Firma il file in streaming con una sola lettura.
+    
+    Il contenuto normalizzato viene confrontato con i byte già su disco: se ne è
+    un prefisso la vecchia coda viene troncata e la firma accodata in place.
+    Altrimenti, dal primo byte diverso, il sink scrive su un file temporaneo nella
+    stessa cartella, che alla fine sostituisce l'originale con un rename atomico.
+    """
+    temp = []
+    
+    def open_out():
+        out, tmp_path = _temp_beside(file_path)
+        temp.append((out, tmp_path))
+        return out
+    
+    try:
+        with open(file_path, "rb") as disk:
+            sink = _StreamSink(new_hasher(algorithm), compare=disk, open_out=open_out)
+            file_hash, _ = stream_normalized_hash(
+                file_path, bytes_callback=bytes_callback, trace=trace, algorithm=algorithm, sink=sink
+            )
+        
+        if progress_callback:
+            progress_callback("Generazione firma...")
+        
+        unique_id = _new_signature_id()
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        trailer = _disk_bytes(_trailer_text(ext, unique_id, file_hash, timestamp).encode("utf-8"))
+        
+        if progress_callback:
+            progress_callback("Salvataggio file...")
+        
+        with trace.stage("write") as stage:
+            if sink.out is None:
+                stage["bytes_written"] = _truncate_and_append(file_path, sink.position, trailer)
+            else:
+                with sink.out:
+                    sink.out.write(trailer)
+                    _sync_file(sink.out)
+                _commit_temp(temp[0][1], file_path)
+                stage["bytes_written"] = len(trailer)
+    except BaseException:
+        for out, tmp_path in temp:
+            out.close()
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        raise
+    
+    return True, f"{describe_digest(file_hash)}\nID: {unique_id}\nData: {timestamp}"
+
+# ══════════════════════════════════════════════════════════════════════════════
+# 🧠 API IN MEMORIA (BYTES, BUFFER E STREAM)
+# ══════════════════════════════════════════════════════════════════════════════
+
+class _BufferReader:
+    """File binario in sola lettura su un buffer: read() copia solo il blocco richiesto"""
+    
+    def __init__(self, data):
+        self.view = memoryview(data).cast("B")
+        self.position = 0
+    
+    def read(self, size=-1):
+        end = len(self.view) if size is None or size < 0 else min(len(self.view), self.position + size)
+        chunk = self.view[self.position:end].tobytes()
+        self.position = max(self.position, end)
+        return chunk
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        pass
+
+def _in_memory(data):
+    """Indica se data va elaborato interamente in memoria (bytes non oltre STREAM_THRESHOLD).
+    
+    Buffer mutabili, memoryview e contenuti più grandi passano invece in streaming
+    a blocchi: lavorarli in memoria ne richiederebbe una copia completa.
+    """
+    return isinstance(data, bytes) and len(data) <= STREAM_THRESHOLD
+
+def _verify_streamed(open_reader, size, trace, algorithm=DEFAULT_HASH_ALGORITHM):
+    """Verifica in streaming il contenuto di open_reader() (un file binario usato come contesto).
+    
+    Una sola lettura normalizza e calcola l'hash con algorithm, cercando la firma
+    negli ultimi byte letti; solo se la firma usa un altro algoritmo open_reader()
+    viene richiamato per rileggere il contenuto.
+    """
+    with open_reader() as f:
+        recalculated_hash, data, tail = _stream_hash(f, size, trace=trace, algorithm=algorithm, keep_tail=True)
+    data = _trailer_from_tail(tail) or data
+    if data['hash'] and parse_digest(data['hash'])[0] != algorithm:
+        with open_reader() as f:
+            recalculated_hash = _stream_hash(f, size, trace=trace, algorithm=parse_digest(data['hash'])[0])[0]
+    return _check_signature(dict(data, raw=None), recalculated_hash, trace)
+
+def _verify_in_memory(name, metrics, verify):
+    """Esegue verify(trace) -> (valido, info, data) e ne costruisce il VerificationResult"""
+    trace = _Trace(metrics, "verify", name)
+    start = time.perf_counter()
+    try:
+        ok, message, data = verify(trace)
+    except Exception as e:
+        ok, message, data = False, f"Errore durante la verifica: {str(e)}", None
+    trace.finish((ok,))
+    return VerificationResult.from_details(name, ok, message, _signature_details(data), time.perf_counter() - start)
+
+def verify_bytes(data, name="<bytes>", metrics=None):
+    """Verifica un contenuto firmato già in memoria, senza passare dal disco.
+    
+    data può essere bytes, bytearray, memoryview (o un altro buffer) oppure un file
+    binario leggibile (vedi verify_stream). Restituisce un VerificationResult come
+    verify_file, con path uguale a name; anche gli eventi per metrics usano name.
+    """
+    if hasattr(data, "read"):
+        return verify_stream(data, name, metrics=metrics)
+    
+    def verify(trace):
+        if _in_memory(data):
+            return _check_signature(_signature_data(_universal_newlines(data)), None, trace)
+        view = memoryview(data).cast("B")
+        return _verify_streamed(lambda: _BufferReader(view), len(view), trace)
+    
+    return _verify_in_memory(name, metrics, verify)
+
+def verify_stream(stream, name="<stream>", algorithm=None, metrics=None):
+    """Verifica il contenuto di un file binario leggibile (upload, socket, pipe) a memoria costante.
+    
+    Lo stream viene letto una sola volta dalla posizione corrente fino alla fine,
+    calcolando l'hash con algorithm (default SHA256). Se la firma usa un altro
+    algoritmo lo stream viene riposizionato e riletto; se non è riposizionabile il
+    risultato è un errore e basta ripetere la verifica indicando algorithm.
+    Lo stream non viene chiuso.
+    """
+    algorithm = algorithm or DEFAULT_HASH_ALGORITHM
+    seekable = getattr(stream, "seekable", None)
+    try:
+        start = stream.tell() if seekable and seekable() else None
+    except (OSError, AttributeError):
+        start = None  # basta read(): senza posizione lo stream si legge una volta sola
+    reads = []
+    
+    def open_reader():
+        if reads:
+            if start is None:
+                raise ValueError("lo stream non è riposizionabile e la firma usa un algoritmo diverso da "
+                                 f"{algorithm}: ripetere la verifica con quell'algoritmo")
+            stream.seek(start)
+        reads.append(True)
+        return contextlib.nullcontext(stream)
+    
+    return _verify_in_memory(name, metrics, lambda trace: _verify_streamed(open_reader, None, trace, algorithm))
+
+def sign_bytes(data, ext=".py", algorithm=None, metrics=None, name="<bytes>"):
+    """Firma un contenuto in memoria: bytes, bytearray, memoryview o file binario leggibile.
+    
+    Restituisce (True, info, firmato), dove firmato sono i byte che add_signature
+    scriverebbe su disco per un file con estensione ext (che sceglie lo stile di
+    commento) e info lo stesso testo di add_signature; in caso di errore
+    (False, messaggio, None). Niente file temporanei: i bytes fino a
+    STREAM_THRESHOLD vengono normalizzati in memoria, tutto il resto a blocchi.
+    """
+    algorithm = algorithm or DEFAULT_HASH_ALGORITHM
+    trace = _Trace(metrics, "sign", name)
+    try:
+        if _in_memory(data):
+            clean_content = trace.normalise(_universal_newlines(data))
+            file_hash = trace.hash(clean_content, algorithm)
+            out = None
+        else:
+            import io
+            
+            out = io.BytesIO()
+            reader = data if hasattr(data, "read") else _BufferReader(data)
+            file_hash = _stream_hash(reader, None, out, trace=trace, algorithm=algorithm)[0]
+        
+        unique_id = _new_signature_id()
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        trailer = _disk_bytes(_trailer_text(ext.lower(), unique_id, file_hash, timestamp).encode("utf-8"))
+        
+        with trace.stage("write") as stage:
+            if out is None:
+                signed = b"".join((_disk_bytes(clean_content), trailer))
+            else:
+                out.write(trailer)
+                signed = out.getvalue()
+            stage["bytes_written"] = len(signed)
+        
+        return trace.finish((True, f"{describe_digest(file_hash)}\nID: {unique_id}\nData: {timestamp}", signed))
+    
+    except Exception as e:
+        return trace.finish((False, f"Errore durante la firma: {str(e)}", None))
+
+# ══════════════════════════════════════════════════════════════════════════════
+# 📏 STRUMENTAZIONE E METRICHE
+# ══════════════════════════════════════════════════════════════════════════════
+
+METRIC_STAGES = ("read", "normalise", "hash", "write")
+METRIC_COUNTERS = {
+    "bytes_read": "Byte letti dal disco per operazione.",
+    "bytes_hashed": "Byte di contenuto normalizzato passati all'hash per operazione.",
+    "bytes_written": "Byte scritti su disco per operazione.",
+    "lines_filtered": "Linee di firma scartate dalla normalizzazione per operazione.",
+}
+METRIC_DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 60.0)
+
+class _Trace:
+    """Cronometra le fasi di una singola operazione e le invia come eventi a metrics.
+    
+    metrics è un qualsiasi callable che riceve un dizionario per evento; senza
+    metrics il trace non emette nulla e non fa lavoro aggiuntivo.
+    """
+    
+    def __init__(self, metrics, op, file_path):
+        self.metrics = metrics
+        self.enabled = metrics is not None
+        self.op = op
+        self.path = str(file_path)
+        self.stages = {}
+        self.counters = dict.fromkeys(METRIC_COUNTERS, 0)
+        self.start = time.perf_counter()
+    
+    def emit(self, event_type, **fields):
+        if self.enabled:
+            self.metrics({"type": event_type, "op": self.op, "path": self.path, "ts": time.time(), **fields})
+    
+    @contextlib.contextmanager
+    def stage(self, name):
+        """Misura il blocco come fase name; i contatori assegnati al dict restituito finiscono nell'evento"""
+        self.emit("stage_start", stage=name)
+        counters = {}
+        start = time.perf_counter()
+        try:
+            yield counters
+        finally:
+            self.add(name, time.perf_counter() - start, **counters)
+    
+    def add(self, name, seconds, **counters):
+        """Registra una fase già cronometrata (usato dallo streaming, dove le fasi sono interlacciate)"""
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+        for key, value in counters.items():
+            self.counters[key] += value
+        self.emit("stage_end", stage=name, duration=seconds, **counters)
+    
+    def normalise(self, content):
+        with self.stage("normalise") as stage:
+            clean_content, stage["lines_filtered"] = _normalize_content(content)
+        return clean_content
+    
+    def hash(self, data, algorithm=DEFAULT_HASH_ALGORITHM):
+        with self.stage("hash") as stage:
+            stage["bytes_hashed"] = len(data)
+            return hash_bytes(data, algorithm)
+    
+    def finish(self, result, **fields):
+        """Emette l'evento file_end con esito, durata totale, fasi e contatori; restituisce result"""
+        self.emit("file_end", ok=bool(result[0]), duration=time.perf_counter() - self.start,
+                  stages=dict(self.stages), **self.counters, **fields)
+        return result
+
+class MetricsCollector:
+    """Raccoglie gli eventi strutturati delle operazioni e ne aggrega le metriche.
+    
+    Si passa come metrics= a add_signature, verify_signature, strip_signature,
+    hash_file, signature_info e alle funzioni batch. Ogni evento è un dizionario
+    con 'type' (stage_start, stage_end, file_end), 'op', 'path' e 'ts'; se
+    events_path è indicato gli eventi vengono scritti anche come JSON Lines.
+    Le metriche aggregate si esportano con write_prometheus() in formato textfile.
+    """
+    
+    def __init__(self, events_path=None):
+        self.events_path = events_path
+        self._events = open(events_path, "a", encoding="utf-8") if events_path else None
+        self._lock = threading.Lock()
+        self.files = {}
+        self.counters = {}
+        self.stage_seconds = {}
+        self.durations = {}
+    
+    def __call__(self, event):
+        with self._lock:
+            if self._events:
+                self._events.write(json.dumps(event, ensure_ascii=False) + "\n")
+            if event["type"] == "file_end":
+                self._aggregate(event)
+    
+    def _aggregate(self, event):
+        op = event["op"]
+        result = "cached" if event.get("cached") else ("ok" if event["ok"] else "failed")
+        self.files[(op, result)] = self.files.get((op, result), 0) + 1
+        
+        for key in METRIC_COUNTERS:
+            if event.get(key):
+                self.counters[(key, op)] = self.counters.get((key, op), 0) + event[key]
+        for stage, seconds in event["stages"].items():
+            self.stage_seconds[(op, stage)] = self.stage_seconds.get((op, stage), 0.0) + seconds
+        
+        histogram = self.durations.setdefault(op, [[0] * len(METRIC_DURATION_BUCKETS), 0.0, 0])
+        for i, bound in enumerate(METRIC_DURATION_BUCKETS):
+            if event["duration"] <= bound:
+                histogram[0][i] += 1
+        histogram[1] += event["duration"]
+        histogram[2] += 1
+    
+    def prometheus_text(self):
+        """Metriche aggregate nel formato di esposizione testuale di Prometheus"""
+        lines = []
+        
+        def family(name, kind, help_text, samples):
+            if not samples:
+                return
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{key}="{val}"' for key, val in labels)
+                lines.append(f"{name}{{{label_text}}} {value}")
+        
+        with self._lock:
+            family("filesigner_files_total", "counter", "File elaborati per operazione ed esito.",
+                   [((("op", op), ("result", result)), count) for (op, result), count in sorted(self.files.items())])
+            for key, help_text in METRIC_COUNTERS.items():
+                family(f"filesigner_{key}_total", "counter", help_text,
+                       [((("op", op),), value) for (name, op), value in sorted(self.counters.items()) if name == key])
+            family("filesigner_stage_seconds_total", "counter", "Secondi spesi in ogni fase per operazione.",
+                   [((("op", op), ("stage", stage)), seconds) for (op, stage), seconds in sorted(self.stage_seconds.items())])
+            
+            if self.durations:
+                lines.append("# HELP filesigner_file_duration_seconds Durata per file di ogni operazione.")
+                lines.append("# TYPE filesigner_file_duration_seconds histogram")
+            for op, (buckets, total, count) in sorted(self.durations.items()):
+                for bound, bucket_count in zip(METRIC_DURATION_BUCKETS, buckets):
+                    lines.append(f'filesigner_file_duration_seconds_bucket{{op="{op}",le="{bound:g}"}} {bucket_count}')
+                lines.append(f'filesigner_file_duration_seconds_bucket{{op="{op}",le="+Inf"}} {count}')
+                lines.append(f'filesigner_file_duration_seconds_sum{{op="{op}"}} {total}')
+                lines.append(f'filesigner_file_duration_seconds_count{{op="{op}"}} {count}')
+        
+        return "\n".join(lines) + "\n"
+    
+    def write_prometheus(self, path):
+        """Scrive le metriche in un textfile Prometheus in modo atomico (per il textfile collector)"""
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(prefix=".filesigner-metrics-", dir=directory)
+        try:
+            with open(fd, "w", encoding="utf-8") as f:
+                f.write(self.prometheus_text())
+                _sync_file(f)
+            os.replace(tmp_path, path)
+            _sync_directory(path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    
+    def close(self):
+        if self._events:
+            self._events.close()
+            self._events = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+
+# ══════════════════════════════════════════════════════════════════════════════
+# 🧾 RISULTATI STRUTTURATI E REPORT (JSON LINES / SARIF)
+# ══════════════════════════════════════════════════════════════════════════════
+
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+
+# status del risultato -> (ruleId, nome della regola, livello SARIF, descrizione)
+SARIF_RULES = {
+    "modified": ("FS001", "signature-mismatch", "error", "Il contenuto non corrisponde all'hash registrato nella firma"),
+    "unsigned": ("FS002", "unsigned-file", "warning", "File non firmato o firma corrotta"),
+    "error": ("FS003", "verification-error", "error", "Il file non può essere letto o verificato"),
+}
+
+class VerificationResult:
+    """Esito strutturato della verifica di un file.
+    
+    status vale "valid", "modified" (hash ricalcolato diverso da quello della
+    firma), "unsigned" oppure "error"; error contiene il motivo negli ultimi due
+    casi. duration è in secondi, cached indica un esito preso da una cache.
+    """
+    
+    FIELDS = ("path", "valid", "status", "signature_id", "stored_hash", "recomputed_hash", "timestamp",
+              "duration", "error", "cached")
+    __slots__ = FIELDS
+    
+    def __init__(self, path, valid, status, signature_id=None, stored_hash=None, recomputed_hash=None,
+                 timestamp=None, duration=0.0, error=None, cached=False):
+        self.path = str(path)
+        self.valid = valid
+        self.status = status
+        self.signature_id = signature_id
+        self.stored_hash = stored_hash
+        self.recomputed_hash = recomputed_hash
+        self.timestamp = timestamp
+        self.duration = duration
+        self.error = error
+        self.cached = cached
+    
+    @classmethod
+    def from_details(cls, path, valid, message, details=None, duration=0.0, cached=False):
+        """Costruisce il risultato da (valido, messaggio) e dai campi di firma (vedi _signature_details)"""
+        if details is None:
+            return cls(path, False, "error", duration=duration, error=message, cached=cached)
+        
+        if not details['signature'] or not details['stored_hash']:
+            status = "unsigned"
+        else:
+            status = "valid" if valid else "modified"
+        return cls(
+            path, bool(valid), status, details['signature'], details['stored_hash'], details['recomputed_hash'],
+            details['timestamp'], duration, message if status == "unsigned" else None, cached
+        )
+    
+    @classmethod
+    def from_dict(cls, data):
+        """Ricostruisce un risultato da as_dict() (per esempio da una riga di un report JSON Lines)"""
+        return cls(**{field: data.get(field) for field in cls.FIELDS if field in data})
+    
+    @property
+    def message(self):
+        """Lo stesso testo restituito da verify_signature"""
+        if self.status in ("valid", "modified"):
+            return _format_signature_info(self.signature_id, self.stored_hash, self.timestamp)
+        return self.error
+    
+    def as_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+    
+    def __repr__(self):
+        return f"VerificationResult({self.path!r}, status={self.status!r})"
+
+class JsonLinesReport:
+    """Report JSON Lines: un oggetto as_dict() per riga, scritto appena il file è verificato.
+    
+    Si usa come results= delle funzioni batch (è un callable); in memoria non
+    resta nulla dei risultati già scritti. header, se indicato, viene scritto
+    come prima riga; con sizes ({percorso: byte}) ogni riga riporta anche la
+    dimensione del file (lo usano i report degli shard, vedi run_shard).
+    """
+    
+    def __init__(self, stream, close_stream=False, header=None, sizes=None):
+        self.stream = stream
+        self.close_stream = close_stream
+        self.sizes = sizes
+        self.count = 0
+        if header is not None:
+            self.stream.write(json.dumps(header) + "\n")
+    
+    def __call__(self, result):
+        data = result.as_dict()
+        if self.sizes is not None:
+            data['size'] = self.sizes.get(result.path, 0)
+        self.stream.write(json.dumps(data, ensure_ascii=False) + "\n")
+        self.count += 1
+    
+    def close(self):
+        if self.close_stream:
+            self.stream.close()
+        else:
+            self.stream.flush()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+
+class SarifReport:
+    """Report SARIF 2.1.0 scritto in streaming.
+    
+    Intestazione e regole vengono scritte subito, ogni file non valido diventa un
+    result appena verificato e close() chiude gli array aggiungendo i totali;
+    con include_valid=True anche i file validi compaiono, come result "pass".
+    I percorsi sotto root (default: cartella corrente) sono relativi a SRCROOT.
+    """
+    
+    def __init__(self, stream, include_valid=False, root=None, close_stream=False):
+        import pathlib
+        
+        self.stream = stream
+        self.include_valid = include_valid
+        self.root = os.path.abspath(root or os.getcwd())
+        self.close_stream = close_stream
+        self.count = 0
+        self.files = 0
+        self.failed = 0
+        
+        rules = [
+            {"id": rule_id, "name": name, "shortDescription": {"text": text},
+             "defaultConfiguration": {"level": level}}
+            for rule_id, name, level, text in SARIF_RULES.values()
+        ]
+        driver = {"name": SoftwareProtection.PRODUCT_NAME, "version": SoftwareProtection.PRODUCT_VERSION,
+                  "rules": rules}
+        base = {"SRCROOT": {"uri": pathlib.Path(self.root).as_uri().rstrip("/") + "/"}}
+        self.stream.write(
+            f'{{"$schema": "{SARIF_SCHEMA}", "version": "2.1.0", "runs": [{{"tool": {json.dumps({"driver": driver})}, '
+            f'"originalUriBaseIds": {json.dumps(base)}, "results": [\n'
+        )
+    
+    def _location(self, path):
+        import pathlib
+        from urllib.parse import quote
+        
+        path = os.path.abspath(path)
+        if path.startswith(self.root + os.sep):
+            relative = path[len(self.root) + 1:].replace(os.sep, "/")
+            return {"uri": quote(relative), "uriBaseId": "SRCROOT"}
+        return {"uri": pathlib.Path(path).as_uri()}
+    
+    def __call__(self, result):
+        self.files += 1
+        if not result.valid:
+            self.failed += 1
+        elif not self.include_valid:
+            return
+        
+        if result.valid:
+            entry = {"ruleId": SARIF_RULES["modified"][0], "kind": "pass", "level": "none",
+                     "message": {"text": "Firma valida"}}
+        else:
+            rule_id, _, level, _ = SARIF_RULES[result.status if result.status in SARIF_RULES else "error"]
+            if result.status == "modified":
+                text = f"Hash ricalcolato {result.recomputed_hash} diverso da quello della firma {result.stored_hash}"
+            else:
+                text = result.error or SARIF_RULES["error"][3]
+            entry = {"ruleId": rule_id, "level": level, "message": {"text": text}}
+        
+        entry["locations"] = [{"physicalLocation": {"artifactLocation": self._location(result.path)}}]
+        entry["properties"] = {
+            "signatureId": result.signature_id,
+            "storedHash": result.stored_hash,
+            "recomputedHash": result.recomputed_hash,
+            "timestamp": result.timestamp,
+            "duration": result.duration,
+            "cached": result.cached,
+        }
+        self.stream.write(("" if not self.count else ",\n") + json.dumps(entry, ensure_ascii=False))
+        self.count += 1
+    
+    def close(self):
+        invocation = {"executionSuccessful": True, "properties": {"files": self.files, "failed": self.failed}}
+        self.stream.write(f'\n], "invocations": [{json.dumps(invocation)}]}}]}}\n')
+        if self.close_stream:
+            self.stream.close()
+        else:
+            self.stream.flush()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+
+REPORT_FORMATS = ("jsonl", "sarif")
+
+def open_report(path, report_format=None, include_valid=False, header=None):
+    """Apre un report su file; senza report_format è SARIF se path termina con .sarif, altrimenti JSON Lines.
+    
+    Il report JSON Lines contiene sempre tutti i file, quello SARIF solo i non
+    validi salvo include_valid=True. header è la riga iniziale di un report
+    JSON Lines. Il writer va chiuso con close().
+    """
+    if report_format is None:
+        report_format = "sarif" if path.lower().endswith((".sarif", ".sarif.json")) else "jsonl"
+    if report_format not in REPORT_FORMATS:
+        raise ValueError(f"Formato di report non supportato: {report_format}")
+    if header is not None and report_format != "jsonl":
+        raise ValueError("Un report con intestazione (shard) deve essere JSON Lines")
+    
+    stream = open(path, "w", encoding="utf-8")
+    if report_format == "sarif":
+        return SarifReport(stream, include_valid, close_stream=True)
+    return JsonLinesReport(stream, close_stream=True, header=header)
+
+# ══════════════════════════════════════════════════════════════════════════════
+# 🗄️ CACHE PERSISTENTE DELLE VERIFICHE
+# ══════════════════════════════════════════════════════════════════════════════
+
+CACHE_MAX_ENTRIES = 200_000
+CACHE_SCHEMA_VERSION = 2
+CACHE_RACY_WINDOW_NS = 2_000_000_000
+
+def default_cache_path():
+    """Percorso della cache: $FILESIGNER_CACHE oppure la cartella cache dell'utente"""
+    if os.environ.get("FILESIGNER_CACHE"):
+        return os.environ["FILESIGNER_CACHE"]
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "filesigner", "verify-cache.sqlite")
+
+class VerificationCache:
+    """Cache SQLite dei risultati di verify_signature con eviction LRU.
+    
+    Ogni voce è legata a (device, inode, size, mtime_ns) del file: se la stat
+    coincide il risultato viene restituito senza leggere il file. I file
+    modificati da meno di CACHE_RACY_WINDOW_NS non vengono memorizzati, perché
+    una scrittura successiva nello stesso tick di mtime non sarebbe rilevabile.
+    
+    Una seconda tabella lega i risultati agli object ID dei blob git: l'esito di
+    una verifica dipende solo dal contenuto, quindi vale per qualsiasi percorso
+    (rinomine, copie, revert) con lo stesso blob.
+    """
+    
+    _RESULT_COLUMNS = "signature, stored_hash, recomputed_hash, timestamp, valid, message"
+    
+    def __init__(self, path=None, max_entries=CACHE_MAX_ENTRIES, rehash=False):
+        import sqlite3
+        
+        self.path = path or default_cache_path()
+        self.max_entries = max_entries
+        self.rehash = rehash
+        self._touched = []
+        self._touched_blobs = []
+        
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.db = sqlite3.connect(self.path, timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        
+        if self.db.execute("PRAGMA user_version").fetchone()[0] != CACHE_SCHEMA_VERSION:
+            self.db.execute("DROP TABLE IF EXISTS verify_cache")
+            self.db.execute("DROP TABLE IF EXISTS blob_cache")
+            self.db.execute(f"PRAGMA user_version={CACHE_SCHEMA_VERSION}")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS verify_cache ("
+            "path TEXT PRIMARY KEY, dev INTEGER, ino INTEGER, size INTEGER, mtime_ns INTEGER, "
+            "signature TEXT, stored_hash TEXT, recomputed_hash TEXT, timestamp TEXT, "
+            "valid INTEGER, message TEXT, last_used INTEGER)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS verify_cache_lru ON verify_cache(last_used)")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS blob_cache (oid TEXT PRIMARY KEY, signature TEXT, stored_hash TEXT, "
+            "recomputed_hash TEXT, timestamp TEXT, valid INTEGER, message TEXT, last_used INTEGER)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS blob_cache_lru ON blob_cache(last_used)")
+        self.db.commit()
+    
+    def lookup(self, file_path):
+        """Restituisce ((valido, messaggio, dettagli) oppure None, chiave_stat) per il file.
+        
+        dettagli sono i campi di firma di _signature_details (ID, hash memorizzato e
+        ricalcolato, timestamp), per ricostruire un VerificationResult completo.
+        """
+        path = os.path.abspath(file_path)
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None, None
+        key = (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+        
+        if self.rehash:
+            return None, key
+        
+        row = self.db.execute(
+            f"SELECT dev, ino, size, mtime_ns, {self._RESULT_COLUMNS} FROM verify_cache WHERE path = ?", (path,)
+        ).fetchone()
+        if row is None or tuple(row[:4]) != key:
+            return None, key
+        
+        self._touched.append((time.time_ns(), path))
+        return self._result(row[4:]), key
+    
+    def store(self, file_path, key, valid, message, details):
+        """Memorizza il risultato calcolato per la stat letta prima della verifica"""
+        if key is None or key[3] > time.time_ns() - CACHE_RACY_WINDOW_NS:
+            return
+        
+        self.db.execute(
+            "INSERT OR REPLACE INTO verify_cache VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (os.path.abspath(file_path), *key, *self._row(valid, message, details))
+        )
+    
+    def lookup_blob(self, oid):
+        """Restituisce (valido, messaggio, dettagli) già calcolato per il blob git oid, oppure None"""
+        if self.rehash or not oid:
+            return None
+        row = self.db.execute(f"SELECT {self._RESULT_COLUMNS} FROM blob_cache WHERE oid = ?", (oid,)).fetchone()
+        if row is None:
+            return None
+        self._touched_blobs.append((time.time_ns(), oid))
+        return self._result(row)
+    
+    def store_blob(self, oid, valid, message, details):
+        self.db.execute(
+            "INSERT OR REPLACE INTO blob_cache VALUES (?, ?, ?, ?, ?, ?, ?, ?)", (oid, *self._row(valid, message, details))
+        )
+    
+    @staticmethod
+    def _row(valid, message, details):
+        return (details['signature'], details['stored_hash'], details['recomputed_hash'], details['timestamp'],
+                int(valid), message, time.time_ns())
+    
+    @staticmethod
+    def _result(row):
+        signature, stored_hash, recomputed_hash, timestamp, valid, message = row
+        details = {'signature': signature, 'stored_hash': stored_hash, 'recomputed_hash': recomputed_hash,
+                   'timestamp': timestamp}
+        return bool(valid), message, details
+    
+    def close(self):
+        """Aggiorna l'ordine LRU, applica il limite di dimensione e salva"""
+        if self._touched:
+            self.db.executemany("UPDATE verify_cache SET last_used = ? WHERE path = ?", self._touched)
+            self._touched = []
+        if self._touched_blobs:
+            self.db.executemany("UPDATE blob_cache SET last_used = ? WHERE oid = ?", self._touched_blobs)
+            self._touched_blobs = []
+        
+        for table, key in (("verify_cache", "path"), ("blob_cache", "oid")):
+            excess = self.db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] - self.max_entries
+            if excess > 0:
+                self.db.execute(
+                    f"DELETE FROM {table} WHERE {key} IN "
+                    f"(SELECT {key} FROM {table} ORDER BY last_used LIMIT ?)", (excess,)
+                )
+        self.db.commit()
+        self.db.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+
+# ══════════════════════════════════════════════════════════════════════════════
+# 📒 MANIFEST DI FIRMA (MODALITÀ DETACHED)
+# ══════════════════════════════════════════════════════════════════════════════
+
+MANIFEST_FORMAT = "filesigner-manifest"
+MANIFEST_VERSION = 2
+
+UNLISTED_MESSAGE = "File non presente nel manifest."
+
+def _manifest_key(file_path, root):
+    key = os.path.relpath(os.path.abspath(file_path), root).replace(os.sep, "/")
+    return "" if key == "." else key
+
+def sign_manifest(paths, manifest_path, jobs=None, all_files=False, report=None, metrics=None, algorithm=None):
+    """Firma i file in un unico indice separato (JSON Lines ordinato per percorso).
+    
+    I file vengono solo letti: per ognuno l'indice registra UUID, hash SHA256 o
+    algorithm (calcolato come in add_signature), timestamp, dimensione e mtime. I percorsi
+    sono relativi alla cartella del manifest; l'intestazione contiene la radice
+    dell'albero di Merkle e i percorsi firmati (roots), dove verify_manifest cerca
+    i file non elencati. Segue l'indice delle cartelle: per ognuna il digest di
+    Merkle e l'intervallo di byte delle sue righe, così la verifica di un
+    sottoalbero legge solo quelle.
+    """
+    manifest_path = os.path.abspath(manifest_path)
+    root = os.path.dirname(manifest_path)
+    stats = _new_stats()
+    start = time.perf_counter()
+    
+    options = {"algorithm": algorithm}
+    tasks = [
+        ("hash", p, options) for p in iter_target_files(paths, all_files) if os.path.abspath(p) != manifest_path
+    ]
+    entries = []
+    for file_path, ok, message, size, data, _ in _run_tasks(tasks, jobs, metrics):
+        if ok:
+            entries.append({
+                'path': _manifest_key(file_path, root),
+                'id': _new_signature_id(),
+                'hash': data['hash'],
+                'signed': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                'size': data['size'],
+                'mtime_ns': data['mtime_ns'],
+            })
+        _record_result(stats, report, file_path, ok, message, size)
+    
+    entries.sort(key=lambda entry: entry['path'])
+    lines = [(json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8") for entry in entries]
+    
+    digests = {}
+    tree = _MerkleFold(digests.__setitem__)
+    ranges = {}
+    offset = 0
+    for entry, line in zip(entries, lines):
+        tree.add(entry['path'], entry['hash'])
+        parts = entry['path'].split("/")
+        for depth in range(len(parts)):
+            ranges.setdefault("/".join(parts[:depth]), [offset, offset])[1] = offset + len(line)
+        offset += len(line)
+    stats["merkle_root"] = tree.finish()
+    
+    header = {
+        'format': MANIFEST_FORMAT,
+        'version': MANIFEST_VERSION,
+        'files': len(entries),
+        'merkle_root': stats["merkle_root"],
+        'roots': sorted({_manifest_key(p, root) for p in paths}),
+        'all_files': all_files,
+    }
+    
+    # Offset relativi all'inizio delle voci; il file è binario perché non cambino con i fine riga
+    index = {'directories': {d: [digests[d], start, end] for d, (start, end) in ranges.items()}}
+    
+    fd, tmp_path = tempfile.mkstemp(prefix=".filesigner-", dir=root)
+    try:
+        with open(fd, "wb") as f:
+            f.write((json.dumps(header) + "\n").encode("utf-8"))
+            f.write((json.dumps(index, ensure_ascii=False) + "\n").encode("utf-8"))
+            f.writelines(lines)
+            _sync_file(f)
+        os.replace(tmp_path, manifest_path)
+        _sync_directory(manifest_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    
+    stats["elapsed"] = time.perf_counter() - start
+    return stats
+
+def _read_manifest_header(f, manifest_path):
+    """Legge l'intestazione (f aperto in binario); dalla v2 anche l'indice, in header['directories']"""
+    header = json.loads(f.readline() or b"{}")
+    if header.get('format') != MANIFEST_FORMAT or header.get('version') not in (1, MANIFEST_VERSION):
+        raise ValueError(f"{manifest_path} non è un manifest {MANIFEST_FORMAT} v1-v{MANIFEST_VERSION}")
+    if header['version'] >= 2:
+        header['directories'] = json.loads(f.readline())['directories']
+    return header
+
+def _iter_manifest_entries(f):
+    for line in f:
+        if line.strip():
+            yield json.loads(line)
+
+def _outermost_prefixes(prefixes):
+    return [p for p in prefixes if not any(p.startswith(q + "/") for q in prefixes if q != p)]
+
+def _iter_manifest_subtrees(f, directories, prefixes):
+    """Voci sotto i prefissi, lette con l'indice delle cartelle invece che da tutto il manifest.
+    
+    Per una cartella si legge solo il suo intervallo di righe; per un file (o una
+    cartella non registrata) quello della cartella che lo contiene, fermandosi
+    appena superato il prefisso. I prefissi sono ordinati come i percorsi.
+    """
+    body = f.tell()
+    for prefix in sorted(prefixes, key=lambda p: p + "/" if p in directories else p):
+        node = directories.get(prefix) or directories.get(prefix.rpartition("/")[0])
+        if node is None:
+            continue
+        f.seek(body + node[1])
+        while f.tell() < body + node[2]:
+            entry = json.loads(f.readline())
+            inside = entry['path'] == prefix or entry['path'].startswith(prefix + "/")
+            if inside:
+                yield entry
+            elif entry['path'] > prefix:
+                break
+
+def iter_manifest(manifest_path):
+    """Legge il manifest una riga alla volta, nell'ordine di percorso in cui è stato scritto"""
+    with open(manifest_path, "rb") as f:
+        _read_manifest_header(f, manifest_path)
+        yield from _iter_manifest_entries(f)
+
+def _manifest_roots(header, manifest_path):
+    """Percorsi firmati; i manifest senza 'roots' li ricavano dal primo livello dei percorsi registrati"""
+    if 'roots' in header:
+        return header['roots']
+    roots = set()
+    for entry in iter_manifest(manifest_path):
+        roots.add(entry['path'].split("/", 1)[0])
+    return sorted(roots)
+
+def _iter_sorted_targets(directory, key, all_files=False):
+    """Come iter_target_files su una cartella, ma in ordine di chiave del manifest.
+    
+    Restituisce (chiave, percorso): i nomi delle cartelle vengono ordinati come
+    "nome/", così "a/b.py" precede "a/b/c.py" come nell'ordinamento delle stringhe.
+    """
+    try:
+        with os.scandir(directory) as it:
+            children = sorted((entry.name + "/" if entry.is_dir() else entry.name, entry) for entry in it)
+    except OSError:
+        return
+    
+    for sort_key, entry in children:
+        child_key = f"{key}/{entry.name}" if key else entry.name
+        if sort_key.endswith("/"):
+            if entry.name not in IGNORED_DIRS and not entry.is_symlink():
+                yield from _iter_sorted_targets(entry.path, child_key, all_files)
+        elif entry.is_file() and _is_target_name(entry.name, all_files):
+            yield child_key, entry.path
+
+def _iter_manifest_scope(root, keys, all_files=False):
+    """File su disco sotto le chiavi indicate, in ordine di chiave e senza ripetizioni"""
+    import heapq
+    
+    sources = []
+    for key in keys:
+        path = os.path.join(root, *key.split("/")) if key else root
+        if os.path.isfile(path):
+            sources.append(iter([(key, path)]))
+        else:
+            sources.append(_iter_sorted_targets(path, key, all_files))
+    
+    previous = None
+    for key, path in heapq.merge(*sources):
+        if key != previous:
+            yield key, path
+        previous = key
+
+def _merge_manifest(entries, found):
+    """Affianca in ordine di percorso le voci del manifest e i file su disco.
+    
+    Restituisce (chiave, voce) con voce None per i file assenti dal manifest; le
+    voci senza file corrispondente (file spariti) escono comunque.
+    """
+    entry = next(entries, None)
+    disk = next(found, None)
+    while entry is not None or disk is not None:
+        if disk is None or (entry is not None and entry['path'] <= disk[0]):
+            if disk is not None and entry['path'] == disk[0]:
+                disk = next(found, None)
+            yield entry['path'], entry
+            entry = next(entries, None)
+        else:
+            yield disk[0], None
+            disk = next(found, None)
+
+def verify_manifest(manifest_path, jobs=None, report=None, paths=None, incremental=False, metrics=None,
+                    results=None):
+    """Verifica i file elencati nel manifest; paths limita la verifica a file o cartelle.
+    
+    Il manifest viene letto in streaming, affiancato ai file trovati sotto i
+    percorsi firmati (o sotto paths): i file assenti dal manifest sono riportati
+    come non firmati. Con paths vengono lette solo le righe dei sottoalberi
+    richiesti. Con incremental=True vengono riletti solo i file con dimensione o
+    mtime diversi da quelli registrati. stats["merkle_root"] (verifica completa)
+    o stats["merkle_subtrees"] ({prefisso: (digest ricalcolato, digest del
+    manifest)}) permettono il confronto con l'albero registrato; in
+    stats["merkle_changed"] finiscono i file modificati, aggiunti o spariti. results riceve un
+    VerificationResult per file.
+    """
+    manifest_path = os.path.abspath(manifest_path)
+    root = os.path.dirname(manifest_path)
+    stats = _new_stats()
+    start = time.perf_counter()
+    
+    prefixes = _outermost_prefixes(sorted({_manifest_key(p, root) for p in paths or []}))
+    subtrees = {} if not prefixes or "" in prefixes else {p: [None, None] for p in prefixes}
+    changed = []
+    
+    def on_directory(position):
+        def capture(directory, digest):
+            if directory in subtrees:
+                subtrees[directory][position] = digest
+        return capture
+    
+    new_tree = _MerkleFold(on_directory(0))
+    old_tree = None
+    
+    def record(file_path, ok, message, size, details, duration=0.0, cached=False):
+        _record_result(stats, report, file_path, ok, message, size)
+        if results:
+            results(VerificationResult.from_details(file_path, ok, message, details, duration, cached))
+    
+    def add(key, entry, file_hash):
+        if file_hash:
+            new_tree.add(key, file_hash)
+        if old_tree:
+            old_tree.add(key, entry['hash'])
+        if key in subtrees:
+            subtrees[key] = [file_hash, entry['hash']]
+    
+    with open(manifest_path, "rb") as f:
+        header = _read_manifest_header(f, manifest_path)
+        directories = header.get('directories')
+        if subtrees and directories is not None:
+            entries = _iter_manifest_subtrees(f, directories, prefixes)
+            for prefix, node in directories.items():
+                if prefix in subtrees:
+                    subtrees[prefix][1] = node[0]
+        else:
+            entries = (
+                entry for entry in _iter_manifest_entries(f)
+                if not subtrees or any(entry['path'] == p or entry['path'].startswith(p + "/") for p in prefixes)
+            )
+            if subtrees:
+                # Manifest v1: il digest registrato si ricalcola dagli hash delle voci lette
+                old_tree = _MerkleFold(on_directory(1))
+        found = (
+            item for item in _iter_manifest_scope(
+                root, prefixes or _manifest_roots(header, manifest_path), header.get('all_files', False)
+            )
+            if item[1] != manifest_path
+        )
+        
+        def items():
+            for key, entry in _merge_manifest(entries, found):
+                file_path = os.path.join(root, *key.split("/"))
+                if entry is None:
+                    yield (key, file_path, entry), ("hash", file_path, {"algorithm": None})
+                elif incremental and _stat_matches(file_path, entry):
+                    yield (key, file_path, entry), None
+                else:
+                    yield (key, file_path, entry), ("hash", file_path, {"algorithm": parse_digest(entry['hash'])[0]})
+        
+        for (key, file_path, entry), result in _run_tasks_ordered(items(), jobs, metrics):
+            if entry is None:
+                # Un file aggiunto cambia il digest dei rami che lo contengono
+                _, ok, _, size, data, duration = result
+                if ok:
+                    new_tree.add(key, data['hash'])
+                    if key in subtrees:
+                        subtrees[key] = [data['hash'], None]
+                changed.append(key)
+                record(file_path, False, UNLISTED_MESSAGE, size, dict.fromkeys(_RESULT_DETAILS), duration)
+                continue
+            
+            if result is None:
+                add(key, entry, entry['hash'])
+                stats["cached"] += 1
+                _Trace(metrics, "hash", file_path).finish((True,), cached=True)
+                record(file_path, True, _manifest_info(entry), entry['size'],
+                       _manifest_details(entry, entry['hash']), cached=True)
+                continue
+            
+            _, ok, message, size, data, duration = result
+            details = None
+            add(key, entry, data['hash'] if ok else None)
+            if ok:
+                ok = data['hash'] == entry['hash']
+                message = _manifest_info(entry)
+                details = _manifest_details(entry, data['hash'])
+            if not ok:
+                changed.append(key)
+            record(file_path, ok, message, size, details, duration)
+    
+    root_digest = new_tree.finish()
+    if old_tree:
+        old_tree.finish()
+    if subtrees:
+        stats["merkle_subtrees"] = {prefix: tuple(digests) for prefix, digests in subtrees.items() if any(digests)}
+    else:
+        stats["merkle_root"] = root_digest
+    stats["merkle_changed"] = changed
+    
+    stats["elapsed"] = time.perf_counter() - start
+    return stats
+
+def _manifest_info(entry):
+    return _format_signature_info(entry['id'], entry['hash'], entry['signed'])
+
+_RESULT_DETAILS = ('signature', 'stored_hash', 'recomputed_hash', 'timestamp')
+
+def _manifest_details(entry, recomputed_hash):
+    return {'signature': entry['id'], 'stored_hash': entry['hash'], 'recomputed_hash': recomputed_hash,
+            'timestamp': entry['signed']}
+
+def _stat_matches(file_path, entry):
+    try:
+        st = os.stat(file_path)
+    except OSError:
+        return False
+    return st.st_size == entry.get('size') and st.st_mtime_ns == entry.get('mtime_ns')
+
+# ══════════════════════════════════════════════════════════════════════════════
+# 🌳 ALBERO DI MERKLE DELLE CARTELLE
+# ══════════════════════════════════════════════════════════════════════════════
+
+def build_merkle_tree(entries):
+    """Costruisce l'albero di Merkle a partire da coppie (percorso relativo, hash).
+    
+    Restituisce {cartella: (digest, {nome: (tipo, digest)})}, con "" come radice
+    e tipo "F" per i file, "D" per le sottocartelle. Il digest di una cartella è
+    lo SHA256 dei figli ordinati per nome, quindi due alberi con la stessa radice
+    hanno lo stesso contenuto.
+    """
+    children = {"": {}}
+    for path, file_hash in entries:
+        parts = path.split("/")
+        for depth in range(1, len(parts)):
+            directory = "/".join(parts[:depth])
+            if directory not in children:
+                children[directory] = {}
+                children["/".join(parts[:depth - 1])][parts[depth - 1]] = ("D", None)
+        children["/".join(parts[:-1])][parts[-1]] = ("F", file_hash)
+    
+    tree = {}
+    for directory in sorted(children, key=lambda d: d.count("/") + bool(d), reverse=True):
+        resolved = {}
+        for name, (kind, digest) in children[directory].items():
+            if kind == "D":
+                digest = tree[f"{directory}/{name}" if directory else name][0]
+            resolved[name] = (kind, digest)
+        tree[directory] = (_directory_digest(resolved), resolved)
+    
+    return tree
+
+def _directory_digest(children):
+    listing = "".join(f"{kind} {digest} {name}\n" for name, (kind, digest) in sorted(children.items()))
+    return hashlib.sha256(listing.encode("utf-8")).hexdigest()
+
+class _MerkleFold:
+    """build_merkle_tree in streaming su coppie (percorso, hash) in ordine di percorso.
+    
+    Nell'ordinamento delle stringhe i file di una cartella sono contigui, quindi
+    ogni cartella viene chiusa una sola volta: in memoria restano solo le cartelle
+    aperte lungo il percorso corrente. on_directory(cartella, digest) viene
+    chiamato alla chiusura di ogni cartella; finish() restituisce la radice.
+    """
+    
+    def __init__(self, on_directory=None):
+        self.on_directory = on_directory
+        self.stack = [("", {})]
+    
+    def add(self, path, file_hash):
+        parts = path.split("/")
+        directory = "/".join(parts[:-1])
+        while self.stack[-1][0] and not (directory + "/").startswith(self.stack[-1][0] + "/"):
+            self._close()
+        
+        top = self.stack[-1][0]
+        for depth in range(len(top.split("/")) + 1 if top else 1, len(parts)):
+            self.stack.append(("/".join(parts[:depth]), {}))
+        self.stack[-1][1][parts[-1]] = ("F", file_hash)
+    
+    def _close(self):
+        directory, children = self.stack.pop()
+        digest = _directory_digest(children)
+        self.stack[-1][1][directory.rsplit("/", 1)[-1]] = ("D", digest)
+        if self.on_directory:
+            self.on_directory(directory, digest)
+    
+    def finish(self):
+        while len(self.stack) > 1:
+            self._close()
+        digest = _directory_digest(self.stack[0][1])
+        if self.on_directory:
+            self.on_directory("", digest)
+        return digest
+
+def merkle_digest(manifest_path, subtree=""):
+    """Digest di Merkle di una cartella registrata nel manifest ("" per la radice)"""
+    subtree = subtree.strip("/")
+    with open(manifest_path, "rb") as f:
+        header = _read_manifest_header(f, manifest_path)
+    if 'directories' in header:
+        node = header['directories'].get(subtree)
+        return node[0] if node else (None if subtree else header['merkle_root'])
+    
+    tree = build_merkle_tree((e['path'], e['hash']) for e in iter_manifest(manifest_path))
+    node = tree.get(subtree)
+    return node[0] if node else None
+
+# ══════════════════════════════════════════════════════════════════════════════
+# 👀 MODALITÀ WATCH (VERIFICA CONTINUA)
+# ══════════════════════════════════════════════════════════════════════════════
+
+WATCH_DEBOUNCE = 0.5
+WATCH_POLL_INTERVAL = 1.0
+
+def _is_target_name(name, all_files=False):
+    return all_files or os.path.splitext(name)[1].lower() in COMMENT_STYLES
+
+class _InotifyWatcher:
+    """Sorgente di eventi basata su inotify (solo Linux, via ctypes)"""
+    
+    IN_MODIFY = 0x002
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_FROM = 0x040
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_DELETE_SELF = 0x400
+    IN_Q_OVERFLOW = 0x4000
+    IN_ISDIR = 0x40000000
+    
+    MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+    
+    def __init__(self, paths, all_files=False):
+        import ctypes
+        import ctypes.util
+        
+        self.all_files = all_files
+        self.paths = paths
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 non disponibile")
+        
+        self._dirs = {}
+        self._files = set()
+        for path in paths:
+            if os.path.isfile(path):
+                self._files.add(os.path.abspath(path))
+                self._add_watch(os.path.dirname(os.path.abspath(path)), recursive=False)
+            else:
+                self._add_tree(os.path.abspath(path))
+    
+    def _add_watch(self, directory, recursive=True):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), self.MASK)
+        if wd >= 0:
+            self._dirs[wd] = (directory, recursive or self._dirs.get(wd, (None, False))[1])
+    
+    def _add_tree(self, directory):
+        for root, dirs, _ in os.walk(directory):
+            dirs[:] = [d for d in dirs if d not in IGNORED_DIRS]
+            self._add_watch(root)
+    
+    def wait(self, timeout):
+        """Attende fino a timeout secondi e restituisce i file modificati"""
+        import select
+        import struct
+        
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        
+        changed = set()
+        data = os.read(self.fd, 64 * 1024)
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = struct.unpack_from("iIII", data, offset)
+            name = os.fsdecode(data[offset + 16:offset + 16 + length].rstrip(b"\0"))
+            offset += 16 + length
+            
+            if mask & self.IN_Q_OVERFLOW:
+                changed.update(os.path.abspath(p) for p in iter_target_files(self.paths, self.all_files))
+                continue
+            
+            if wd not in self._dirs or not name:
+                continue
+            directory, recursive = self._dirs[wd]
+            path = os.path.join(directory, name)
+            
+            if not recursive:
+                if path in self._files:
+                    changed.add(path)
+            elif mask & self.IN_ISDIR:
+                if mask & (self.IN_CREATE | self.IN_MOVED_TO) and name not in IGNORED_DIRS:
+                    self._add_tree(path)
+                    changed.update(os.path.abspath(p) for p in iter_target_files([path], self.all_files))
+            elif path in self._files or _is_target_name(name, self.all_files):
+                changed.add(path)
+        
+        return changed
+    
+    def close(self):
+        os.close(self.fd)
+
+class _PollingWatcher:
+    """Sorgente di eventi di riserva: confronta periodicamente dimensione e mtime dei file"""
+    
+    def __init__(self, paths, all_files=False, interval=WATCH_POLL_INTERVAL):
+        self.paths = paths
+        self.all_files = all_files
+        self.interval = interval
+        self._snapshot = self._scan()
+    
+    def _scan(self):
+        snapshot = {}
+        for path in iter_target_files(self.paths, self.all_files):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            snapshot[os.path.abspath(path)] = (st.st_size, st.st_mtime_ns, st.st_ino)
+        return snapshot
+    
+    def wait(self, timeout):
+        time.sleep(max(0.0, min(timeout, self.interval)))
+        snapshot = self._scan()
+        changed = {p for p in snapshot.keys() | self._snapshot.keys() if snapshot.get(p) != self._snapshot.get(p)}
+        self._snapshot = snapshot
+        return changed
+    
+    def close(self):
+        pass
+
+def create_watcher(paths, all_files=False, polling=False):
+    """Usa inotify quando disponibile, altrimenti il polling"""
+    if not polling and sys.platform.startswith("linux"):
+        try:
+            return _InotifyWatcher(paths, all_files)
+        except (OSError, AttributeError):
+            pass
+    return _PollingWatcher(paths, all_files)
+
+def watch(paths, report, all_files=False, debounce=WATCH_DEBOUNCE, polling=False, stop_event=None, metrics=None):
+    """Riverifica ogni file firmato quando cambia, finché stop_event non viene impostato.
+    
+    Gli eventi dello stesso file vengono accorpati: la verifica parte solo dopo
+    debounce secondi senza nuove modifiche, così i salvataggi a raffiche degli
+    editor e i checkout di git producono una sola verifica per file.
+    """
+    watcher = create_watcher(paths, all_files, polling)
+    pending = {}
+    try:
+        while not (stop_event and stop_event.is_set()):
+            now = time.monotonic()
+            timeout = max(0.0, min(pending.values()) - now) if pending else WATCH_POLL_INTERVAL
+            
+            for path in watcher.wait(timeout):
+                pending[path] = time.monotonic() + debounce
+            
+            now = time.monotonic()
+            for path in sorted(p for p, deadline in pending.items() if deadline <= now):
+                del pending[path]
+                ok, message = verify_signature(path, metrics=metrics)
+                report(path, ok, message)
+    finally:
+        watcher.close()
+
+# ══════════════════════════════════════════════════════════════════════════════
+# ⚡ API ASINCRONA (ASYNCIO)
+# ══════════════════════════════════════════════════════════════════════════════
+
+ASYNC_CONCURRENCY = 4
+
+async def _run_blocking(func, file_path, executor=None, limiter=None, **kwargs):
+    """Esegue func nell'executor senza bloccare l'event loop, rispettando il limiter"""
+    import asyncio
+    import functools
+    
+    loop = asyncio.get_running_loop()
+    call = functools.partial(func, file_path, **kwargs)
+    if limiter is None:
+        return await loop.run_in_executor(executor, call)
+    async with limiter:
+        return await loop.run_in_executor(executor, call)
+
+async def async_sign(file_path, executor=None, limiter=None, streaming=None, metrics=None, algorithm=None):
+    """Versione asincrona di add_signature: restituisce (successo, messaggio).
+    
+    executor è un qualsiasi concurrent.futures.Executor (default: quello del loop),
+    limiter un asyncio.Semaphore condiviso per limitare le operazioni in corso.
+    """
+    return await _run_blocking(
+        add_signature, file_path, executor, limiter, streaming=streaming, metrics=metrics, algorithm=algorithm
+    )
+
+async def async_verify(file_path, executor=None, limiter=None, streaming=None, metrics=None):
+    """Versione asincrona di verify_signature: restituisce (valido, messaggio)"""
+    return await _run_blocking(verify_signature, file_path, executor, limiter, streaming=streaming, metrics=metrics)
+
+async def async_verify_many(paths, concurrency=ASYNC_CONCURRENCY, executor=None, streaming=None, metrics=None):
+    """Verifica più file in parallelo producendo (percorso, valido, messaggio) man mano che terminano.
+    
+    Al massimo concurrency verifiche sono in corso contemporaneamente e i percorsi
+    vengono letti dall'iterabile solo quando si libera un posto, quindi un file
+    enorme occupa un solo slot mentre gli altri proseguono. Chiudendo o cancellando
+    il generatore le verifiche in attesa vengono annullate; quelle già avviate in un
+    thread terminano in background e il loro risultato viene scartato.
+    """
+    import asyncio
+    
+    async def verify_one(path):
+        ok, message = await _run_blocking(verify_signature, path, executor, streaming=streaming, metrics=metrics)
+        return path, ok, message
+    
+    pending_paths = iter(paths)
+    running = set()
+    try:
+        while True:
+            for path in pending_paths:
+                running.add(asyncio.ensure_future(verify_one(path)))
+                if len(running) >= concurrency:
+                    break
+            if not running:
+                return
+            
+            done, running = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+    finally:
+        for task in running:
+            task.cancel()
+
+# ══════════════════════════════════════════════════════════════════════════════
+# 🌿 INTEGRAZIONE GIT (SOLO FILE MODIFICATI, HOOK PRE-COMMIT)
+# ══════════════════════════════════════════════════════════════════════════════
+
+GIT_HOOK_MARKER = "# filesigner: hook pre-commit"
+GIT_INLINE_FILES = 32  # sotto questa soglia niente pool di processi: l'avvio costa più del lavoro
+
+class GitError(RuntimeError):
+    """git non disponibile, cartella fuori da un repository o comando git fallito"""
+
+def _git(args, cwd=None):
+    import subprocess
+    
+    try:
+        result = subprocess.run(["git", *args], cwd=cwd, capture_output=True)
+    except FileNotFoundError:
+        raise GitError("git non trovato nel PATH") from None
+    if result.returncode != 0:
+        raise GitError(result.stderr.decode("utf-8", errors="replace").strip() or f"git {args[0]} non riuscito")
+    return result.stdout
+
+def _git_paths(output):
+    return [os.fsdecode(path) for path in output.split(b"\0") if path]
+
+def git_changed_files(base=None, staged=False, paths=(), cwd=None):
+    """File aggiunti, copiati, modificati o rinominati secondo git, come [(percorso, oid)].
+    
+    Con staged=True confronta l'indice con HEAD (i file in stage per il commit);
+    altrimenti confronta la copia di lavoro con base (default HEAD) e include i
+    file non tracciati non ignorati. oid è l'object ID del blob del contenuto
+    (None se git non lo conosce senza leggere il file); paths limita la ricerca.
+    I percorsi restituiti sono assoluti; i file cancellati vengono ignorati.
+    """
+    top = os.fsdecode(_git(["rev-parse", "--show-toplevel"], cwd).rstrip(b"\n"))
+    args = ["diff", "--raw", "-z", "--no-abbrev", "-M", "--diff-filter=ACMR"]
+    args += ["--cached"] if staged else [base or "HEAD"]
+    fields = _git([*args, "--", *paths], cwd).split(b"\0")
+    
+    changed = []
+    i = 0
+    while i < len(fields) - 1:
+        # ":<modo> <modo> <oid> <oid> <stato>" seguito da uno o due percorsi (rinomine e copie)
+        meta = fields[i][1:].split()
+        i += 2 if meta[4][:1] in (b"R", b"C") else 1
+        path = os.fsdecode(fields[i])
+        i += 1
+        if meta[1] not in (b"100644", b"100755"):
+            continue  # link simbolici e submodule
+        oid = meta[3].decode("ascii")
+        changed.append((os.path.join(top, path), None if not oid.strip("0") else oid))
+    
+    if not staged:
+        untracked = _git(["ls-files", "--others", "--exclude-standard", "--full-name", "-z", "--", *paths], cwd)
+        changed.extend((os.path.join(top, path), None) for path in _git_paths(untracked))
+    return changed
+
+def git_unstaged_files(file_paths, cwd=None):
+    """Sottoinsieme di file_paths con modifiche nella copia di lavoro non ancora in stage"""
+    if not file_paths:
+        return set()
+    top = os.fsdecode(_git(["rev-parse", "--show-toplevel"], cwd).rstrip(b"\n"))
+    output = _git(["diff", "--name-only", "-z", "--", *file_paths], cwd)
+    return {os.path.join(top, path) for path in _git_paths(output)}
+
+def run_git_batch(operation, base=None, staged=False, paths=(), jobs=None, all_files=False, report=None,
+                  cache=None, metrics=None, algorithm=None, results=None):
+    """Esegue sign o verify solo sui file cambiati secondo git (vedi git_changed_files).
+    
+    Con una VerificationCache i blob già verificati vengono risolti senza leggere
+    il file: verify restituisce l'esito memorizzato, sign salta i file con una
+    firma già valida. Le verifiche calcolate vengono memorizzate per oid.
+    
+    Con staged=True (modalità hook pre-commit) un file con modifiche non in stage
+    è un errore, perché si firmerebbe o verificherebbe un contenuto diverso da
+    quello del commit; i file firmati vengono riaggiunti all'indice. Con verify
+    results riceve un VerificationResult per file, come in run_batch.
+    """
+    if operation not in ("sign", "verify"):
+        raise ValueError(f"Operazione non disponibile con git: {operation}")
+    
+    stats = _new_stats()
+    start = time.perf_counter()
+    
+    entries = [
+        (file_path, oid) for file_path, oid in git_changed_files(base, staged, paths)
+        if all_files or os.path.splitext(file_path)[1].lower() in COMMENT_STYLES
+    ]
+    blocked = git_unstaged_files([file_path for file_path, _ in entries]) if staged else set()
+    if operation != "verify":
+        results = None
+    
+    oids = {}
+    for file_path, oid in entries:
+        if file_path in blocked:
+            message = "Modifiche non in stage: aggiungere il file con git add prima del commit"
+            _record_result(stats, report, file_path, False, message, 0)
+            if results:
+                results(VerificationResult.from_details(file_path, False, message))
+            continue
+        
+        known = cache.lookup_blob(oid) if cache else None
+        if known and (operation == "verify" or known[0]):
+            stats["cached"] += 1
+            if results:
+                results(VerificationResult.from_details(file_path, *known, cached=True))
+            if operation == "sign":
+                known = (True, f"Firma già valida, file non modificato\n{known[1]}")
+            _Trace(metrics, operation, file_path).finish(known, cached=True)
+            _record_result(stats, report, file_path, known[0], known[1], os.path.getsize(file_path))
+            continue
+        oids[file_path] = oid
+    
+    outcomes = {}
+    
+    def record(file_path, ok, message):
+        outcomes[file_path] = ok
+        if report:
+            report(file_path, ok, message)
+    
+    def collect(result):
+        if cache and oids[result.path] and result.status != "error":
+            details = {'signature': result.signature_id, 'stored_hash': result.stored_hash,
+                       'recomputed_hash': result.recomputed_hash, 'timestamp': result.timestamp}
+            cache.store_blob(oids[result.path], result.valid, result.message, details)
+        if results:
+            results(result)
+    
+    inline_jobs = 1 if len(oids) <= GIT_INLINE_FILES else jobs
+    batch = run_batch(operation, list(oids), inline_jobs, True, record, cache, metrics, algorithm, collect)
+    for key in ("files", "failed", "bytes", "cached"):
+        stats[key] += batch[key]
+    
+    signed = [file_path for file_path, ok in outcomes.items() if ok]
+    if staged and operation == "sign" and signed:
+        _git(["add", "--", *signed])
+    
+    stats["elapsed"] = time.perf_counter() - start
+    return stats
+
+def install_git_hook(operation="sign", algorithm=None, cwd=None):
+    """Installa un hook pre-commit che esegue operation sui soli file in stage.
+    
+    Restituisce il percorso dell'hook. Un hook pre-commit esistente che non è
+    stato scritto da questa funzione non viene sovrascritto.
+    """
+    import shlex
+    
+    hooks_dir = os.fsdecode(_git(["rev-parse", "--git-path", "hooks"], cwd).rstrip(b"\n"))
+    if cwd and not os.path.isabs(hooks_dir):
+        hooks_dir = os.path.join(cwd, hooks_dir)
+    hook_path = os.path.join(hooks_dir, "pre-commit")
+    
+    if os.path.exists(hook_path):
+        with open(hook_path, "r", encoding="utf-8", errors="replace") as f:
+            if GIT_HOOK_MARKER not in f.read():
+                raise GitError(f"Esiste già un hook pre-commit non gestito da filesigner: {hook_path}")
+    
+    # Import come modulo invece di eseguire il file: lo script principale non usa il .pyc e
+    # ricompilarlo a ogni commit costerebbe più di tutto il resto dell'hook
+    bootstrap = (f"import sys; sys.path.insert(0, {os.path.dirname(os.path.abspath(__file__))!r}); "
+                 f"from filesigner_core import main; sys.exit(main())")
+    command = [sys.executable, "-c", bootstrap, operation, "--staged", "-q"]
+    if algorithm and algorithm != DEFAULT_HASH_ALGORITHM:
+        command += ["--algorithm", algorithm]
+    
+    os.makedirs(hooks_dir, exist_ok=True)
+    with open(hook_path, "w", encoding="utf-8", newline="\n") as f:
+        f.write(f"#!/bin/sh\n{GIT_HOOK_MARKER}\nexec {shlex.join(command)}\n")
+    os.chmod(hook_path, 0o755)
+    return hook_path
+
+# ══════════════════════════════════════════════════════════════════════════════
+# 🛰️ DAEMON DI VERIFICA LOCALE
+# ══════════════════════════════════════════════════════════════════════════════
+
+DAEMON_OPERATIONS = ("verify", "extract")
+DAEMON_MAX_ENTRIES = 200_000
+DAEMON_PORT = 8765
+DAEMON_WORKERS = min(8, os.cpu_count() or 1)
+
+def default_socket_path():
+    """Socket del daemon: $FILESIGNER_SOCKET, poi $XDG_RUNTIME_DIR, poi la cartella della cache"""
+    if os.environ.get("FILESIGNER_SOCKET"):
+        return os.environ["FILESIGNER_SOCKET"]
+    if os.environ.get("XDG_RUNTIME_DIR"):
+        return os.path.join(os.environ["XDG_RUNTIME_DIR"], "filesigner.sock")
+    return os.path.join(os.path.dirname(default_cache_path()), "daemon.sock")
+
+class DaemonError(RuntimeError):
+    """Richiesta rifiutata dal daemon o daemon non raggiungibile"""
+
+class HotResultCache:
+    """Cache LRU in memoria dei risultati per (operazione, percorso), condivisa tra thread.
+    
+    Come VerificationCache la validità è legata a (device, inode, size, mtime_ns):
+    una voce viene restituita solo se la stat del file coincide ancora, e i file
+    modificati da meno di CACHE_RACY_WINDOW_NS non vengono memorizzati.
+    """
+    
+    def __init__(self, max_entries=DAEMON_MAX_ENTRIES):
+        from collections import OrderedDict
+        
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def lookup(self, operation, file_path):
+        """Restituisce (risultato oppure None, chiave_stat)"""
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return None, None
+        key = (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+        
+        with self.lock:
+            entry = self.entries.get((operation, file_path))
+            if entry is not None and entry[0] == key:
+                self.entries.move_to_end((operation, file_path))
+                self.hits += 1
+                return entry[1], key
+            self.misses += 1
+        return None, key
+    
+    def store(self, operation, file_path, key, result):
+        if key is None or key[3] > time.time_ns() - CACHE_RACY_WINDOW_NS:
+            return
+        with self.lock:
+            self.entries[(operation, file_path)] = (key, result)
+            self.entries.move_to_end((operation, file_path))
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+class VerificationDaemon:
+    """Daemon locale che risponde a richieste verify/extract con una cache calda.
+    
+    Il protocollo è JSON Lines sulla stessa connessione, riutilizzabile per più
+    richieste: {"id": 1, "op": "verify", "paths": [...]} produce una riga per file
+    ({"id", "path", "ok", "message", "size", "cached", "verification"}, dove size è
+    la dimensione del file in byte e verification è VerificationResult.as_dict(); con "extract" al posto di "message" ci sono
+    "signature", "hash" e "timestamp") appena il risultato è pronto, e
+    infine {"id", "done": true, "files", "hits", "elapsed"}. I risultati in cache
+    escono subito, gli altri nell'ordine in cui vengono completati dal pool.
+    {"op": "stats"} restituisce le statistiche della cache.
+    
+    In ascolto su un socket Unix (permessi 0600) oppure su 127.0.0.1:port.
+    """
+    
+    def __init__(self, socket_path=None, port=None, workers=DAEMON_WORKERS, max_entries=DAEMON_MAX_ENTRIES):
+        import socket
+        from concurrent.futures import ThreadPoolExecutor
+        
+        if port is None and not hasattr(socket, "AF_UNIX"):
+            port = DAEMON_PORT
+        self.port = port
+        self.socket_path = None if port is not None else (socket_path or default_socket_path())
+        self.cache = HotResultCache(max_entries)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="filesigner-daemon")
+        self.server = self._make_server()
+    
+    @property
+    def address(self):
+        return self.socket_path or f"127.0.0.1:{self.port}"
+    
+    def _make_server(self):
+        import socketserver
+        
+        daemon = self
+        
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                try:
+                    for line in self.rfile:
+                        if not line.strip():
+                            continue
+                        for response in daemon.handle(line):
+                            self.wfile.write(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # il client ha chiuso: i calcoli avviati finiscono comunque in cache
+        
+        if self.socket_path:
+            self._remove_stale_socket()
+            os.makedirs(os.path.dirname(os.path.abspath(self.socket_path)), exist_ok=True)
+            old_umask = os.umask(0o077)
+            try:
+                server = socketserver.ThreadingUnixStreamServer(self.socket_path, Handler)
+            finally:
+                os.umask(old_umask)
+        else:
+            class TCPServer(socketserver.ThreadingTCPServer):
+                allow_reuse_address = True  # riavvio immediato sulla stessa porta, solo per questo server
+            
+            server = TCPServer(("127.0.0.1", self.port), Handler)
+        server.daemon_threads = True
+        return server
+    
+    def _remove_stale_socket(self):
+        import socket
+        
+        if not os.path.exists(self.socket_path):
+            return
+        
+        probe = socket.socket(socket.AF_UNIX)
+        try:
+            probe.connect(self.socket_path)
+        except OSError:
+            os.unlink(self.socket_path)  # residuo di un daemon terminato male
+        else:
+            raise DaemonError(f"Un daemon è già in ascolto su {self.socket_path}")
+        finally:
+            probe.close()
+    
+    def handle(self, line):
+        """Risponde a una riga di richiesta producendo le righe di risposta"""
+        try:
+            request = json.loads(line)
+            request_id = request.get("id")
+            operation = request.get("op", "verify")
+            paths = request.get("paths", [])
+        except (ValueError, AttributeError):
+            yield {"id": None, "error": "Richiesta non valida: atteso un oggetto JSON per riga"}
+            return
+        
+        if operation == "stats":
+            yield {"id": request_id, "entries": len(self.cache.entries), "hits": self.cache.hits,
+                   "misses": self.cache.misses}
+            return
+        if operation not in DAEMON_OPERATIONS:
+            yield {"id": request_id, "error": f"Operazione non supportata: {operation}"}
+            return
+        if not isinstance(paths, list) or not all(isinstance(path, str) for path in paths):
+            yield {"id": request_id, "error": "'paths' deve essere una lista di percorsi"}
+            return
+        
+        from concurrent.futures import as_completed
+        
+        start = time.perf_counter()
+        hits = 0
+        pending = []
+        for path in paths:
+            path = os.path.abspath(path)
+            result, key = self.cache.lookup(operation, path)
+            if result is None:
+                pending.append(self.executor.submit(self._compute, operation, path, key))
+                continue
+            hits += 1
+            yield {"id": request_id, "path": path, **result, "size": key[2], "cached": True}
+        
+        for future in as_completed(pending):
+            yield {"id": request_id, **future.result(), "cached": False}
+        yield {"id": request_id, "done": True, "files": len(paths), "hits": hits,
+               "elapsed": time.perf_counter() - start}
+    
+    def _compute(self, operation, file_path, key):
+        if operation == "verify":
+            verification = verify_file(file_path)
+            result = {"ok": verification.valid, "message": verification.message,
+                      "verification": verification.as_dict()}
+        else:
+            try:
+                data = extract_signature_data(file_path, with_content=False)
+            except (OSError, UnicodeDecodeError) as e:
+                return {"path": file_path, "ok": False, "message": str(e)}
+            result = {
+                "ok": all(data[field] for field in ("signature", "hash", "timestamp")),
+                "signature": data["signature"],
+                "hash": data["hash"],
+                "timestamp": data["timestamp"],
+            }
+        self.cache.store(operation, file_path, key, result)
+        return {"path": file_path, **result, "size": key[2] if key else 0}
+    
+    def serve_forever(self):
+        self.server.serve_forever()
+    
+    def shutdown(self):
+        """Ferma il server (da un altro thread) e rimuove il socket"""
+        self.server.shutdown()
+        self.close()
+    
+    def close(self):
+        self.server.server_close()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        if self.socket_path and os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+class DaemonClient:
+    """Client del daemon: una connessione riutilizzata per tutte le richieste.
+    
+    request() restituisce i risultati man mano che arrivano (dict come quelli
+    descritti in VerificationDaemon) e termina con la riga finale del batch.
+    """
+    
+    def __init__(self, socket_path=None, port=None, timeout=None):
+        import socket
+        
+        if port is None and not hasattr(socket, "AF_UNIX"):
+            port = DAEMON_PORT
+        try:
+            if port is not None:
+                self.sock = socket.create_connection(("127.0.0.1", port), timeout=timeout)
+                self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            else:
+                self.sock = socket.socket(socket.AF_UNIX)
+                self.sock.settimeout(timeout)
+                self.sock.connect(socket_path or default_socket_path())
+        except OSError as e:
+            raise DaemonError(f"Daemon non raggiungibile: {e}") from None
+        self.reader = self.sock.makefile("rb")
+        self.next_id = 0
+    
+    def request(self, paths, operation="verify"):
+        self.next_id += 1
+        request = {"id": self.next_id, "op": operation, "paths": [os.path.abspath(path) for path in paths]}
+        self.sock.sendall(json.dumps(request, ensure_ascii=False).encode("utf-8") + b"\n")
+        
+        for line in self.reader:
+            response = json.loads(line)
+            if "error" in response:
+                raise DaemonError(response["error"])
+            yield response
+            if response.get("done") or operation == "stats":
+                return
+        raise DaemonError("Connessione chiusa dal daemon")
+    
+    def close(self):
+        self.reader.close()
+        self.sock.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+
+def run_daemon_batch(paths, all_files=False, report=None, socket_path=None, port=None, results=None):
+    """Verifica i file tramite il daemon; restituisce le stesse statistiche di run_batch"""
+    stats = _new_stats()
+    start = time.perf_counter()
+    with DaemonClient(socket_path, port) as client:
+        for response in client.request(list(iter_target_files(paths, all_files))):
+            if response.get("done"):
+                stats["cached"] = response["hits"]
+                break
+            _record_result(stats, report, response["path"], response["ok"], response["message"],
+                           response.get("size", 0))
+            if results:
+                verification = VerificationResult.from_dict(response["verification"])
+                verification.cached = response["cached"]
+                results(verification)
+    stats["elapsed"] = time.perf_counter() - start
+    return stats
+
+# ══════════════════════════════════════════════════════════════════════════════
+# 📦 VERIFICA DI ARCHIVI TAR E ZIP (SENZA ESTRAZIONE)
+# ══════════════════════════════════════════════════════════════════════════════
+
+ARCHIVE_EXTENSIONS = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+ARCHIVE_WINDOW = 8  # membri in volo per processo: tiene occupato il pool senza accodare tutto il tar
+ARCHIVE_WINDOW_BYTES = 64 * 1024 * 1024  # contenuti dei membri tar in volo, indipendente dal numero di processi
+
+_ZIP_HANDLES = {}
+
+def is_archive(path):
+    """Indica se path è un archivio tar o zip verificabile con verify_archive"""
+    return str(path).lower().endswith(ARCHIVE_EXTENSIONS) and os.path.isfile(path)
+
+def _member_path(archive_path, name):
+    """Percorso con cui un membro compare in report e risultati: archivio/percorso/interno"""
+    return os.path.join(archive_path, *name.split("/"))
+
+def _is_archive_target(name, all_files=False):
+    parts = name.split("/")
+    return not any(part in IGNORED_DIRS for part in parts[:-1]) and _is_target_name(parts[-1], all_files)
+
+def _open_zip(archive_path):
+    """ZipFile aperto una sola volta per processo (i worker verificano più membri dello stesso archivio).
+    
+    La chiave include il pid: un handle ereditato con fork condividerebbe la
+    posizione del file con il processo principale.
+    """
+    key = (os.getpid(), archive_path)
+    archive = _ZIP_HANDLES.get(key)
+    if archive is None:
+        import zipfile
+        
+        archive = _ZIP_HANDLES[key] = zipfile.ZipFile(archive_path)
+    return archive
+
+def _verify_member_stream(open_member, size, trace):
+    """Verifica un membro tramite open_member() -> file binario, come _verify_signature_data.
+    
+    I membri piccoli vengono letti in memoria, quelli oltre STREAM_THRESHOLD
+    normalizzati in streaming in una sola passata, cercando la firma negli ultimi
+    byte letti. Solo se la firma usa un algoritmo diverso da quello predefinito il
+    membro viene riaperto e riletto.
+    """
+    if size <= STREAM_THRESHOLD:
+        with trace.stage("read") as stage, open_member() as f:
+            content = f.read()
+            stage["bytes_read"] = len(content)
+        return _check_signature(_signature_data(_universal_newlines(content)), None, trace)
+    return _verify_streamed(open_member, size, trace)
+
+def _verify_member(archive_path, name, size, open_member, collect=False):
+    """Verifica un membro e restituisce una tupla come quelle di _batch_worker"""
+    events = [] if collect else None
+    file_path = _member_path(archive_path, name)
+    trace = _Trace(events.append if collect else None, "verify", file_path)
+    start = time.perf_counter()
+    try:
+        ok, message, data = _verify_member_stream(open_member, size, trace)
+    except Exception as e:
+        ok, message, data = False, f"Errore durante la verifica: {str(e)}", None
+    trace.finish((ok,))
+    return file_path, ok, message, size, _signature_details(data), time.perf_counter() - start, events
+
+def _archive_worker(task):
+    """Worker del pool: verifica un membro zip (aperto nel worker) oppure il contenuto già letto da un tar"""
+    archive_path, name, content, collect = task
+    if content is not None:
+        import io
+        
+        return _verify_member(archive_path, name, len(content), lambda: io.BytesIO(content), collect)
+    
+    archive = _open_zip(archive_path)
+    return _verify_member(archive_path, name, archive.getinfo(name).file_size, lambda: archive.open(name), collect)
+
+def _iter_zip_tasks(archive_path, all_files, collect):
+    infos = [
+        info for info in _open_zip(archive_path).infolist()
+        if not info.is_dir() and _is_archive_target(info.filename, all_files)
+    ]
+    infos.sort(key=lambda info: info.header_offset)  # ordine fisico: letture sequenziali nell'archivio
+    for info in infos:
+        yield (archive_path, info.filename, None, collect), None
+
+def _iter_tar_tasks(archive, archive_path, all_files, collect):
+    """Legge il tar in una sola passata; i membri grandi vengono verificati qui in streaming"""
+    for member in archive:
+        if not member.isfile() or not _is_archive_target(member.name, all_files):
+            continue
+        if member.size > STREAM_THRESHOLD:
+            yield None, _verify_member(
+                archive_path, member.name, member.size, lambda: archive.extractfile(member), collect
+            )
+            continue
+        
+        with archive.extractfile(member) as f:
+            content = f.read()
+        yield (archive_path, member.name, content, collect), None
+
+def verify_archive(archive_path, jobs=None, all_files=False, report=None, metrics=None, results=None):
+    """Verifica i file firmati contenuti in un archivio tar o zip senza estrarli su disco.
+    
+    Gli zip permettono l'accesso diretto: ogni processo del pool apre l'archivio
+    e verifica membri diversi. I tar (anche compressi) vengono letti una sola
+    volta in sequenza e i contenuti passati al pool: in volo restano al massimo
+    ARCHIVE_WINDOW membri per processo e ARCHIVE_WINDOW_BYTES byte in totale, così
+    la memoria non cresce con il numero di core. I percorsi nei risultati sono archivio/membro;
+    restituisce le stesse statistiche di run_batch.
+    """
+    stats = _new_stats()
+    start = time.perf_counter()
+    jobs = max(1, jobs or os.cpu_count() or 1)
+    collect = metrics is not None
+    
+    def record(item):
+        file_path, ok, message, size, details, duration, events = item
+        for event in events or ():
+            metrics(event)
+        _record_result(stats, report, file_path, ok, message, size)
+        if results:
+            results(VerificationResult.from_details(file_path, ok, message, details, duration))
+    
+    from collections import deque
+    
+    archive = None
+    executor = None
+    pending = deque()
+    in_flight = 0
+    try:
+        if archive_path.lower().endswith(".zip"):
+            tasks = _iter_zip_tasks(archive_path, all_files, collect)
+        else:
+            import tarfile
+            
+            archive = tarfile.open(archive_path, "r:*")
+            tasks = _iter_tar_tasks(archive, archive_path, all_files, collect)
+        
+        if jobs > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            
+            executor = ProcessPoolExecutor(max_workers=jobs)
+        for task, done in tasks:
+            if done is not None:
+                record(done)
+            elif executor is None:
+                record(_archive_worker(task))
+            else:
+                size = len(task[2]) if task[2] is not None else 0
+                pending.append((executor.submit(_archive_worker, task), size))
+                in_flight += size
+                while len(pending) > 1 and (len(pending) > jobs * ARCHIVE_WINDOW or in_flight > ARCHIVE_WINDOW_BYTES):
+                    future, size = pending.popleft()
+                    in_flight -= size
+                    record(future.result())
+        while pending:
+            record(pending.popleft()[0].result())
+    except Exception as e:  # archivio illeggibile o troncato: tarfile.ReadError, zipfile.BadZipFile, EOFError...
+        record((archive_path, False, f"Archivio non leggibile: {str(e)}", 0, None, 0.0, None))
+    finally:
+        if executor:
+            executor.shutdown()
+        if archive:
+            archive.close()
+        zip_handle = _ZIP_HANDLES.pop((os.getpid(), archive_path), None)
+        if zip_handle:
+            zip_handle.close()
+    
+    stats["elapsed"] = time.perf_counter() - start
+    return stats
+
+# ══════════════════════════════════════════════════════════════════════════════
+# 🧩 VERIFICA DISTRIBUITA A SHARD
+# ══════════════════════════════════════════════════════════════════════════════
+
+SHARD_FORMAT = "filesigner-shard"
+SHARD_VERSION = 1
+
+def plan_shards(paths, shards, all_files=False):
+    """Divide i file in shards gruppi bilanciati per byte totali, non per numero di file.
+    
+    Assegnazione greedy: dal file più grande al più piccolo, ognuno va allo shard
+    con meno byte. Il piano dipende solo da percorsi e dimensioni, quindi ogni nodo
+    lo ricalcola da solo senza coordinarsi; l'ID del piano (hash dell'elenco)
+    permette al merge di riconoscere shard calcolati su alberi diversi.
+    Restituisce (id_piano, [[percorsi dello shard 1], ...]).
+    """
+    return _plan_shards(paths, shards, all_files)[:2]
+
+def _plan_shards(paths, shards, all_files=False):
+    """plan_shards più le dimensioni usate per bilanciare ({percorso: byte})"""
+    import heapq
+    
+    if shards < 1:
+        raise ValueError("Il numero di shard deve essere almeno 1")
+    
+    files = []
+    for file_path in iter_target_files(paths, all_files):
+        try:
+            files.append((file_path, os.path.getsize(file_path)))
+        except OSError:
+            files.append((file_path, 0))
+    
+    digest = hashlib.sha256()
+    for file_path, size in sorted(files):
+        digest.update(f"{file_path}\0{size}\n".encode("utf-8", "surrogateescape"))
+    
+    plan = [[] for _ in range(shards)]
+    loads = [(0, index) for index in range(shards)]
+    for file_path, size in sorted(files, key=lambda item: (-item[1], item[0])):
+        load, index = heapq.heappop(loads)
+        plan[index].append(file_path)
+        heapq.heappush(loads, (load + size, index))
+    return digest.hexdigest()[:16], [sorted(shard) for shard in plan], dict(files)
+
+def run_shard(paths, shard, shards, report_path, jobs=None, all_files=False, report=None, cache=None, metrics=None):
+    """Verifica solo lo shard numero shard (da 1 a shards) del piano di plan_shards.
+    
+    I risultati vanno in un report JSON Lines la cui prima riga identifica piano,
+    shard e numero di file attesi, così merge_shard_reports può riconoscere shard
+    mancanti o interrotti; ogni risultato porta la dimensione del file, per il
+    throughput del merge. Restituisce le statistiche di run_batch.
+    """
+    if not 1 <= shard <= shards:
+        raise ValueError(f"Shard {shard} fuori intervallo (1-{shards})")
+    
+    plan_id, plan, sizes = _plan_shards(paths, shards, all_files)
+    header = {'format': SHARD_FORMAT, 'version': SHARD_VERSION, 'plan': plan_id, 'shard': shard,
+              'shards': shards, 'files': len(plan[shard - 1])}
+    with JsonLinesReport(open(report_path, "w", encoding="utf-8"), True, header, sizes) as results:
+        stats = _run_paths("verify", plan[shard - 1], jobs, True, report, cache, metrics, None, results)
+    stats["plan"] = plan_id
+    return stats
+
+def _read_shard_header(report_path):
+    """Intestazione del report di uno shard e numero di risultati leggibili che contiene"""
+    with open(report_path, "r", encoding="utf-8") as f:
+        try:
+            header = json.loads(f.readline() or "{}")
+        except ValueError:
+            header = {}
+        if header.get('format') != SHARD_FORMAT or header.get('version') != SHARD_VERSION:
+            raise ValueError(f"{report_path} non è un report di shard {SHARD_FORMAT} v{SHARD_VERSION}")
+        return header, sum(1 for _ in _iter_shard_results(f))
+
+def _iter_shard_results(lines):
+    for line in lines:
+        try:
+            yield json.loads(line)
+        except ValueError:
+            continue  # riga troncata: lo shard è stato interrotto durante la scrittura
+
+def merge_shard_reports(report_paths, report=None, results=None):
+    """Unisce i report degli shard in un unico flusso di VerificationResult verso results.
+    
+    Tutti i report devono venire dallo stesso piano; un report è completo se
+    contiene tanti risultati quanti dichiarati nell'intestazione (uno shard
+    rieseguito può comparire più volte: vale la prima copia completa). In
+    stats["missing_shards"] finiscono gli shard senza un report completo.
+    I report vengono letti una riga alla volta.
+    """
+    stats = _new_stats()
+    start = time.perf_counter()
+    
+    plan = shards = None
+    complete = {}
+    for report_path in report_paths:
+        header, count = _read_shard_header(report_path)
+        if plan is None:
+            plan, shards = header['plan'], header['shards']
+        elif (header['plan'], header['shards']) != (plan, shards):
+            raise ValueError(
+                f"{report_path} appartiene a un altro piano ({header['plan']}, {header['shards']} shard) "
+                f"invece di {plan} ({shards} shard)"
+            )
+        if count >= header['files']:
+            complete.setdefault(header['shard'], report_path)
+    
+    for shard in sorted(complete):
+        with open(complete[shard], "r", encoding="utf-8") as f:
+            f.readline()
+            for data in _iter_shard_results(f):
+                result = VerificationResult.from_dict(data)
+                stats["cached"] += bool(result.cached)
+                _record_result(stats, report, result.path, result.valid, result.message, data.get('size', 0))
+                if results:
+                    results(result)
+    
+    stats["plan"] = plan
+    stats["missing_shards"] = [shard for shard in range(1, (shards or 0) + 1) if shard not in complete]
+    stats["elapsed"] = time.perf_counter() - start
+    return stats
+
+# ══════════════════════════════════════════════════════════════════════════════
+# 🧬 DEDUPLICA PER CONTENUTO (FILE IDENTICI ELABORATI UNA VOLTA)
+# ══════════════════════════════════════════════════════════════════════════════
+
+DEDUP_PROBE_SIZE = 4096
+DEDUP_OPERATIONS = ("verify", "hash")
+CONTENT_KEY_PREFIX = "content:"  # chiavi della blob_cache per digest del contenuto (gli oid git sono hex puri)
+
+def _content_fingerprint(file_path, size):
+    """Impronta economica: blake2b dei primi e degli ultimi DEDUP_PROBE_SIZE byte.
+    
+    Restituisce (impronta, completa): se il file è abbastanza piccolo da essere
+    letto per intero l'impronta copre tutto il contenuto e ne è già il digest.
+    """
+    with open(file_path, "rb") as f:
+        if size <= 2 * DEDUP_PROBE_SIZE:
+            return hashlib.blake2b(f.read(), digest_size=32).hexdigest(), True
+        head = f.read(DEDUP_PROBE_SIZE)
+        f.seek(-DEDUP_PROBE_SIZE, os.SEEK_END)
+        return hashlib.blake2b(head + f.read(), digest_size=32).hexdigest(), False
+
+def _content_digest(file_path):
+    hasher = hashlib.blake2b(digest_size=32)
+    with open(file_path, "rb") as f:
+        while True:
+            block = f.read(STREAM_CHUNK_SIZE)
+            if not block:
+                break
+            hasher.update(block)
+    return hasher.hexdigest()
+
+def find_duplicate_files(sized_paths):
+    """Raggruppa i file con contenuto identico byte per byte; sized_paths è un iterabile di (percorso, dimensione).
+    
+    I candidati vengono ristretti per dimensione (solo stat) e poi per impronta
+    di inizio e fine file; solo i file che coincidono ancora vengono letti per
+    intero e confrontati con un digest blake2b del contenuto grezzo, molto più
+    economico di normalizzazione e hash della firma. Restituisce {digest: [percorsi]}
+    con i soli gruppi di almeno due file, nell'ordine ricevuto.
+    """
+    by_size = {}
+    for file_path, size in sized_paths:
+        by_size.setdefault(size, []).append(file_path)
+    
+    groups = {}
+    for size, paths in by_size.items():
+        if len(paths) < 2:
+            continue
+        
+        by_fingerprint = {}
+        for file_path in paths:
+            try:
+                by_fingerprint.setdefault(_content_fingerprint(file_path, size), []).append(file_path)
+            except OSError:
+                continue
+        
+        for (fingerprint, complete), candidates in by_fingerprint.items():
+            if len(candidates) < 2:
+                continue
+            if complete:
+                groups[fingerprint] = candidates
+                continue
+            for file_path in candidates:
+                try:
+                    groups.setdefault(_content_digest(file_path), []).append(file_path)
+                except OSError:
+                    continue
+    return {digest: paths for digest, paths in groups.items() if len(paths) > 1}
+
+# ══════════════════════════════════════════════════════════════════════════════
+# 🔖 JOURNAL DI CHECKPOINT (RIPRESA DI JOB INTERROTTI)
+# ══════════════════════════════════════════════════════════════════════════════
+
+JOURNAL_FORMAT = "filesigner-journal"
+JOURNAL_VERSION = 1
+JOURNAL_SYNC_INTERVAL = 1.0
+JOURNAL_BATCH_SIZE = 1024
+
+class CheckpointJournal:
+    """Journal append-only dei file completati da un batch, per riprendere un job interrotto.
+    
+    Ogni riga JSON registra percorso, esito, messaggio, dimensione e mtime del file
+    dopo l'operazione (per verify anche i dati di firma). Le righe vengono scritte
+    insieme con un solo fsync ogni JOURNAL_SYNC_INTERVAL secondi o JOURNAL_BATCH_SIZE
+    file: un'interruzione fa perdere al più l'ultimo gruppo, che viene rifatto.
+    
+    Riaprendo lo stesso journal, lookup() restituisce l'esito registrato per i file
+    la cui stat non è cambiata; in memoria restano solo dimensione, mtime e
+    posizione della riga di ogni percorso. Una riga finale troncata viene scartata.
+    """
+    
+    def __init__(self, path, operation, algorithm=None, sync_interval=JOURNAL_SYNC_INTERVAL,
+                 batch_size=JOURNAL_BATCH_SIZE):
+        self.path = path
+        self.sync_interval = sync_interval
+        self.batch_size = batch_size
+        self.entries = {}
+        self.pending = []
+        self.reader = None
+        
+        header = {'format': JOURNAL_FORMAT, 'version': JOURNAL_VERSION, 'operation': operation,
+                  'algorithm': algorithm}
+        if os.path.exists(path) and os.path.getsize(path):
+            self._load(header)
+        self.file = open(path, "ab")
+        if self.file.tell() == 0:
+            self.pending.append(json.dumps(header).encode("utf-8") + b"\n")
+            self.sync()
+        self.last_sync = time.monotonic()
+    
+    def _load(self, header):
+        with open(self.path, "rb") as f:
+            try:
+                found = json.loads(f.readline())
+            except ValueError:
+                found = None
+            if found != header:
+                raise ValueError(
+                    f"{self.path} non è un journal di {header['operation']}"
+                    f"{' con ' + header['algorithm'] if header['algorithm'] else ''}: usarne un altro o rimuoverlo"
+                )
+            
+            offset = end = f.tell()
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                self.entries[entry['path']] = (entry['size'], entry['mtime_ns'], offset)
+                offset += len(line)
+                end = offset
+        
+        if end < os.path.getsize(self.path):
+            with open(self.path, "r+b") as f:
+                f.truncate(end)  # coda scritta a metà da un'interruzione
+    
+    def lookup(self, file_path):
+        """Restituisce (ok, messaggio, dati, dimensione) se il file non è cambiato dalla registrazione, altrimenti None"""
+        entry = self.entries.get(os.path.abspath(file_path))
+        if entry is None:
+            return None
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return None
+        if (st.st_size, st.st_mtime_ns) != entry[:2]:
+            return None
+        
+        if self.reader is None:
+            self.reader = open(self.path, "rb")
+        self.reader.seek(entry[2])
+        data = json.loads(self.reader.readline())
+        return data['ok'], data['message'], data.get('details'), st.st_size
+    
+    def record(self, file_path, ok, message, details=None):
+        """Accoda l'esito di un file completato con la sua stat attuale"""
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return
+        
+        entry = {'path': os.path.abspath(file_path), 'ok': ok, 'message': message, 'size': st.st_size,
+                 'mtime_ns': st.st_mtime_ns}
+        if details is not None:
+            entry['details'] = details
+        self.pending.append(json.dumps(entry, ensure_ascii=False).encode("utf-8") + b"\n")
+        if len(self.pending) >= self.batch_size or time.monotonic() - self.last_sync >= self.sync_interval:
+            self.sync()
+    
+    def sync(self):
+        """Scrive le righe in attesa con un solo write e un solo fsync"""
+        if not self.pending:
+            return
+        self.file.write(b"".join(self.pending))
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.pending = []
+        self.last_sync = time.monotonic()
+    
+    def close(self, completed=False):
+        """Salva le righe in attesa; con completed=True il job è finito e il journal viene rimosso"""
+        if self.file.closed:
+            return
+        self.sync()
+        self.file.close()
+        if self.reader:
+            self.reader.close()
+        if completed:
+            os.remove(self.path)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+
+# ══════════════════════════════════════════════════════════════════════════════
+# ⚙️ MODALITÀ BATCH DA RIGA DI COMANDO
+# ══════════════════════════════════════════════════════════════════════════════
+
+BATCH_OPERATIONS = {
+    "sign": add_signature,
+    "verify": verify_signature,
+    "strip": strip_signature,
+    "info": signature_info,
+    "hash": hash_file,
+}
+
+IGNORED_DIRS = {".git", ".hg", ".svn", "__pycache__", "node_modules", ".venv", "venv"}
+
+def iter_target_files(paths, all_files=False):
+    """Espande file e cartelle nell'elenco ordinato dei file da elaborare"""
+    for path in paths:
+        if os.path.isfile(path):
+            yield path
+            continue
+        
+        for root, dirs, files in os.walk(path):
+            dirs[:] = sorted(d for d in dirs if d not in IGNORED_DIRS)
+            for name in sorted(files):
+                if all_files or os.path.splitext(name)[1].lower() in COMMENT_STYLES:
+                    yield os.path.join(root, name)
+
+def _batch_worker(task):
+    """Esegue una singola operazione batch in un processo del pool.
+    
+    Se richiesto, gli eventi di strumentazione vengono raccolti in una lista e
+    restituiti al processo principale insieme al risultato. Per verify i dati
+    sono i soli campi di firma (_signature_details), non il contenuto del file.
+    """
+    operation, file_path, options, collect = task
+    events = [] if collect else None
+    metrics = events.append if collect else None
+    start = time.perf_counter()
+    try:
+        size = os.path.getsize(file_path)
+    except OSError:
+        size = 0
+    
+    if operation == "verify":
+        ok, message, data = _verify_signature_data(file_path, metrics=metrics, **options)
+        data = _signature_details(data)
+    elif operation == "hash":
+        ok, message, data = _hash_file_data(file_path, metrics=metrics, **options)
+    else:
+        ok, message = BATCH_OPERATIONS[operation](file_path, metrics=metrics, **options)
+        data = None
+    return file_path, ok, message, size, data, time.perf_counter() - start, events
+
+def run_batch(operation, paths, jobs=None, all_files=False, report=None, cache=None, metrics=None, algorithm=None,
+              results=None, dedup=False, journal=None):
+    """Elabora in parallelo tutti i file e restituisce le statistiche aggregate.
+    
+    Con una VerificationCache le verifiche di file invariati vengono risolte
+    nel processo principale con una sola stat, senza inviarle al pool.
+    algorithm vale per sign e hash; verify usa quello registrato in ogni firma.
+    Con verify, results (per esempio un JsonLinesReport) riceve un
+    VerificationResult per file man mano che i file vengono completati.
+    
+    Con dedup=True (verify e hash) i file identici byte per byte vengono
+    elaborati una volta sola (vedi find_duplicate_files) e l'esito viene esteso
+    ai duplicati; con una cache l'esito resta memorizzato per digest del
+    contenuto e vale anche nelle esecuzioni successive.
+    
+    Con un CheckpointJournal i file già completati da un'esecuzione interrotta
+    e non più modificati vengono saltati riportando l'esito registrato; gli
+    esiti calcolati in questa esecuzione vengono accodati al journal.
+    """
+    options = {"algorithm": algorithm} if operation in ("sign", "hash") else {}
+    stats = _new_stats()
+    start = time.perf_counter()
+    
+    use_cache = cache is not None and operation == "verify"
+    if operation != "verify":
+        results = None
+    
+    def record(file_path, ok, message, size, data=None, duration=0.0, cached=False, journaled=True):
+        if use_cache and data is not None and not cached:
+            cache.store(file_path, keys[file_path], ok, message, data)
+        if journal and journaled and (ok or data is not None):
+            # I fallimenti senza esito (file sparito, permessi) vengono ritentati alla ripresa
+            journal.record(file_path, ok, message, data if operation == "verify" else None)
+        _record_result(stats, report, file_path, ok, message, size)
+        if results:
+            results(VerificationResult.from_details(file_path, ok, message, data, duration, cached))
+    
+    tasks = []
+    keys = {}
+    for file_path in iter_target_files(paths, all_files):
+        if journal:
+            done = journal.lookup(file_path)
+            if done:
+                stats["resumed"] += 1
+                record(file_path, done[0], done[1], done[3], done[2], cached=True, journaled=False)
+                continue
+        if use_cache:
+            lookup_start = time.perf_counter()
+            cached, key = cache.lookup(file_path)
+            if cached:
+                stats["cached"] += 1
+                _Trace(metrics, "verify", file_path).finish(cached, cached=True)
+                record(file_path, *cached[:2], key[2], cached[2], time.perf_counter() - lookup_start, cached=True,
+                       journaled=False)
+                continue
+            keys[file_path] = key
+        tasks.append((operation, file_path, options))
+    
+    duplicates = {}
+    if dedup and operation in DEDUP_OPERATIONS and len(tasks) > 1:
+        tasks, duplicates = _dedup_tasks(tasks, keys, cache if use_cache else None, stats, metrics, record)
+    
+    retry = []
+    for file_path, ok, message, size, data, duration in _run_tasks(tasks, jobs, metrics):
+        record(file_path, ok, message, size, data, duration)
+        digest, others = duplicates.get(file_path, (None, ()))
+        if data is None:
+            retry.extend(others)  # errore legato al percorso (file sparito, permessi): i duplicati vanno elaborati
+            continue
+        if use_cache and others:
+            cache.store_blob(CONTENT_KEY_PREFIX + digest, ok, message, data)
+        for other in others:
+            stats["deduped"] += 1
+            _Trace(metrics, operation, other).finish((ok,), deduped=True)
+            if use_cache:
+                cache.store(other, keys[other], ok, message, data)
+            record(other, ok, message, size, data, cached=True)
+    
+    for file_path, ok, message, size, data, duration in _run_tasks(
+            [(operation, file_path, options) for file_path in retry], jobs, metrics):
+        record(file_path, ok, message, size, data, duration)
+    
+    stats["elapsed"] = time.perf_counter() - start
+    return stats
+
+def _dedup_tasks(tasks, keys, cache, stats, metrics, record):
+    """Riduce i task a un rappresentante per gruppo di file identici.
+    
+    Restituisce (task, {rappresentante: (digest, [duplicati])}); i gruppi già
+    noti alla cache per digest del contenuto vengono registrati subito.
+    """
+    sized = []
+    for _, file_path, _ in tasks:
+        key = keys.get(file_path)
+        try:
+            sized.append((file_path, key[2] if key else os.path.getsize(file_path)))
+        except OSError:
+            continue
+    
+    sizes = dict(sized)
+    skipped = set()
+    duplicates = {}
+    for digest, group in find_duplicate_files(sized).items():
+        known = cache.lookup_blob(CONTENT_KEY_PREFIX + digest) if cache else None
+        if known is None:
+            duplicates[group[0]] = (digest, group[1:])
+            skipped.update(group[1:])
+            continue
+        
+        for file_path in group:
+            stats["cached"] += 1
+            _Trace(metrics, "verify", file_path).finish(known, cached=True)
+            cache.store(file_path, keys[file_path], *known)
+            record(file_path, known[0], known[1], sizes[file_path], known[2], cached=True)
+        skipped.update(group)
+    return [task for task in tasks if task[1] not in skipped], duplicates
+
+def _run_paths(operation, paths, jobs=None, all_files=False, report=None, cache=None, metrics=None, algorithm=None,
+               results=None, dedup=False, journal=None):
+    """run_batch sui percorsi indicati; con verify gli archivi tar e zip passano da verify_archive"""
+    archives = [path for path in paths if operation == "verify" and is_archive(path)]
+    stats = run_batch(
+        operation, [path for path in paths if path not in archives], jobs, all_files, report, cache, metrics,
+        algorithm, results, dedup, journal
+    )
+    for archive_path in archives:
+        batch = verify_archive(archive_path, jobs, all_files, report, metrics, results)
+        for key in ("files", "failed", "bytes", "elapsed"):
+            stats[key] += batch[key]
+    return stats
+
+def _run_tasks(tasks, jobs=None, metrics=None):
+    """Esegue i task (operazione, percorso, opzioni) nel pool restituendo i risultati in ordine.
+    
+    Le opzioni sono argomenti aggiuntivi per la funzione dell'operazione; gli eventi
+    raccolti dai worker vengono inoltrati a metrics nel processo principale.
+    """
+    tasks = [(operation, file_path, options, metrics is not None) for operation, file_path, options in tasks]
+    for *result, events in _map_tasks(tasks, jobs):
+        for event in events or ():
+            metrics(event)
+        yield tuple(result)
+
+ORDERED_WINDOW = 64  # task in volo per processo in _run_tasks_ordered
+
+def _run_tasks_ordered(items, jobs=None, metrics=None):
+    """Come _run_tasks su un iteratore di (dato, task), senza materializzarlo.
+    
+    I task (operazione, percorso, opzioni) vanno al pool con al più ORDERED_WINDOW
+    task in volo per processo; le coppie escono nell'ordine di ingresso come
+    (dato, risultato), con risultato None per i dati senza task.
+    """
+    collect = metrics is not None
+    jobs = max(1, jobs or os.cpu_count() or 1)
+    
+    def finish(result):
+        *result, events = result
+        for event in events or ():
+            metrics(event)
+        return tuple(result)
+    
+    if jobs == 1:
+        for data, task in items:
+            yield data, finish(_batch_worker((*task, collect))) if task else None
+        return
+    
+    from collections import deque
+    from concurrent.futures import ProcessPoolExecutor
+    
+    executor = None
+    pending = deque()
+    try:
+        for data, task in items:
+            if task is not None:
+                if executor is None:
+                    executor = ProcessPoolExecutor(max_workers=jobs)
+                task = executor.submit(_batch_worker, (*task, collect))
+            pending.append((data, task))
+            while pending and (pending[0][1] is None or pending[0][1].done() or len(pending) > jobs * ORDERED_WINDOW):
+                data, future = pending.popleft()
+                yield data, finish(future.result()) if future else None
+        while pending:
+            data, future = pending.popleft()
+            yield data, finish(future.result()) if future else None
+    finally:
+        if executor:
+            executor.shutdown()
+
+def _map_tasks(tasks, jobs):
+    jobs = max(1, jobs or os.cpu_count() or 1)
+    if jobs == 1 or len(tasks) <= 1:
+        yield from map(_batch_worker, tasks)
+        return
+    
+    from concurrent.futures import ProcessPoolExecutor
+    chunksize = max(1, min(64, len(tasks) // (jobs * 8)))
+    with ProcessPoolExecutor(max_workers=min(jobs, len(tasks))) as executor:
+        yield from executor.map(_batch_worker, tasks, chunksize=chunksize)
+
+def _new_stats():
+    return {"files": 0, "failed": 0, "bytes": 0, "cached": 0, "deduped": 0, "resumed": 0, "elapsed": 0.0}
+
+def _record_result(stats, report, file_path, ok, message, size):
+    stats["files"] += 1
+    stats["bytes"] += size
+    if not ok:
+        stats["failed"] += 1
+    if report:
+        report(file_path, ok, message)
+
+def format_batch_stats(stats):
+    """Formatta il riepilogo di throughput del batch"""
+    elapsed = max(stats["elapsed"], 1e-9)
+    files_per_s = stats["files"] / elapsed
+    mb_per_s = stats["bytes"] / (1024 * 1024) / elapsed
+    ok = stats["files"] - stats["failed"]
+    cached = f", {stats['cached']} dalla cache" if stats.get("cached") else ""
+    if stats.get("deduped"):
+        cached += f", {stats['deduped']} duplicati"
+    if stats.get("resumed"):
+        cached += f", {stats['resumed']} ripresi dal journal"
+    return (f"{stats['files']} file, {ok} ok, {stats['failed']} errori{cached} in {stats['elapsed']:.2f}s "
+            f"({files_per_s:.1f} file/s, {mb_per_s:.2f} MB/s)")
+
+def _close_metrics(metrics, prom_path):
+    if metrics is None:
+        return
+    metrics.close()
+    if prom_path:
+        metrics.write_prometheus(prom_path)
+
+def main(argv=None):
+    """Punto di ingresso della riga di comando: sign / verify / strip / info / hash / watch / serve / merge"""
+    import argparse
+    
+    def shard_spec(value):
+        try:
+            shard, shards = (int(part) for part in value.split("/"))
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"atteso I/N, per esempio 2/4: {value}") from None
+        if not 1 <= shard <= shards:
+            raise argparse.ArgumentTypeError(f"shard fuori intervallo: {value}")
+        return shard, shards
+    
+    parser = argparse.ArgumentParser(
+        prog="filesigner_core.py",
+        description=f"{SoftwareProtection.PRODUCT_NAME} - firma, verifica, ispezione e rimozione firme in batch"
+    )
+    parser.add_argument("operation", choices=sorted([*BATCH_OPERATIONS, "watch", "serve", "merge"]),
+                        help="operazione da eseguire (serve avvia il daemon di verifica, "
+                             "merge unisce i report degli shard)")
+    parser.add_argument("paths", nargs="*", help="file o cartelle da elaborare")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="processi paralleli (default: numero di core)")
+    parser.add_argument("--all-files", action="store_true",
+                        help="includi anche i file con estensione non riconosciuta")
+    parser.add_argument("-q", "--quiet", action="store_true",
+                        help="mostra solo gli errori e il riepilogo")
+    parser.add_argument("--cache-file", default=None,
+                        help=f"cache delle verifiche (default: {default_cache_path()})")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="non usare la cache delle verifiche")
+    parser.add_argument("--rehash", action="store_true",
+                        help="ricalcola tutti gli hash aggiornando la cache")
+    parser.add_argument("--manifest", default=None,
+                        help="sign/verify tramite un indice separato senza modificare i file")
+    parser.add_argument("--algorithm", choices=hash_algorithms(), default=DEFAULT_HASH_ALGORITHM,
+                        help="sign/hash: algoritmo di hash (tree-* = hash ad albero in parallelo per file enormi); "
+                             "verify usa quello registrato nella firma")
+    parser.add_argument("--incremental", action="store_true",
+                        help="con --manifest rilegge solo i file con dimensione o mtime cambiati")
+    parser.add_argument("--staged", action="store_true",
+                        help="sign/verify solo dei file in stage per il commit (sign li riaggiunge all'indice)")
+    parser.add_argument("--changed-since", metavar="REF", default=None,
+                        help="sign/verify solo dei file cambiati rispetto a REF di git, più i non tracciati")
+    parser.add_argument("--install-hook", action="store_true",
+                        help="installa un hook pre-commit git che esegue sign/verify con --staged")
+    parser.add_argument("--dedup", action="store_true",
+                        help="verify/hash: elabora una sola volta i file identici byte per byte "
+                             "(con la cache l'esito resta memorizzato per contenuto)")
+    parser.add_argument("--journal", metavar="FILE", default=None,
+                        help="registra i file completati in FILE; se il job si interrompe, rilanciarlo con lo "
+                             "stesso FILE salta i file già fatti e non modificati (rimosso al termine)")
+    parser.add_argument("--poll", action="store_true",
+                        help="watch: usa il polling invece di inotify")
+    parser.add_argument("--debounce", type=float, default=WATCH_DEBOUNCE,
+                        help=f"watch: secondi di attesa dopo l'ultima modifica (default: {WATCH_DEBOUNCE})")
+    parser.add_argument("--daemon", action="store_true",
+                        help="verify: usa il daemon in esecuzione (cache calda, nessun avvio a freddo)")
+    parser.add_argument("--socket", default=None,
+                        help=f"serve/--daemon: socket Unix (default: {default_socket_path()})")
+    parser.add_argument("--port", type=int, default=None,
+                        help="serve/--daemon: usa TCP su 127.0.0.1:PORT invece del socket Unix")
+    parser.add_argument("--report", metavar="FILE", default=None,
+                        help="verify: scrive i risultati strutturati man mano che i file sono verificati "
+                             "(SARIF se FILE termina con .sarif, altrimenti JSON Lines)")
+    parser.add_argument("--report-format", choices=REPORT_FORMATS, default=None,
+                        help="formato di --report (default: dedotto dall'estensione)")
+    parser.add_argument("--shard", metavar="I/N", type=shard_spec, default=None,
+                        help="verify: elabora solo lo shard I di N (bilanciati per byte) scrivendo il report "
+                             "JSON Lines indicato da --report, da unire poi con merge")
+    parser.add_argument("--metrics-jsonl", default=None,
+                        help="accoda gli eventi di strumentazione (fasi, byte, durate) a questo file JSON Lines")
+    parser.add_argument("--metrics-prom", default=None,
+                        help="scrive le metriche aggregate in questo textfile Prometheus")
+    args = parser.parse_intermixed_args(argv)
+    
+    git_mode = args.staged or args.changed_since is not None
+    if args.manifest and args.operation not in ("sign", "verify"):
+        parser.error("--manifest è disponibile solo con sign e verify")
+    if (git_mode or args.install_hook) and args.operation not in ("sign", "verify"):
+        parser.error("--staged, --changed-since e --install-hook sono disponibili solo con sign e verify")
+    if git_mode and args.manifest:
+        parser.error("--manifest non si combina con --staged e --changed-since")
+    if args.staged and args.changed_since is not None:
+        parser.error("usare --staged oppure --changed-since, non entrambi")
+    if args.daemon and (args.operation != "verify" or args.manifest or git_mode):
+        parser.error("--daemon è disponibile solo con verify su file e cartelle")
+    if (args.report or args.report_format) and args.operation not in ("verify", "merge"):
+        parser.error("--report è disponibile solo con verify e merge")
+    if args.dedup and (args.operation not in DEDUP_OPERATIONS or args.manifest or git_mode or args.daemon
+                       or args.shard):
+        parser.error("--dedup è disponibile solo con verify e hash su file e cartelle")
+    if args.journal and (args.operation not in BATCH_OPERATIONS or args.manifest or git_mode or args.daemon
+                         or args.shard):
+        parser.error("--journal è disponibile solo con sign, verify, strip, info e hash su file e cartelle")
+    if args.shard and (args.operation != "verify" or args.manifest or git_mode or args.daemon):
+        parser.error("--shard è disponibile solo con verify su file e cartelle")
+    if args.shard and (not args.report or args.report_format == "sarif" or args.report.lower().endswith(".sarif")):
+        parser.error("--shard richiede --report con il file JSON Lines del report dello shard")
+    if args.operation == "merge" and (args.manifest or git_mode or args.daemon):
+        parser.error("merge accetta solo i report degli shard")
+    if (not args.paths and not (args.manifest and args.operation == "verify") and not git_mode
+            and not args.install_hook and args.operation != "serve"):
+        parser.error("specificare almeno un file o una cartella")
+    
+    if args.operation == "serve":
+        import signal
+        
+        try:
+            daemon = VerificationDaemon(args.socket, args.port, workers=args.jobs or DAEMON_WORKERS)
+        except (DaemonError, OSError) as e:
+            print(f"✗ {e}", file=sys.stderr)
+            return 1
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        print(f"Daemon di verifica in ascolto su {daemon.address} (Ctrl+C per uscire)...")
+        try:
+            daemon.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            daemon.close()
+        return 0
+    
+    if args.install_hook:
+        try:
+            hook_path = install_git_hook(args.operation, args.algorithm)
+        except GitError as e:
+            print(f"✗ {e}", file=sys.stderr)
+            return 1
+        print(f"Hook pre-commit installato: {hook_path}")
+        return 0
+    
+    def report(file_path, ok, message):
+        if ok and args.quiet:
+            return
+        mark = "✓" if ok else "✗"
+        print(f"{mark} {file_path}: {message.replace(chr(10), ' | ')}")
+    
+    metrics = None
+    if args.metrics_jsonl or args.metrics_prom:
+        metrics = MetricsCollector(args.metrics_jsonl)
+    
+    if args.operation == "watch":
+        print(f"In ascolto su {', '.join(args.paths)} (Ctrl+C per uscire)...")
+        try:
+            watch(args.paths, report, args.all_files, args.debounce, args.poll, metrics=metrics)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            _close_metrics(metrics, args.metrics_prom)
+        return 0
+    
+    results = None
+    if args.report and not args.shard:
+        results = open_report(args.report, args.report_format)
+    
+    cache = None
+    if (args.operation == "verify" or git_mode) and not (args.no_cache or args.manifest or args.daemon):
+        cache = VerificationCache(args.cache_file, rehash=args.rehash)
+    
+    journal = None
+    try:
+        if args.journal:
+            journal = CheckpointJournal(
+                args.journal, args.operation, args.algorithm if args.operation in ("sign", "hash") else None
+            )
+        if args.daemon:
+            stats = run_daemon_batch(args.paths, args.all_files, report, args.socket, args.port, results)
+        elif git_mode:
+            stats = run_git_batch(
+                args.operation, args.changed_since, args.staged, args.paths, args.jobs, args.all_files, report,
+                cache, metrics, args.algorithm, results
+            )
+        elif args.manifest and args.operation == "sign":
+            stats = sign_manifest(args.paths, args.manifest, args.jobs, args.all_files, report, metrics, args.algorithm)
+        elif args.manifest:
+            stats = verify_manifest(args.manifest, args.jobs, report, args.paths, args.incremental, metrics, results)
+        elif args.operation == "merge":
+            stats = merge_shard_reports(args.paths, report, results)
+        elif args.shard:
+            stats = run_shard(args.paths, *args.shard, args.report, args.jobs, args.all_files, report, cache, metrics)
+        else:
+            stats = _run_paths(
+                args.operation, args.paths, args.jobs, args.all_files, report, cache, metrics, args.algorithm, results,
+                args.dedup, journal
+            )
+        if journal:
+            journal.close(completed=True)
+    except (GitError, DaemonError, ValueError) as e:
+        print(f"✗ {e}", file=sys.stderr)
+        return 1
+    finally:
+        if journal:
+            journal.close()
+        if cache:
+            cache.close()
+        if results:
+            results.close()
+        _close_metrics(metrics, args.metrics_prom)
+    print(format_batch_stats(stats))
+    if "merkle_root" in stats:
+        changed = stats.get("merkle_changed")
+        status = f" ({len(changed)} file modificati)" if changed else ""
+        print(f"Radice Merkle: {stats['merkle_root']}{status}")
+    for subtree, (digest, expected) in stats.get("merkle_subtrees", {}).items():
+        changed = [key for key in stats["merkle_changed"] if key == subtree or key.startswith(subtree + "/")]
+        status = "uguale al manifest" if digest == expected else f"diverso dal manifest, {len(changed)} file modificati"
+        print(f"Digest Merkle di {subtree}: {digest or '-'} ({status})")
+    if "plan" in stats:
+        print(f"Piano degli shard: {stats['plan']}")
+    if stats.get("missing_shards"):
+        print(f"✗ Shard mancanti o incompleti: {', '.join(map(str, stats['missing_shards']))}", file=sys.stderr)
+        return 1
+    
+    # Con git nessun file modificato è l'esito normale (commit senza file di codice)
+    return 1 if stats["failed"] or not (stats["files"] or git_mode) else 0
+
+# ══════════════════════════════════════════════════════════════════════════════
+# 🚀 PUNTO DI INGRESSO RIGA DI COMANDO (SENZA GUI)
+# ══════════════════════════════════════════════════════════════════════════════
+
+if __name__ == "__main__":
+    sys.exit(main())
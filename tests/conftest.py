@@ -0,0 +1,5 @@
+import os
+import sys
+
+# I test importano filesigner_core dalla radice della repository, senza installazione
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
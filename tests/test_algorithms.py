@@ -0,0 +1,70 @@
+"""Algoritmi di hash: formato del digest, hash ad albero, firma e verifica con ogni algoritmo."""
+
+import hashlib
+import random
+
+import pytest
+
+import filesigner_core as fc
+
+@pytest.fixture
+def small_segments(monkeypatch):
+    monkeypatch.setattr(fc, "TREE_SEGMENT_SIZE", 64)
+
+@pytest.mark.parametrize("algorithm", fc.hash_algorithms())
+def test_digest_round_trip(algorithm):
+    value = fc.hash_bytes(b"x = 1\n", algorithm)
+    parsed = fc.parse_digest(value)
+    assert parsed[0] == algorithm
+    assert fc.format_digest(*parsed) == value
+
+def test_sha256_keeps_plain_hex():
+    value = fc.hash_bytes(b"x = 1\n")
+    assert value == hashlib.sha256(b"x = 1\n").hexdigest()
+    assert fc.parse_digest(value) == ("sha256", value)
+    assert fc.describe_digest(value) == f"SHA256: {value}"
+
+def test_unknown_algorithm():
+    with pytest.raises(ValueError):
+        fc.new_hasher("md5")
+    with pytest.raises(ValueError):
+        fc.new_hasher("tree-md5")
+
+@pytest.mark.parametrize("size", [0, 1, 63, 64, 65, 1000])
+def test_tree_hash_definition(small_segments, size):
+    data = bytes(random.Random(size).randrange(256) for _ in range(size))
+    segments = [data[i:i + 64] for i in range(0, len(data), 64)] or [b""]
+    expected = hashlib.sha256(b"".join(hashlib.sha256(s).digest() for s in segments)).hexdigest()
+    
+    assert fc.hash_bytes(data, "tree-sha256") == f"tree-sha256:{expected}"
+
+def test_tree_hash_does_not_depend_on_update_boundaries(small_segments):
+    rng = random.Random(3)
+    data = bytes(rng.randrange(256) for _ in range(5000))
+    expected = fc.hash_bytes(data, "tree-blake2b")
+    for _ in range(20):
+        hasher = fc.new_hasher("tree-blake2b")
+        position = 0
+        while position < len(data):
+            step = rng.randrange(1, 300)
+            chunk = data[position:position + step]
+            hasher.update(bytearray(chunk) if step % 2 else chunk)
+            position += step
+        snapshot = hasher.copy()
+        assert fc.format_digest("tree-blake2b", hasher.hexdigest()) == expected
+        assert snapshot.hexdigest() == hasher.hexdigest()
+
+@pytest.mark.parametrize("algorithm", fc.hash_algorithms())
+@pytest.mark.parametrize("streaming", [False, True])
+def test_sign_and_verify(tmp_path, small_segments, algorithm, streaming):
+    file_path = tmp_path / "app.py"
+    file_path.write_bytes(b"\n\nx = 1\r\n" * 100)
+    
+    ok, message = fc.add_signature(str(file_path), streaming=streaming, algorithm=algorithm)
+    
+    assert ok, message
+    assert fc.parse_digest(fc.read_signature_trailer(str(file_path))["hash"])[0] == algorithm
+    assert fc.verify_signature(str(file_path), streaming=not streaming)[0]
+    with open(file_path, "ab") as f:
+        f.write(b"y = 2\n")
+    assert not fc.verify_signature(str(file_path), streaming=streaming)[0]
@@ -0,0 +1,40 @@
+"""Verifica di archivi tar e zip senza estrazione."""
+
+import tarfile
+import zipfile
+
+import pytest
+
+import filesigner_core as fc
+
+@pytest.fixture
+def signed_tree(tmp_path):
+    tree = tmp_path / "src"
+    tree.mkdir()
+    for i in range(12):
+        file_path = tree / f"m{i}.py"
+        file_path.write_bytes(b"valore_%d = %d\n" % (i, i) * (2000 + i * 500))
+        fc.add_signature(str(file_path))
+    (tree / "non_firmato.py").write_bytes(b"x = 1\n")
+    return tree
+
+@pytest.mark.parametrize("jobs", [1, 3])
+@pytest.mark.parametrize("kind", ["tar.gz", "zip"])
+def test_archive_matches_files_on_disk(tmp_path, signed_tree, monkeypatch, jobs, kind):
+    # Una finestra minima costringe il tar a svuotare la coda a ogni membro
+    monkeypatch.setattr(fc, "ARCHIVE_WINDOW_BYTES", 1)
+    archive_path = str(tmp_path / f"src.{kind}")
+    if kind == "zip":
+        with zipfile.ZipFile(archive_path, "w") as archive:
+            for file_path in sorted(signed_tree.iterdir()):
+                archive.write(file_path, f"src/{file_path.name}")
+    else:
+        with tarfile.open(archive_path, "w:gz") as archive:
+            archive.add(signed_tree, "src")
+    
+    seen = {}
+    stats = fc.verify_archive(archive_path, jobs=jobs, report=lambda path, ok, message: seen.update({path: ok}))
+    
+    assert stats["files"] == 13 and stats["failed"] == 1
+    for file_path in signed_tree.iterdir():
+        assert seen[fc._member_path(archive_path, f"src/{file_path.name}")] == fc.verify_signature(str(file_path))[0]
@@ -0,0 +1,104 @@
+"""API asincrona: firma e verifica senza bloccare l'event loop, con concorrenza limitata."""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import filesigner_core as fc
+
+@pytest.fixture
+def files(tmp_path):
+    paths = []
+    for index in range(6):
+        file_path = tmp_path / f"f{index}.py"
+        file_path.write_text(f"x = {index}\n")
+        paths.append(str(file_path))
+    return paths
+
+@pytest.fixture
+def slow_verify(monkeypatch):
+    """verify_signature lenta che registra quante chiamate sono in corso insieme"""
+    state = {"running": 0, "peak": 0, "calls": []}
+    lock = threading.Lock()
+    
+    def verify(path, **kwargs):
+        with lock:
+            state["running"] += 1
+            state["peak"] = max(state["peak"], state["running"])
+            state["calls"].append(path)
+        time.sleep(0.02)
+        with lock:
+            state["running"] -= 1
+        return True, f"ok {path}"
+    
+    monkeypatch.setattr(fc, "verify_signature", verify)
+    return state
+
+def test_sign_and_verify(files):
+    async def main():
+        signed = await asyncio.gather(*(fc.async_sign(path) for path in files))
+        verified = await asyncio.gather(*(fc.async_verify(path) for path in files))
+        return signed, verified
+    
+    signed, verified = asyncio.run(main())
+    
+    assert all(ok for ok, _ in signed) and all(ok for ok, _ in verified)
+
+def test_limiter_bounds_running_operations(files, slow_verify):
+    async def main():
+        limiter = asyncio.Semaphore(2)
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            return await asyncio.gather(*(fc.async_verify(path, executor, limiter) for path in files))
+    
+    assert len(asyncio.run(main())) == len(files)
+    assert slow_verify["peak"] == 2
+
+def test_verify_many_is_lazy_and_concurrent(files, slow_verify):
+    pulled = []
+    
+    def source():
+        for path in files:
+            pulled.append(path)
+            yield path
+    
+    async def main():
+        ticks = 0
+        results = []
+        
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.001)
+        
+        tick_task = asyncio.ensure_future(ticker())
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            async for result in fc.async_verify_many(source(), concurrency=3, executor=executor):
+                if not results:
+                    first_pulled = len(pulled)
+                results.append(result)
+        tick_task.cancel()
+        return results, first_pulled, ticks
+    
+    results, first_pulled, ticks = asyncio.run(main())
+    
+    assert sorted(path for path, _, _ in results) == files
+    assert all(ok for _, ok, _ in results)
+    assert first_pulled <= 3
+    assert slow_verify["peak"] <= 3
+    assert ticks > 5  # l'event loop ha continuato a girare durante le verifiche
+
+def test_closing_verify_many_cancels_pending(files, slow_verify):
+    async def main():
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            iterator = fc.async_verify_many(files, concurrency=2, executor=executor)
+            first = await iterator.__anext__()
+            await iterator.aclose()
+        return first
+    
+    asyncio.run(main())
+    
+    assert len(slow_verify["calls"]) < len(files)
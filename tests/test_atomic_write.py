@@ -0,0 +1,93 @@
+"""Sostituzione atomica dei file firmati: i dati arrivano su disco prima del rename."""
+
+import os
+import stat
+
+import pytest
+
+import filesigner_core as fc
+
+@pytest.fixture
+def calls(monkeypatch):
+    recorded = []
+    real_fsync, real_replace = os.fsync, os.replace
+    
+    def fsync(fd):
+        recorded.append("fsync-dir" if stat.S_ISDIR(os.fstat(fd).st_mode) else "fsync-file")
+        real_fsync(fd)
+    
+    def replace(src, dst):
+        recorded.append("replace")
+        real_replace(src, dst)
+    
+    monkeypatch.setattr(fc.os, "fsync", fsync)
+    monkeypatch.setattr(fc.os, "replace", replace)
+    return recorded
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_rewrite_is_synced_before_and_after_rename(tmp_path, calls, streaming):
+    file_path = tmp_path / "app.py"
+    file_path.write_bytes(b"\n\n  x = 1\r\n\r\n\r\n\r\ny = 2\n")  # da normalizzare: niente append in place
+    
+    ok, message = fc.add_signature(str(file_path), streaming=streaming)
+    
+    assert ok, message
+    assert calls == ["fsync-file", "replace", "fsync-dir"]
+    assert fc.verify_signature(str(file_path))[0]
+    assert [name for name in os.listdir(tmp_path)] == ["app.py"]
+
+def test_append_in_place_does_not_rename(tmp_path, calls):
+    file_path = tmp_path / "app.py"
+    file_path.write_bytes(b"x = 1")
+    
+    assert fc.add_signature(str(file_path))[0]
+    assert "replace" not in calls
+
+def test_manifest_is_synced(tmp_path, calls):
+    (tmp_path / "a.py").write_bytes(b"a = 1\n")
+    manifest_path = tmp_path / "firme.fsm"
+    
+    fc.sign_manifest([str(tmp_path / "a.py")], str(manifest_path), jobs=1)
+    
+    assert calls[-3:] == ["fsync-file", "replace", "fsync-dir"]
+
+UNNORMALISED = b"\n\n  x = 1\r\n\r\n\r\n\r\ny = 2\n"
+
+@pytest.mark.skipif(not hasattr(os, "symlink"), reason="link simbolici non disponibili")
+@pytest.mark.parametrize("streaming", [False, True])
+def test_symlink_signs_the_target(tmp_path, streaming):
+    real = tmp_path / "real.py"
+    real.write_bytes(UNNORMALISED)
+    link = tmp_path / "link.py"
+    link.symlink_to(real)
+    
+    assert fc.add_signature(str(link), streaming=streaming)[0]
+    
+    assert link.is_symlink()
+    assert fc.verify_signature(str(real))[0]
+    assert sorted(os.listdir(tmp_path)) == ["link.py", "real.py"]
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_hard_link_is_rewritten_in_place(tmp_path, calls, streaming):
+    first = tmp_path / "a.py"
+    first.write_bytes(UNNORMALISED)
+    second = tmp_path / "b.py"
+    os.link(first, second)
+    
+    assert fc.add_signature(str(first), streaming=streaming)[0]
+    
+    assert "replace" not in calls
+    assert os.path.samefile(first, second)
+    assert fc.verify_signature(str(second))[0]
+    assert sorted(os.listdir(tmp_path)) == ["a.py", "b.py"]
+
+def test_strip_replaces_atomically(tmp_path, calls):
+    file_path = tmp_path / "app.py"
+    file_path.write_bytes(b"x = 1\n")
+    assert fc.add_signature(str(file_path))[0]
+    del calls[:]
+    
+    assert fc.strip_signature(str(file_path))[0]
+    
+    assert calls == ["fsync-file", "replace", "fsync-dir"]
+    assert file_path.read_bytes() == b"x = 1"
@@ -0,0 +1,40 @@
+"""Riga di comando batch: firma e verifica di alberi interi in parallelo."""
+
+import os
+
+import pytest
+
+import filesigner_core as fc
+
+@pytest.fixture
+def tree(tmp_path):
+    source = tmp_path / "progetto"
+    for name in ("a.py", "b.js", "sub/c.css", "sub/note.txt", ".git/hook.py", "node_modules/x.js"):
+        file_path = source / name
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.write_text("x = 1\n")
+    return source
+
+def test_target_files_skip_ignored_dirs(tree):
+    names = sorted(os.path.relpath(p, tree).replace(os.sep, "/") for p in fc.iter_target_files([str(tree)]))
+    assert names == ["a.py", "b.js", "sub/c.css"]
+    assert len(list(fc.iter_target_files([str(tree)], all_files=True))) == 4
+
+@pytest.mark.parametrize("jobs", ["1", "3"])
+def test_sign_then_verify(tree, capsys, jobs):
+    assert fc.main(["sign", str(tree), "-q", "--jobs", jobs, "--no-cache"]) == 0
+    assert fc.main(["verify", str(tree), "-q", "--jobs", jobs, "--no-cache"]) == 0
+    assert "3 file, 3 ok, 0 errori" in capsys.readouterr().out
+    
+    (tree / "sub" / "c.css").write_text("modificato\n")
+    assert fc.main(["verify", str(tree), "-q", "--jobs", jobs, "--no-cache"]) == 1
+    assert "3 file, 2 ok, 1 errori" in capsys.readouterr().out
+
+def test_strip_restores_content(tree):
+    assert fc.main(["sign", str(tree), "-q"]) == 0
+    assert fc.main(["strip", str(tree), "-q"]) == 0
+    assert (tree / "a.py").read_text() == "x = 1"
+    assert fc.main(["verify", str(tree), "-q", "--no-cache"]) == 1
+
+def test_empty_tree_fails(tmp_path):
+    assert fc.main(["verify", str(tmp_path), "-q", "--no-cache"]) == 1
@@ -0,0 +1,12 @@
+"""Suite di benchmark: elenco dei casi."""
+
+import benchmark
+
+def test_cases_are_unique():
+    sizes = [benchmark.parse_size(size) for size in benchmark.DEFAULT_SIZES.split(",")]
+    cases = benchmark.build_cases(sizes, ["sign", "verify"])
+    
+    keys = [benchmark.case_key(case) for case in cases]
+    
+    assert len(keys) == len(set(keys))
+    assert keys.index("sign:code:.py:64K") == 2  # resta nella posizione dello sweep di dimensioni
@@ -0,0 +1,70 @@
+"""API in memoria: sign_bytes, verify_bytes e verify_stream, anche su stream non riposizionabili."""
+
+import io
+
+import pytest
+
+import filesigner_core as fc
+
+class ReadOnly:
+    """Oggetto file-like minimo: solo read(), niente seekable/tell"""
+    
+    def __init__(self, data):
+        self.data = data
+        self.position = 0
+    
+    def read(self, size=-1):
+        end = len(self.data) if size is None or size < 0 else self.position + size
+        chunk = self.data[self.position:end]
+        self.position += len(chunk)
+        return chunk
+
+@pytest.fixture
+def signed():
+    ok, message, data = fc.sign_bytes(b"x = 1\r\ny = 2\n")
+    assert ok, message
+    return data
+
+def test_sign_bytes_matches_add_signature(tmp_path):
+    file_path = tmp_path / "app.py"
+    file_path.write_bytes(b"x = 1\r\ny = 2\n")
+    
+    assert fc.add_signature(str(file_path))[0]
+    signed = fc.sign_bytes(b"x = 1\r\ny = 2\n")[2]
+    
+    assert fc.remove_signature_lines(signed.decode()) == fc.remove_signature_lines(file_path.read_text())
+    assert fc.verify_signature(str(file_path))[0]
+
+@pytest.mark.parametrize("wrap", [bytes, bytearray, memoryview, io.BytesIO, ReadOnly])
+def test_verify_bytes_accepts_buffers_and_streams(signed, wrap):
+    result = fc.verify_bytes(wrap(signed), name="upload.py")
+    assert result.valid and result.status == "valid" and result.path == "upload.py"
+
+def test_verify_detects_modification(signed):
+    result = fc.verify_bytes(signed.replace(b"x = 1", b"x = 2"))
+    assert not result.valid and result.status == "modified"
+
+def test_unsigned_content():
+    result = fc.verify_bytes(b"x = 1\n")
+    assert result.status == "unsigned" and result.error
+
+def test_stream_from_current_position(signed):
+    stream = io.BytesIO(b"intestazione" + signed)
+    stream.seek(len(b"intestazione"))
+    assert fc.verify_stream(stream).valid
+
+def test_other_algorithm_rereads_seekable_stream():
+    signed = fc.sign_bytes(b"x = 1\n", algorithm="blake2b")[2]
+    assert fc.verify_stream(io.BytesIO(signed)).valid
+
+def test_non_seekable_stream_returns_result():
+    signed = fc.sign_bytes(b"x = 1\n", algorithm="blake2b")[2]
+    
+    result = fc.verify_stream(ReadOnly(signed))
+    
+    assert result.status == "error" and "algoritmo" in result.error
+    assert fc.verify_stream(ReadOnly(signed), algorithm="blake2b").valid
+
+def test_sign_bytes_from_stream():
+    ok, _, signed = fc.sign_bytes(ReadOnly(b"x = 1\n"))
+    assert ok and fc.verify_bytes(signed).valid
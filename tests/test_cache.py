@@ -0,0 +1,89 @@
+"""Cache persistente delle verifiche: chiave di stat, finestra racy, LRU e rehash."""
+
+import os
+import sqlite3
+import time
+
+import pytest
+
+import filesigner_core as fc
+
+@pytest.fixture
+def signed(tmp_path):
+    file_path = tmp_path / "app.py"
+    file_path.write_text("x = 1\n")
+    assert fc.add_signature(str(file_path))[0]
+    os.utime(file_path, ns=(0, 0))
+    return file_path
+
+def test_hit_without_reading_the_file(signed, tmp_path, monkeypatch):
+    cache_path = str(tmp_path / "cache.sqlite")
+    with fc.VerificationCache(cache_path) as cache:
+        first = fc.verify_file(str(signed), cache=cache)
+    monkeypatch.setattr(fc, "_verify_signature_data", None)  # una hit non deve verificare
+    
+    with fc.VerificationCache(cache_path) as cache:
+        second = fc.verify_file(str(signed), cache=cache)
+    
+    assert not first.cached and second.cached
+    assert second.as_dict() == dict(first.as_dict(), cached=True, duration=second.duration)
+
+def test_rehash_ignores_cached_results(signed, tmp_path):
+    with fc.VerificationCache(str(tmp_path / "cache.sqlite")) as cache:
+        assert fc.verify_file(str(signed), cache=cache).valid
+        # stessa dimensione e mtime riportato indietro: la stat non distingue la modifica
+        signed.write_bytes(signed.read_bytes().replace(b"x = 1", b"x = 2"))
+        os.utime(signed, ns=(0, 0))
+        assert fc.verify_file(str(signed), cache=cache).cached
+    
+    with fc.VerificationCache(str(tmp_path / "cache.sqlite"), rehash=True) as cache:
+        assert fc.verify_file(str(signed), cache=cache).status == "modified"
+
+def test_size_change_is_a_miss(signed, tmp_path):
+    with fc.VerificationCache(str(tmp_path / "cache.sqlite")) as cache:
+        fc.verify_file(str(signed), cache=cache)
+        with open(signed, "ab") as f:
+            f.write(b"y = 2\n")
+        os.utime(signed, ns=(0, 0))
+        
+        result = fc.verify_file(str(signed), cache=cache)
+    
+    assert not result.cached and result.status == "modified"
+
+def test_recent_files_are_not_stored(tmp_path):
+    file_path = tmp_path / "app.py"
+    file_path.write_text("x = 1\n")
+    assert fc.add_signature(str(file_path))[0]  # mtime adesso: dentro la finestra racy
+    
+    with fc.VerificationCache(str(tmp_path / "cache.sqlite")) as cache:
+        fc.verify_file(str(file_path), cache=cache)
+        assert not fc.verify_file(str(file_path), cache=cache).cached
+
+def test_lru_eviction(tmp_path):
+    cache_path = str(tmp_path / "cache.sqlite")
+    paths = []
+    for index in range(4):
+        file_path = tmp_path / f"f{index}.py"
+        file_path.write_text(f"x = {index}\n")
+        os.utime(file_path, ns=(0, 0))
+        paths.append(str(file_path))
+    
+    with fc.VerificationCache(cache_path) as cache:
+        for path in paths:
+            fc.verify_file(path, cache=cache)
+    time.sleep(0.001)
+    with fc.VerificationCache(cache_path, max_entries=3) as cache:
+        assert fc.verify_file(paths[0], cache=cache).cached  # f0 diventa la voce usata più di recente
+    
+    with sqlite3.connect(cache_path) as db:
+        stored = sorted(os.path.basename(row[0]) for row in db.execute("SELECT path FROM verify_cache"))
+    assert stored == ["f0.py", "f2.py", "f3.py"]
+
+def test_old_schema_is_dropped(tmp_path):
+    cache_path = str(tmp_path / "cache.sqlite")
+    with sqlite3.connect(cache_path) as db:
+        db.execute("CREATE TABLE verify_cache (path TEXT)")
+        db.execute("PRAGMA user_version=1")
+    
+    with fc.VerificationCache(cache_path) as cache:
+        assert cache.lookup(cache_path)[0] is None
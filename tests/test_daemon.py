@@ -0,0 +1,34 @@
+"""Daemon di verifica: risposte del protocollo senza passare dal socket."""
+
+import json
+import os
+import socketserver
+
+import filesigner_core as fc
+
+def test_tcp_server_does_not_patch_stdlib(tmp_path):
+    before = socketserver.ThreadingTCPServer.allow_reuse_address
+    daemon = fc.VerificationDaemon(port=0, workers=1)
+    try:
+        assert daemon.server.allow_reuse_address
+        assert socketserver.ThreadingTCPServer.allow_reuse_address == before
+    finally:
+        daemon.close()
+
+def test_responses_carry_file_size(tmp_path):
+    file_path = tmp_path / "app.py"
+    file_path.write_bytes(b"x = 1\n" * 100)
+    fc.add_signature(str(file_path))
+    os.utime(file_path, ns=(0, 0))  # fuori dalla finestra dei file appena modificati: entra in cache
+    size = file_path.stat().st_size
+    
+    daemon = fc.VerificationDaemon(port=0, workers=1)
+    try:
+        request = json.dumps({"id": 1, "op": "verify", "paths": [str(file_path)]})
+        for cached in (False, True):
+            responses = list(daemon.handle(request))
+            assert responses[0]["size"] == size
+            assert responses[0]["ok"] and responses[0]["cached"] == cached
+            assert responses[-1]["done"]
+    finally:
+        daemon.close()
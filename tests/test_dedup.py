@@ -0,0 +1,61 @@
+"""Deduplica per contenuto: un solo hash per gruppo di file identici, esito esteso ai duplicati."""
+
+import os
+
+import pytest
+
+import filesigner_core as fc
+
+@pytest.fixture
+def tree(tmp_path):
+    source = tmp_path / "src"
+    source.mkdir()
+    original = source / "a.py"
+    original.write_bytes(b"x = 1\n" * 2000)  # oltre DEDUP_PROBE_SIZE: serve il digest completo
+    assert fc.add_signature(str(original))[0]
+    for name in ("b.py", "c.py", "d.py"):
+        (source / name).write_bytes(original.read_bytes())
+    same_size = bytearray(original.read_bytes())
+    same_size[5000] ^= 1  # stessa dimensione, inizio e fine uguali, contenuto diverso
+    (source / "e.py").write_bytes(bytes(same_size))
+    for file_path in source.iterdir():
+        os.utime(file_path, ns=(0, 0))  # fuori dalla finestra in cui la cache non memorizza
+    return source
+
+def test_find_duplicate_files(tree):
+    sized = [(str(p), p.stat().st_size) for p in sorted(tree.iterdir())]
+    groups = list(fc.find_duplicate_files(sized).values())
+    assert groups == [[str(tree / name) for name in ("a.py", "b.py", "c.py", "d.py")]]
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_fan_out_reports_every_duplicate(tree, jobs):
+    results = []
+    
+    stats = fc.run_batch("verify", [str(tree)], jobs=jobs, dedup=True, results=results.append)
+    
+    assert stats["files"] == 5 and stats["deduped"] == 3
+    by_name = {os.path.basename(r.path): r for r in results}
+    assert sorted(by_name) == ["a.py", "b.py", "c.py", "d.py", "e.py"]
+    assert all(by_name[f"{name}.py"].valid for name in "abcd")
+    assert by_name["e.py"].status == "modified"
+    assert len({r.signature_id for r in results}) == 1
+
+def test_dedup_matches_plain_run(tree):
+    plain, deduped = {}, {}
+    fc.run_batch("hash", [str(tree)], jobs=1, report=lambda p, ok, m: plain.update({p: (ok, m)}))
+    fc.run_batch("hash", [str(tree)], jobs=1, dedup=True, report=lambda p, ok, m: deduped.update({p: (ok, m)}))
+    assert plain == deduped
+
+def test_cache_remembers_content_digest(tree, tmp_path):
+    cache_path = str(tmp_path / "cache.sqlite")
+    with fc.VerificationCache(cache_path) as cache:
+        fc.run_batch("verify", [str(tree)], jobs=1, cache=cache, dedup=True)
+    for name in ("f.py", "g.py"):  # nuovi duplicati, mai visti dalla cache per percorso
+        (tree / name).write_bytes((tree / "a.py").read_bytes())
+        os.utime(tree / name, ns=(0, 0))
+    
+    with fc.VerificationCache(cache_path) as cache:
+        stats = fc.run_batch("verify", [str(tree)], jobs=1, cache=cache, dedup=True)
+    
+    assert stats["files"] == 7 and stats["failed"] == 1
+    assert stats["cached"] == 7  # i nuovi file risolti dal digest del contenuto
@@ -0,0 +1,47 @@
+"""Motore su bytes: file non UTF-8 firmati senza decodifica e senza alterarne i byte."""
+
+import hashlib
+
+import pytest
+
+import filesigner_core as fc
+
+LATIN1 = "# è già più così\nnome = 'Müller'\n".encode("latin-1")
+CP1252 = "prezzo = '€ 5'  # “virgolette”\n".encode("cp1252")
+MIXED = "a = 'è'\n".encode("utf-8") + "b = 'è'\n".encode("latin-1")
+
+@pytest.mark.parametrize("content", [LATIN1, CP1252, MIXED])
+@pytest.mark.parametrize("streaming", [False, True])
+def test_non_utf8_bytes_are_preserved(tmp_path, content, streaming):
+    file_path = tmp_path / "app.py"
+    file_path.write_bytes(content)
+    
+    ok, message = fc.add_signature(str(file_path), streaming=streaming)
+    
+    assert ok, message
+    signed = file_path.read_bytes()
+    assert signed.startswith(content.rstrip(b"\n"))
+    assert fc.verify_signature(str(file_path), streaming=not streaming)[0]
+    assert fc.read_signature_trailer(str(file_path))["hash"] == hashlib.sha256(content.rstrip(b"\n")).hexdigest()
+    
+    assert fc.strip_signature(str(file_path))[0]
+    assert file_path.read_bytes() == content.rstrip(b"\n")
+
+def test_modified_latin1_byte_is_detected(tmp_path):
+    file_path = tmp_path / "app.py"
+    file_path.write_bytes(LATIN1)
+    assert fc.add_signature(str(file_path))[0]
+    
+    file_path.write_bytes(file_path.read_bytes().replace("è".encode("latin-1"), "é".encode("latin-1"), 1))
+    
+    assert fc.verify_file(str(file_path)).status == "modified"
+
+def test_utf8_hash_matches_text_normalisation(tmp_path):
+    text = "\n\ncittà = 'Zürich'\r\n\r\n\r\n\r\nfine = True   \n"
+    file_path = tmp_path / "app.py"
+    file_path.write_bytes(text.encode("utf-8"))
+    
+    assert fc.add_signature(str(file_path))[0]
+    
+    expected = hashlib.sha256(fc.remove_signature_lines(text.replace("\r\n", "\n")).encode("utf-8")).hexdigest()
+    assert fc.read_signature_trailer(str(file_path))["hash"] == expected
@@ -0,0 +1,86 @@
+"""Modalità git: file cambiati da git diff --raw, modalità staged e hook pre-commit."""
+
+import os
+import shutil
+import subprocess
+
+import pytest
+
+import filesigner_core as fc
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git non disponibile")
+
+def git(repo, *args):
+    return subprocess.run(["git", *args], cwd=repo, check=True, capture_output=True).stdout.decode().strip()
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    git(tmp_path, "init", "-q")
+    git(tmp_path, "config", "user.email", "test@example.com")
+    git(tmp_path, "config", "user.name", "test")
+    (tmp_path / "sub").mkdir()
+    for name in ("a.py", "b.py", "c.py", "sub/d.py", "nome con spazi.py"):
+        (tmp_path / name).write_text(f"valore = {name!r}\n" * 20)
+    git(tmp_path, "add", ".")
+    git(tmp_path, "commit", "-q", "-m", "base")
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+def changed(repo, **kwargs):
+    return {os.path.relpath(path, repo): oid for path, oid in fc.git_changed_files(**kwargs)}
+
+def test_working_tree_changes(repo):
+    (repo / "a.py").write_text("modificato = 1\n")
+    git(repo, "mv", "b.py", "sub/rinominato.py")
+    (repo / "c.py").unlink()
+    (repo / "nuovo.py").write_text("x = 1\n")
+    (repo / "ignorato.py").write_text("x = 1\n")
+    (repo / ".gitignore").write_text("ignorato.py\n")
+    if hasattr(os, "symlink"):
+        os.symlink("a.py", repo / "link.py")
+        git(repo, "add", "link.py")
+    
+    result = changed(repo)
+    
+    assert sorted(result) == [".gitignore", "a.py", "nuovo.py", "sub/rinominato.py"]
+    assert result["a.py"] is None and result["nuovo.py"] is None  # contenuto non ancora noto a git
+    assert result["sub/rinominato.py"] == git(repo, "rev-parse", ":sub/rinominato.py")
+
+def test_staged_changes_and_paths(repo):
+    (repo / "sub/d.py").write_text("modificato = 1\n")
+    (repo / "nome con spazi.py").write_text("modificato = 1\n")
+    git(repo, "add", ".")
+    (repo / "a.py").write_text("non in stage\n")
+    
+    result = changed(repo, staged=True)
+    
+    assert sorted(result) == ["nome con spazi.py", "sub/d.py"]
+    assert result["sub/d.py"] == git(repo, "rev-parse", ":sub/d.py")
+    assert sorted(changed(repo, staged=True, paths=["sub"])) == ["sub/d.py"]
+
+def test_changes_since_ref(repo):
+    (repo / "a.py").write_text("modificato = 1\n")
+    git(repo, "commit", "-q", "-am", "seconda")
+    
+    assert changed(repo) == {}
+    assert sorted(changed(repo, base="HEAD~1")) == ["a.py"]
+
+def test_staged_sign_rejects_unstaged_edits(repo):
+    (repo / "a.py").write_text("x = 1\n")
+    (repo / "sub/d.py").write_text("y = 1\n")
+    git(repo, "add", ".")
+    (repo / "a.py").write_text("x = 2\n")
+    seen = {}
+    
+    stats = fc.run_git_batch("sign", staged=True, report=lambda path, ok, message: seen.update({path: ok}))
+    
+    assert stats["files"] == 2 and stats["failed"] == 1
+    assert seen == {str(repo / "a.py"): False, str(repo / "sub/d.py"): True}
+    assert fc.read_signature_trailer(str(repo / "sub/d.py"))
+    assert git(repo, "diff", "--name-only") == "a.py"  # il file firmato è stato riaggiunto all'indice
+
+def test_outside_a_repository(tmp_path, monkeypatch):
+    monkeypatch.setenv("GIT_CEILING_DIRECTORIES", str(tmp_path))
+    (tmp_path / "fuori").mkdir()
+    with pytest.raises(fc.GitError):
+        fc.git_changed_files(cwd=str(tmp_path / "fuori"))
@@ -0,0 +1,69 @@
+"""Journal di checkpoint: ripresa di un batch interrotto e controllo dell'intestazione."""
+
+import pytest
+
+import filesigner_core as fc
+
+@pytest.fixture
+def tree(tmp_path):
+    for index in range(4):
+        file_path = tmp_path / "src" / f"f{index}.py"
+        file_path.parent.mkdir(exist_ok=True)
+        file_path.write_bytes(f"x = {index}\n".encode())
+        assert fc.add_signature(str(file_path))[0]
+    return tmp_path
+
+def run(tree, journal, operation="verify"):
+    seen = {}
+    stats = fc.run_batch(operation, [str(tree / "src")], jobs=1, journal=journal,
+                         report=lambda path, ok, message: seen.update({path: ok}))
+    return stats, seen
+
+def test_resume_skips_unchanged_files(tree):
+    path = str(tree / "job.fsj")
+    with fc.CheckpointJournal(path, "verify") as journal:
+        first, _ = run(tree, journal)
+    assert first["resumed"] == 0
+    (tree / "src" / "f1.py").write_bytes(b"modificato = 1\n")
+    
+    with fc.CheckpointJournal(path, "verify") as journal:
+        stats, seen = run(tree, journal)
+    
+    assert stats["resumed"] == 3 and stats["files"] == 4
+    assert seen[str(tree / "src" / "f1.py")] is False
+    assert sum(seen.values()) == 3
+
+def test_truncated_tail_is_discarded(tree):
+    path = tree / "job.fsj"
+    with fc.CheckpointJournal(str(path), "verify") as journal:
+        run(tree, journal)
+    lines = path.read_bytes().splitlines(keepends=True)
+    path.write_bytes(b"".join(lines[:-1]) + lines[-1][:10])  # ultima riga scritta a metà
+    
+    with fc.CheckpointJournal(str(path), "verify") as journal:
+        stats, _ = run(tree, journal)
+    
+    assert stats["resumed"] == 3
+    assert path.read_bytes().count(b"\n") == len(lines)  # la riga troncata è stata sostituita
+
+def test_completed_journal_is_removed(tree):
+    path = tree / "job.fsj"
+    journal = fc.CheckpointJournal(str(path), "verify")
+    run(tree, journal)
+    journal.close(completed=True)
+    assert not path.exists()
+
+@pytest.mark.parametrize("operation, algorithm", [("sign", None), ("verify", "blake2b")])
+def test_header_mismatch(tree, operation, algorithm):
+    path = str(tree / "job.fsj")
+    with fc.CheckpointJournal(path, "verify") as journal:
+        run(tree, journal)
+    
+    with pytest.raises(ValueError):
+        fc.CheckpointJournal(path, operation, algorithm)
+
+def test_not_a_journal(tree):
+    path = tree / "job.fsj"
+    path.write_text("non un journal\n")
+    with pytest.raises(ValueError):
+        fc.CheckpointJournal(str(path), "verify")
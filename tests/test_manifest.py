@@ -0,0 +1,126 @@
+"""Manifest di firma: voci lette in streaming, file non elencati, albero di Merkle."""
+
+import json
+import random
+
+import pytest
+
+import filesigner_core as fc
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for directory in ("proj/src/sub", "proj/src.d", "altro"):
+        (tmp_path / directory).mkdir(parents=True)
+    for name in ("proj/src/a.py", "proj/src/b.py", "proj/src/sub/c.py", "proj/src.d/d.py", "proj/e.py",
+                 "altro/x.py"):
+        (tmp_path / name).write_text(f"valore = {name!r}\n")
+    fc.sign_manifest(["proj"], "proj.fsm", jobs=1)
+    return tmp_path
+
+def verify(*args, **kwargs):
+    seen = {}
+    stats = fc.verify_manifest("proj.fsm", 1, lambda path, ok, message: seen.update({path: (ok, message)}),
+                               *args, **kwargs)
+    return stats, seen
+
+def test_merkle_fold_matches_tree():
+    rng = random.Random(7)
+    names = ["a", "b", "a.py", "b-x", "a b", "z", "_"]
+    for _ in range(500):
+        paths = {"/".join(rng.choice(names) for _ in range(rng.randrange(1, 5))) for _ in range(rng.randrange(12))}
+        paths = sorted(p for p in paths if not any(q.startswith(p + "/") for q in paths))
+        entries = [(path, fc.hash_bytes(path.encode())) for path in paths]
+        tree = fc.build_merkle_tree(entries)
+        
+        directories = {}
+        fold = fc._MerkleFold(directories.__setitem__)
+        for path, file_hash in entries:
+            fold.add(path, file_hash)
+        assert fold.finish() == tree[""][0]
+        assert directories == {directory: node[0] for directory, node in tree.items()}
+
+def test_unchanged_project(project):
+    stats, seen = verify()
+    assert stats["files"] == 5 and stats["failed"] == 0
+    assert stats["merkle_changed"] == []
+
+def test_unlisted_files_are_unsigned(project):
+    (project / "proj/src/nuovo.py").write_text("x = 1\n")
+    (project / "altro/y.py").write_text("y = 1\n")  # fuori dai percorsi firmati
+    reported = []
+    
+    stats = fc.verify_manifest("proj.fsm", 1, results=reported.append)
+    
+    unsigned = [result for result in reported if result.status == "unsigned"]
+    assert [result.path for result in unsigned] == [str(project / "proj/src/nuovo.py")]
+    assert unsigned[0].error == fc.UNLISTED_MESSAGE
+    assert stats["failed"] == 1 and stats["merkle_changed"] == ["proj/src/nuovo.py"]
+    assert stats["merkle_root"] != fc.merkle_digest("proj.fsm")
+
+def test_unlisted_file_changes_subtree(project):
+    (project / "proj/src/sub/nuovo.py").write_text("x = 1\n")
+    
+    stats, _ = verify(paths=["proj/src", "proj/src.d"])
+    
+    digest, expected = stats["merkle_subtrees"]["proj/src"]
+    assert digest != expected and stats["merkle_changed"] == ["proj/src/sub/nuovo.py"]
+    assert len(set(stats["merkle_subtrees"]["proj/src.d"])) == 1
+
+def test_changed_and_missing_files(project):
+    (project / "proj/src/a.py").write_text("modificato = 1\n")
+    (project / "proj/src/sub/c.py").unlink()
+    
+    stats, seen = verify(incremental=True)
+    
+    assert stats["merkle_changed"] == ["proj/src/a.py", "proj/src/sub/c.py"]
+    assert not seen[str(project / "proj/src/a.py")][0]
+    assert stats["cached"] == 3
+
+def test_sorted_walk_matches_manifest_order(project):
+    keys = [key for key, _ in fc._iter_manifest_scope(str(project), ["proj"])]
+    assert keys == sorted(keys) == [entry["path"] for entry in fc.iter_manifest("proj.fsm")]
+
+def downgrade(manifest):
+    """Riscrive il manifest nel formato v1, senza indice delle cartelle"""
+    lines = manifest.read_text(encoding="utf-8").splitlines(keepends=True)
+    header = json.loads(lines[0])
+    header["version"] = 1
+    manifest.write_text(json.dumps(header) + "\n" + "".join(lines[2:]), encoding="utf-8")
+
+def test_directory_index_matches_tree(project):
+    tree = fc.build_merkle_tree((entry["path"], entry["hash"]) for entry in fc.iter_manifest("proj.fsm"))
+    for directory, node in tree.items():
+        assert fc.merkle_digest("proj.fsm", directory) == node[0]
+    assert fc.merkle_digest("proj.fsm", "proj/nessuna") is None
+
+def test_subtree_reads_only_its_lines(project, monkeypatch):
+    monkeypatch.setattr(fc, "_iter_manifest_entries", None)  # la lettura completa non deve servire
+    
+    stats, seen = verify(paths=["proj/src", "proj/e.py"])
+    
+    assert sorted(seen) == [str(project / name) for name in
+                            ("proj/e.py", "proj/src/a.py", "proj/src/b.py", "proj/src/sub/c.py")]
+    assert "merkle_root" not in stats
+    expected = fc.merkle_digest("proj.fsm", "proj/src")
+    assert stats["merkle_subtrees"]["proj/src"] == (expected, expected)
+    assert stats["merkle_subtrees"]["proj/e.py"][0] == stats["merkle_subtrees"]["proj/e.py"][1]
+
+@pytest.mark.parametrize("version", [1, 2])
+def test_changed_subtree(project, version):
+    if version == 1:
+        downgrade(project / "proj.fsm")
+    (project / "proj/src/sub/c.py").write_text("modificato = 1\n")
+    
+    stats, _ = verify(paths=["proj/src", "proj/src.d"])
+    
+    digest, expected = stats["merkle_subtrees"]["proj/src"]
+    assert digest != expected and stats["merkle_changed"] == ["proj/src/sub/c.py"]
+    assert len(set(stats["merkle_subtrees"]["proj/src.d"])) == 1
+    assert stats["files"] == 4 and stats["failed"] == 1
+
+def test_v1_manifest_is_still_read(project):
+    root = fc.merkle_digest("proj.fsm")
+    downgrade(project / "proj.fsm")
+    stats, _ = verify()
+    assert stats["merkle_root"] == root == fc.merkle_digest("proj.fsm")
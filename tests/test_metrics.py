@@ -0,0 +1,71 @@
+"""Strumentazione: eventi strutturati per fase, aggregazione e textfile Prometheus."""
+
+import json
+
+import pytest
+
+import filesigner_core as fc
+
+@pytest.fixture
+def tree(tmp_path):
+    source = tmp_path / "src"
+    source.mkdir()
+    for index in range(3):
+        (source / f"f{index}.py").write_text("\n\nx = 1\n\n\n\n# _SIGNED_vecchia\n" * (index + 1))
+    return source
+
+def test_events_of_a_single_operation(tree):
+    events = []
+    file_path = str(tree / "f0.py")
+    
+    assert fc.add_signature(file_path, metrics=events.append)[0]
+    
+    stages = [(e["type"], e["stage"]) for e in events if e["type"] != "file_end"]
+    assert ("stage_end", "read") in stages and ("stage_end", "write") in stages
+    for name in ("read", "normalise", "hash", "write"):
+        assert stages.index(("stage_start", name)) < stages.index(("stage_end", name))
+    end = events[-1]
+    assert end["type"] == "file_end" and end["op"] == "sign" and end["ok"] and end["path"] == file_path
+    assert end["lines_filtered"] == 1 and end["bytes_read"] > 0 and end["bytes_written"] > 0
+    assert set(end["stages"]) == {"read", "normalise", "hash", "write"}
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_verify_counts_bytes(tree, streaming):
+    file_path = str(tree / "f2.py")
+    assert fc.add_signature(file_path)[0]
+    events = []
+    
+    assert fc.verify_signature(file_path, streaming=streaming, metrics=events.append)[0]
+    
+    end = events[-1]
+    assert end["op"] == "verify" and end["bytes_read"] == (tree / "f2.py").stat().st_size
+    assert end["bytes_hashed"] > 0
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_batch_events_reach_the_collector(tree, tmp_path, jobs):
+    events_path = tmp_path / "eventi.jsonl"
+    collector = fc.MetricsCollector(str(events_path))
+    
+    fc.run_batch("sign", [str(tree)], jobs=jobs, metrics=collector)
+    fc.run_batch("verify", [str(tree)], jobs=jobs, metrics=collector)
+    collector.close()
+    
+    ends = [json.loads(line) for line in events_path.read_text().splitlines()]
+    ends = [event for event in ends if event["type"] == "file_end"]
+    assert sorted((e["op"], e["ok"]) for e in ends) == [("sign", True)] * 3 + [("verify", True)] * 3
+    assert collector.files == {("sign", "ok"): 3, ("verify", "ok"): 3}
+    assert collector.counters[("lines_filtered", "sign")] == 1 + 2 + 3
+
+def test_prometheus_textfile(tree, tmp_path):
+    collector = fc.MetricsCollector()
+    fc.run_batch("sign", [str(tree)], jobs=1, metrics=collector)
+    prom_path = tmp_path / "filesigner.prom"
+    
+    collector.write_prometheus(str(prom_path))
+    
+    text = prom_path.read_text()
+    assert 'filesigner_files_total{op="sign",result="ok"} 3' in text
+    assert "# TYPE filesigner_file_duration_seconds histogram" in text
+    assert 'filesigner_file_duration_seconds_count{op="sign"} 3' in text
+    assert 'filesigner_file_duration_seconds_bucket{op="sign",le="+Inf"} 3' in text
+    assert [p.name for p in tmp_path.iterdir() if p.name.startswith(".filesigner")] == []
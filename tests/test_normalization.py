@@ -0,0 +1,134 @@
+"""Test differenziali della normalizzazione.
+
+Il riferimento è remove_signature_lines della versione originale (testo, una
+linea alla volta): il motore su bytes e il normalizzatore in streaming devono
+produrre esattamente gli stessi byte, con qualsiasi suddivisione in blocchi.
+"""
+
+import io
+import random
+
+import pytest
+
+import filesigner_core as fc
+
+def baseline_remove_signature_lines(content):
+    """remove_signature_lines originale, copiato alla lettera dal commit iniziale"""
+    lines = content.split('\n')
+    filtered = []
+    for line in lines:
+        if '_SIGNATURE_' not in line and '_HASH_' not in line and '_SIGNED_' not in line:
+            filtered.append(line)
+    
+    result = '\n'.join(filtered).strip()
+    
+    while '\n\n\n' in result:
+        result = result.replace('\n\n\n', '\n\n')
+    
+    return result
+
+def expected_bytes(raw):
+    """Risultato del riferimento sui byte grezzi di un file.
+    
+    La lettura originale in modalità testo uniforma \\r\\n e \\r; i byte non UTF-8
+    passano con surrogateescape, così restano opachi come nel motore su bytes.
+    """
+    text = raw.decode("utf-8", "surrogateescape").replace("\r\n", "\n").replace("\r", "\n")
+    return baseline_remove_signature_lines(text).encode("utf-8", "surrogateescape")
+
+def stream_normalize(raw, chunk_size):
+    out = io.BytesIO()
+    digest, _, _ = fc._stream_hash(io.BytesIO(raw), len(raw), out, chunk_size=chunk_size)
+    return out.getvalue(), digest
+
+SIGNATURE = (
+    "# _SIGNATURE_0f3c2a1e-8d4b-4c7a-9e21-5b6d7c8e9f00\n"
+    "# _HASH_d287bb7f9d15abdc5b6e98536263815744b6ef21c8f3c839fc434ca70d8efe99\n"
+    "# _SIGNED_2024-01-02 03:04:05\n"
+)
+
+EDGE_CASES = {
+    "vuoto": b"",
+    "solo-spazi": b" \t\n\r\n  \x0c\n",
+    "crlf": b"def f():\r\n    return 1\r\n\r\n\r\n\r\nprint(f())\r\n",
+    "solo-cr": b"a = 1\rb = 2\r\r\r\rc = 3\r",
+    "cr-crlf-misti": b"a\r\r\nb\n\rc\r\n\r\n\r\n\rd",
+    "righe-vuote-finali": b"x = 1\n\n\n\n\n\n\n\n",
+    "righe-vuote-finali-con-spazi": b"x = 1\n  \n\t\n\n\n   ",
+    "righe-vuote-centrali": b"a\n\n\n\n\nb\n\n\nc\n\n",
+    "marcatori-in-mezzo": ("a = 1\n" + SIGNATURE + "b = 2\n\n\n\nc = 3\n").encode(),
+    "marcatori-in-testa": (SIGNATURE + "\n\n\nbody\n").encode(),
+    "marcatori-in-coda": ("body\n\n" + SIGNATURE).encode(),
+    "solo-marcatori": SIGNATURE.encode(),
+    "marcatore-nel-codice": b"x = '_HASH_ in una stringa'\ny = 2\n",
+    "marcatori-crlf": ("code\r\n" + SIGNATURE.replace("\n", "\r\n")).encode(),
+    "marcatore-dopo-cr": b"a\r_SIGNED_ x\rb\r",
+    "latin-1": "città = 'perché'\n\n\n\nè = 1\n".encode("latin-1"),
+    "non-utf8-misto": b"\xff\xfe\x00a\n\n\n\n\x80\x81 _HASH_x\n\xc3\xa8\xe2\x82\n\xed\xa0\x80\n",
+    "spazi-unicode": "　  testo  \n\n\n\n \x85".encode(),
+    "spazio-unicode-troncato": b"\xe3\x80 x \xe3\x80",
+    "nbsp-latin-1": b"\xa0x\xa0",
+    "separatori-ascii": b"\x1c\x1dx\x1e\x1f",
+    "riga-lunghissima": b"  " + b"y" * 5000 + b"\n\n\n\n" + b"z" * 3000 + b"   \n\n",
+    "spazi-lunghissimi": b"a" + b" " * 4000 + b"\n" * 4000 + b"b" + b"\t" * 4000,
+}
+
+def random_content(rng):
+    fragments = [
+        b"a", b"xyz", b"def f():", b"    ", b"\t", b" ", b"\n", b"\n", b"\n", b"\r\n", b"\r", b"\x0c",
+        b"_SIGNATURE_", b"_HASH_", b"_SIGNED_", b"_SIGN", b"_HA", b"NED_", b"_", b"\xc3\xa8", b"\xe2\x80\xa8",
+        b"\xe3\x80\x80", b"\xc2\xa0", b"\xc2\x85", b"\xff", b"\x80", b"\xe2\x82", b"\x1c",
+    ]
+    return b"".join(rng.choice(fragments) for _ in range(rng.randrange(0, 60)))
+
+RANDOM_CASES = [random_content(random.Random(seed)) for seed in range(1500)]
+
+CHUNK_SIZES = (1, 2, 3, 5, 7, 11, 64, fc.STREAM_CHUNK_SIZE)
+
+@pytest.mark.parametrize("raw", list(EDGE_CASES.values()), ids=list(EDGE_CASES))
+def test_edge_cases_bytes(raw):
+    assert fc.remove_signature_lines(fc._universal_newlines(raw)) == expected_bytes(raw)
+
+@pytest.mark.parametrize("raw", list(EDGE_CASES.values()), ids=list(EDGE_CASES))
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_edge_cases_streaming(raw, chunk_size):
+    expected = expected_bytes(raw)
+    normalized, digest = stream_normalize(raw, chunk_size)
+    assert normalized == fc._disk_bytes(expected)
+    assert digest == fc.hash_bytes(expected)
+
+def test_chunk_boundary_inside_marker():
+    raw = ("prima = 1\n" + SIGNATURE + "dopo = 2\n").encode()
+    expected = expected_bytes(raw)
+    start = raw.index(b"_HASH_")
+    for chunk_size in range(1, 40):
+        # ogni dimensione fa cadere un confine di blocco in un punto diverso del marcatore
+        assert stream_normalize(raw, chunk_size)[0] == fc._disk_bytes(expected), chunk_size
+    for cut in range(start, start + len(b"_HASH_") + 1):
+        # un solo confine, esattamente dentro _HASH_
+        assert stream_normalize(raw, cut)[0] == fc._disk_bytes(expected), cut
+
+def test_str_and_bytes_agree():
+    for raw in EDGE_CASES.values():
+        try:
+            text = raw.decode("utf-8")
+        except UnicodeDecodeError:
+            continue
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+        assert fc.remove_signature_lines(text) == baseline_remove_signature_lines(text)
+
+def test_random_inputs():
+    for raw in RANDOM_CASES:
+        expected = expected_bytes(raw)
+        assert fc.remove_signature_lines(fc._universal_newlines(raw)) == expected, raw
+        for chunk_size in (1, 3, 8):
+            assert stream_normalize(raw, chunk_size)[0] == fc._disk_bytes(expected), (raw, chunk_size)
+
+def test_file_paths_agree(tmp_path):
+    """Verifica in memoria e in streaming di un file reale danno lo stesso esito"""
+    for name, raw in EDGE_CASES.items():
+        file_path = tmp_path / f"{name}.py"
+        file_path.write_bytes(raw)
+        expected = fc.hash_bytes(expected_bytes(raw))
+        assert fc.compute_content_hash(str(file_path), streaming=False) == expected
+        assert fc.compute_content_hash(str(file_path), streaming=True) == expected
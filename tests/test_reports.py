@@ -0,0 +1,63 @@
+"""Report in streaming: JSON Lines con un oggetto per file e SARIF 2.1.0."""
+
+import io
+import json
+import os
+
+import pytest
+
+import filesigner_core as fc
+
+@pytest.fixture
+def tree(tmp_path):
+    source = tmp_path / "src"
+    source.mkdir()
+    for name in ("valido.py", "modificato.py"):
+        (source / name).write_text("x = 1\n")
+        assert fc.add_signature(str(source / name))[0]
+    (source / "modificato.py").write_bytes((source / "modificato.py").read_bytes().replace(b"x = 1", b"x = 2"))
+    (source / "non firmato.py").write_text("y = 1\n")
+    return source
+
+def test_jsonl_report(tree, tmp_path):
+    report_path = tmp_path / "verifica.jsonl"
+    results = fc.open_report(str(report_path))
+    
+    fc.run_batch("verify", [str(tree)], jobs=1, results=results)
+    results.close()
+    
+    rows = {json.loads(line)["path"]: json.loads(line) for line in report_path.read_text().splitlines()}
+    assert {os.path.basename(path): row["status"] for path, row in rows.items()} == {
+        "valido.py": "valid", "modificato.py": "modified", "non firmato.py": "unsigned",
+    }
+    modified = rows[str(tree / "modificato.py")]
+    assert modified["stored_hash"] != modified["recomputed_hash"]
+    assert fc.VerificationResult.from_dict(modified).message == fc.verify_signature(str(tree / "modificato.py"))[1]
+
+@pytest.mark.parametrize("include_valid", [False, True])
+def test_sarif_report(tree, include_valid):
+    stream = io.StringIO()
+    results = fc.SarifReport(stream, include_valid=include_valid, root=str(tree))
+    
+    fc.run_batch("verify", [str(tree)], jobs=1, results=results)
+    results.close()
+    
+    sarif = json.loads(stream.getvalue())
+    run = sarif["runs"][0]
+    assert sarif["version"] == "2.1.0"
+    assert {rule["id"] for rule in run["tool"]["driver"]["rules"]} == {rule[0] for rule in fc.SARIF_RULES.values()}
+    uris = {r["locations"][0]["physicalLocation"]["artifactLocation"]["uri"]: r for r in run["results"]}
+    expected = {"modificato.py", "non%20firmato.py"} | ({"valido.py"} if include_valid else set())
+    assert set(uris) == expected
+    assert all(r["locations"][0]["physicalLocation"]["artifactLocation"]["uriBaseId"] == "SRCROOT"
+               for r in run["results"])
+    assert run["invocations"][0]["properties"] == {"files": 3, "failed": 2}
+
+def test_format_selection(tmp_path):
+    sarif = fc.open_report(str(tmp_path / "r.sarif"))
+    jsonl = fc.open_report(str(tmp_path / "r.txt"))
+    sarif.close()
+    jsonl.close()
+    assert isinstance(sarif, fc.SarifReport) and isinstance(jsonl, fc.JsonLinesReport)
+    with pytest.raises(ValueError):
+        fc.open_report(str(tmp_path / "r.xml"), "xml")
@@ -0,0 +1,36 @@
+"""Modello della tabella dei risultati della GUI: conteggi, filtro e formato delle righe."""
+
+import pytest
+
+FileSigner = pytest.importorskip("FileSigner")
+
+@pytest.fixture
+def model():
+    model = FileSigner.ResultsModel()
+    model.extend(["a.py", "b.py", "c.py", "d.py"])
+    model.set_result(0, True, "ok", "abc", 0.5)
+    model.set_result(1, False, "Firma non valida\ndettaglio", "def", 1.25)
+    model.set_result(2, False, "File non firmato", "", 0.01)
+    return model
+
+def test_counts(model):
+    assert (model.ok, model.done, model.pending, len(model)) == (1, 3, 1, 4)
+    assert model.row(3) == ("d.py", None, "", "", None)
+
+def test_failed_filter(model):
+    model.filter = "failed"
+    
+    assert len(model) == 2
+    assert [model.row(position)[0] for position in range(len(model))] == ["b.py", "c.py"]
+
+def test_clear(model):
+    model.filter = "failed"
+    model.clear()
+    assert (len(model), model.done, model.pending, model.filter) == (0, 0, 0, "all")
+
+def test_format_row(model):
+    format_row = FileSigner.ResultsTable.format_row
+    
+    assert format_row(model.row(0)) == (("a.py", "✓ OK", "abc", "500.0 ms"), "ok")
+    assert format_row(model.row(1)) == (("b.py", "✗ Firma non valida", "def", "1.25 s"), "failed")
+    assert format_row(model.row(3)) == (("d.py", "⏳ In coda", "", ""), "pending")
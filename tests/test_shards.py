@@ -0,0 +1,62 @@
+"""Verifica a shard: piano bilanciato per byte, report degli shard e merge."""
+
+import pytest
+
+import filesigner_core as fc
+
+SIZES = (9000, 5000, 4000, 3000, 1000, 500)
+
+@pytest.fixture
+def tree(tmp_path):
+    for index, size in enumerate(SIZES):
+        file_path = tmp_path / f"f{index}.py"
+        file_path.write_bytes(b"#" * size + b"\nx = 1\n")
+        assert fc.add_signature(str(file_path))[0]
+    (tmp_path / "f5.py").write_bytes(b"modificato = 1\n")
+    return tmp_path
+
+def test_plan_is_balanced_by_bytes(tree):
+    plan_id, plan = fc.plan_shards([str(tree)], 2)
+    
+    loads = [sum((tree / p).stat().st_size for p in shard) for shard in plan]
+    assert sorted(sum(plan, [])) == sorted(str(p) for p in tree.iterdir())
+    assert max(loads) - min(loads) <= max(SIZES)
+    assert fc.plan_shards([str(tree)], 2) == (plan_id, plan)
+
+def test_merge_reports_all_files_and_bytes(tree, tmp_path_factory):
+    reports = tmp_path_factory.mktemp("report")
+    paths = [str(reports / f"shard-{shard}.jsonl") for shard in (1, 2, 3)]
+    for shard, report_path in enumerate(paths, 1):
+        fc.run_shard([str(tree)], shard, 3, report_path, jobs=1)
+    merged = []
+    
+    stats = fc.merge_shard_reports(paths, results=merged.append)
+    
+    assert stats["missing_shards"] == []
+    assert stats["files"] == len(SIZES) and stats["failed"] == 1
+    assert stats["bytes"] == sum(p.stat().st_size for p in tree.iterdir())
+    assert sorted(result.path for result in merged) == sorted(str(p) for p in tree.iterdir())
+
+def test_missing_and_truncated_shards(tree, tmp_path_factory):
+    reports = tmp_path_factory.mktemp("report")
+    first, second = str(reports / "shard-1.jsonl"), str(reports / "shard-2.jsonl")
+    fc.run_shard([str(tree)], 1, 3, first, jobs=1)
+    fc.run_shard([str(tree)], 2, 3, second, jobs=1)
+    with open(second, "r+", encoding="utf-8") as f:
+        lines = f.readlines()
+        f.seek(0)
+        f.truncate()
+        f.writelines(lines[:-1])  # shard interrotto: manca l'ultimo risultato
+    
+    stats = fc.merge_shard_reports([first, second])
+    
+    assert stats["missing_shards"] == [2, 3]
+    assert stats["files"] == len(fc.plan_shards([str(tree)], 3)[1][0])
+
+def test_reports_from_another_plan_are_rejected(tree, tmp_path_factory):
+    reports = tmp_path_factory.mktemp("report")
+    fc.run_shard([str(tree)], 1, 2, str(reports / "a.jsonl"), jobs=1)
+    fc.run_shard([str(tree)], 1, 3, str(reports / "b.jsonl"), jobs=1)
+    
+    with pytest.raises(ValueError):
+        fc.merge_shard_reports([str(reports / "a.jsonl"), str(reports / "b.jsonl")])
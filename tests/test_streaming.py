@@ -0,0 +1,55 @@
+"""Percorso in streaming: stessi risultati del percorso in memoria."""
+
+import pytest
+
+import filesigner_core as fc
+
+CONTENTS = [
+    b"x = 1",
+    b"\n\n  x = 1\r\n\r\n\r\n\r\ny = 2\n\n\n",
+    b"a = 1\n# _SIGNATURE_vecchia\n# _HASH_" + b"0" * 64 + b"\n\n\n\nb = 2\r",
+    bytes(range(256)) * 40,
+]
+
+@pytest.mark.parametrize("content", CONTENTS)
+def test_streaming_sign_matches_in_memory(tmp_path, content):
+    in_memory, streamed = tmp_path / "a.py", tmp_path / "b.py"
+    in_memory.write_bytes(content)
+    streamed.write_bytes(content)
+    
+    assert fc.add_signature(str(in_memory), streaming=False)[0]
+    assert fc.add_signature(str(streamed), streaming=True)[0]
+    
+    strip = lambda path: fc.remove_signature_lines(path.read_bytes())
+    assert strip(in_memory) == strip(streamed)
+    for path in (in_memory, streamed):
+        for streaming in (False, True):
+            assert fc.verify_signature(str(path), streaming=streaming)[0]
+
+@pytest.mark.parametrize("content", CONTENTS)
+def test_streaming_hash_matches_in_memory(tmp_path, content):
+    file_path = tmp_path / "a.py"
+    file_path.write_bytes(content)
+    
+    expected = fc.hash_bytes(fc._normalize_content(fc._universal_newlines(content))[0])
+    for chunk_size in (1, 7, 4096):
+        assert fc.stream_normalized_hash(str(file_path), chunk_size=chunk_size)[0] == expected
+    assert fc.compute_content_hash(str(file_path), streaming=True) == expected
+
+def test_progress_and_cancellation(tmp_path):
+    file_path = tmp_path / "a.py"
+    original = b"\n\nx = 1\n" * 100
+    file_path.write_bytes(original)
+    progress = []
+    
+    def cancel(done, total):
+        progress.append((done, total))
+        if done >= total // 2:
+            raise fc.OperationCancelled()
+    
+    ok, message = fc.add_signature(str(file_path), streaming=True, bytes_callback=cancel)
+    
+    assert not ok and message == fc.CANCELLED_MESSAGE
+    assert file_path.read_bytes() == original
+    assert [name.name for name in tmp_path.iterdir()] == ["a.py"]
+    assert progress[-1][1] == len(original)
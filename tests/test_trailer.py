@@ -0,0 +1,51 @@
+"""Estrazione della firma: lettura della sola coda e ripiego sulla scansione completa."""
+
+import pytest
+
+import filesigner_core as fc
+
+@pytest.fixture
+def signed(tmp_path):
+    file_path = tmp_path / "app.py"
+    file_path.write_bytes(b"x = 1\n" * 2000)  # più grande di TRAILER_READ_SIZE
+    assert fc.add_signature(str(file_path))[0]
+    return file_path
+
+def test_trailer_is_read_from_the_tail(signed, monkeypatch):
+    monkeypatch.setattr(fc, "_signature_data", None)  # la scansione completa non deve servire
+    
+    data = fc.extract_signature_data(str(signed), with_content=False)
+    
+    assert data["signature"] and data["hash"] and data["raw"] is None
+    assert fc.read_signature_trailer(str(signed))["signature"] == data["signature"]
+
+def test_crlf_trailer(signed):
+    signed.write_bytes(signed.read_bytes().replace(b"\n", b"\r\n"))
+    assert fc.read_signature_trailer(str(signed))["signature"]
+    assert fc.verify_signature(str(signed))[0]
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_text_after_signature_falls_back_to_full_scan(signed, streaming):
+    expected = fc.read_signature_trailer(str(signed))
+    with open(signed, "ab") as f:
+        f.write(b"aggiunto = 1\n" + b"# riempitivo\n" * 1000)
+    
+    assert fc.read_signature_trailer(str(signed)) is None
+    data = fc.extract_signature_data(str(signed), with_content=False)
+    assert data["raw"] is not None and data["signature"] == expected["signature"]
+    
+    result = fc.verify_file(str(signed), streaming=streaming)
+    assert result.status == "modified" and result.signature_id == expected["signature"]
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_unsigned_file(tmp_path, streaming):
+    file_path = tmp_path / "app.py"
+    file_path.write_bytes(b"x = 1\n" * 2000)
+    
+    assert fc.read_signature_trailer(str(file_path)) is None
+    assert fc.verify_file(str(file_path), streaming=streaming).status == "unsigned"
+
+def test_partial_trailer_is_not_a_signature(tmp_path):
+    file_path = tmp_path / "app.py"
+    file_path.write_bytes(b"x = 1\n# _HASH_" + b"0" * 64 + b"\n")
+    assert fc.read_signature_trailer(str(file_path)) is None
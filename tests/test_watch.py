@@ -0,0 +1,62 @@
+"""Modalità watch: riverifica dei file modificati, con raffiche di scritture accorpate."""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+import filesigner_core as fc
+
+BACKENDS = [True] + ([False] if sys.platform.startswith("linux") else [])
+
+@pytest.fixture
+def watched(tmp_path, monkeypatch, request):
+    monkeypatch.setattr(fc, "WATCH_POLL_INTERVAL", 0.02)
+    source = tmp_path / "src"
+    source.mkdir()
+    for name in ("a.py", "b.py"):
+        (source / name).write_text(f"{name[0]} = 1\n")
+        assert fc.add_signature(str(source / name))[0]
+    
+    reports = []
+    stop = threading.Event()
+    thread = threading.Thread(
+        target=fc.watch, args=([str(source)], lambda *report: reports.append(report)),
+        kwargs={"debounce": 0.1, "polling": request.param, "stop_event": stop}, daemon=True,
+    )
+    thread.start()
+    time.sleep(0.1)  # watcher pronto prima delle modifiche
+    yield source, reports
+    stop.set()
+    thread.join(5)
+    assert not thread.is_alive()
+
+def wait_for(reports, count, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while len(reports) < count and time.monotonic() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.3)  # eventuali report in eccesso
+    return {os.path.basename(path): ok for path, ok, _ in reports}
+
+@pytest.mark.parametrize("watched", BACKENDS, indirect=True, ids=["polling", "inotify"][:len(BACKENDS)])
+def test_burst_of_writes_is_verified_once(watched):
+    source, reports = watched
+    for index in range(5):
+        with open(source / "a.py", "ab") as f:
+            f.write(f"riga_{index} = {index}\n".encode())
+        time.sleep(0.01)
+    
+    assert wait_for(reports, 1) == {"a.py": False}
+    assert len(reports) == 1
+
+@pytest.mark.parametrize("watched", BACKENDS, indirect=True, ids=["polling", "inotify"][:len(BACKENDS)])
+def test_new_and_resigned_files(watched):
+    source, reports = watched
+    (source / "nuova").mkdir()
+    (source / "nuova" / "c.py").write_text("c = 1\n")
+    (source / "note.txt").write_text("non un file di codice\n")
+    assert fc.add_signature(str(source / "b.py"))[0]
+    
+    assert wait_for(reports, 2) == {"c.py": False, "b.py": True}